@@ -10,4 +10,6 @@ def main(inputfiles=[]):
     pydatview.show(filenames=inputfiles)
 
 if __name__ == '__main__':
+    import multiprocessing
+    multiprocessing.freeze_support() # Needed for parallel file loading in frozen executables
     main(sys.argv[1:])
@@ -363,9 +363,9 @@ class InfoPanel(wx.Panel):
                     # Calling dedicated function: either a function handle, f(PD), or a method, pd.m.
                     try:
                         if 'm' in c.keys():
-                            v,sv=getattr(pd,c['m'])()
+                            v,sv=pd.cachedStat(c['m'])
                         else:
-                            v,sv=c['f'](pd)
+                            v,sv=pd.cachedStat(c['name'], lambda: c['f'](pd))
                     except:
                         # print statement because developper should fix this..
                         print('GUIInfoPanel: Stat {} failed'.format(c['name']))
@@ -41,11 +41,12 @@ from pandas.plotting import register_matplotlib_converters
 import gc
 
 from pydatview.common import * # unique, CHAR, pretty_date
-from pydatview.plotdata import PlotData, compareMultiplePD 
+from pydatview.plotdata import PlotData, compareMultiplePD, toFFTBatch
 from pydatview.plotdata import PDL_xlabel
 from pydatview.GUICommon import * 
 from pydatview.GUIToolBox import MyMultiCursor, MyNavigationToolbar2Wx, TBAddTool, TBAddCheckTool
 from pydatview.GUIMeasure import GUIMeasure, find_closest_i
+from pydatview.tools.decimation import DecimatedLine
 import pydatview.icons as icons
 
 font = {'size'   : 8}
@@ -469,6 +470,10 @@ class EstheticsPanel(wx.Panel):
         except ValueError:
             i = 2
         self.cbMS.SetSelection(i)
+        # Decimation
+        self.cbDecim = wx.CheckBox(self, -1, 'Decimate',(10,10))
+        self.cbDecim.SetToolTip('Plot min/max envelopes of large signals (one per pixel), for faster redraw, zoom and pan.')
+        self.cbDecim.SetValue(str(data.get('Decimation', True))=='True')
 
         # Layout
         #dummy_sizer = wx.BoxSizer(wx.HORIZONTAL)
@@ -483,10 +488,12 @@ class EstheticsPanel(wx.Panel):
         dummy_sizer.Add(self.cbLegend         ,0, flag = wx.CENTER|wx.LEFT,border = 1)
         dummy_sizer.Add(lbLgdFont             ,0, flag = wx.CENTER|wx.LEFT,border = 5)
         dummy_sizer.Add(self.cbLgdFont        ,0, flag = wx.CENTER|wx.LEFT,border = 1)
+        dummy_sizer.Add(self.cbDecim          ,0, flag = wx.CENTER|wx.LEFT,border = 5)
         self.SetSizer(dummy_sizer)
         self.Hide()
         # Callbacks
         self.Bind(wx.EVT_COMBOBOX  ,self.onAnyEsthOptionChange)
+        self.Bind(wx.EVT_CHECKBOX  ,self.onAnyEsthOptionChange)
         self.cbFont.Bind(wx.EVT_COMBOBOX  ,self.onFontOptionChange)
 
         # Store data
@@ -507,6 +514,7 @@ class EstheticsPanel(wx.Panel):
         self.data['LegendPosition'] = self.cbLegend.GetValue()
         self.data['LineWidth']      = float(self.cbLW.GetValue())
         self.data['MarkerSize']     = float(self.cbMS.GetValue())
+        self.data['Decimation']     = self.cbDecim.IsChecked()
         return self.data
 
 
@@ -558,6 +566,7 @@ class PlotPanel(wx.Panel):
         self.leftMeasure = GUIMeasure(1, 'firebrick')
         self.rightMeasure = GUIMeasure(2, 'darkgreen')
         self.markers = [] # List of GUIMeasures
+        self.lodLines = [] # List of DecimatedLines, recomputed on zoom/pan
         self.xlim_prev = [[0, 1]]
         self.ylim_prev = [[0, 1]]
         self.addTablesCallback = None
@@ -748,6 +757,7 @@ class PlotPanel(wx.Panel):
         plotStyle['LegendPosition'] = 'Upper right'
         plotStyle['LineWidth']      = '1.5'
         plotStyle['MarkerSize']     = '2'
+        plotStyle['Decimation']     = True
         data['plotStyle']= plotStyle
         return data
 
@@ -1119,15 +1129,19 @@ class PlotPanel(wx.Panel):
             raise e # Used to be Warn
 
     def setPD_FFT(self, PD):
-        """ Convert plot data to FFT data based on GUI options"""
+        """ Convert plot data (or list of plot data) to FFT data based on GUI options"""
         data = self.spcPanel._GUI2Data()
         # Convert plotdata to FFT data
         try:
-            Info = PD.toFFT(**data) 
-            # Trigger
-            if hasattr(Info,'nExp') and Info.nExp!=data['nExp']:
-                self.spcPanel.scP2.SetValue(Info.nExp)
-                self.spcPanel.updateP2(Info.nExp)
+            if isinstance(PD, list):
+                Infos = toFFTBatch(PD, **data)
+            else:
+                Infos = [PD.toFFT(**data)]
+            # Trigger: nExp is reduced for short signals, the smallest value used by the plots is displayed
+            nExps = [Info.nExp for Info in Infos if getattr(Info, 'nExp', None) is not None]
+            if len(nExps)>0 and min(nExps)!=data['nExp']:
+                self.spcPanel.scP2.SetValue(min(nExps))
+                self.spcPanel.updateP2(min(nExps))
         except Exception as e:
             self.spcPanel.Hide();
             self.plotsizer.Layout()
@@ -1179,8 +1193,12 @@ class PlotPanel(wx.Panel):
                 # Initialize each plotdata based on selected table and selected id channels
                 PD = PlotData();
                 PD.fromIDs(tabs, i, idx, SameCol, pipeline=self.pipeLike) 
-                self.transformPlotData(PD, firstCall=i==0)
+                if plotType!='FFT':
+                    self.transformPlotData(PD, firstCall=i==0)
                 self.plotData.append(PD)
+            if plotType=='FFT':
+                # Spectra of channels sharing the same x are computed together
+                self.setPD_FFT(self.plotData)
         except Exception as e:
             self.plotData=[]
             raise e
@@ -1352,6 +1370,7 @@ class PlotPanel(wx.Panel):
 
         plot_options['lw']=plotStyle['LineWidth']
         plot_options['ms']=plotStyle['MarkerSize']
+        plot_options['decimate']=plotStyle['Decimation']
         if self.cbCurveType.Value=='Plain':
             plot_options['LineStyles'] = ['-']
             plot_options['Markers']    = ['']
@@ -1391,6 +1410,7 @@ class PlotPanel(wx.Panel):
                      self._restore_limits and the variables: self.xlim_prev, self.ylim_prev
         """
         self.multiCursors=[]
+        self.lodLines=[]
 
         axes=self.fig.axes
         PD=self.plotData
@@ -1601,7 +1621,17 @@ class PlotPanel(wx.Panel):
                     plot = axis.step
                 else:
                     plot = axis.plot
-                plot(pd.x,pd.y,label=pd.syl,ms=opts['ms'], lw=opts['lw'], marker=marker, ls=ls)
+                if opts['decimate'] and marker=='' and DecimatedLine.canDecimate(pd.x, pd.y):
+                    # Level of detail: only the min/max envelope per pixel is plotted
+                    # The full range is used at first, so that autoscaling sees the full extent
+                    lod = DecimatedLine(None, pd.x, pd.y, swap=getattr(axis, 'swap', False))
+                    xd, yd = lod.decimate(axis, xlim=(pd.x[0], pd.x[-1]))
+                    lines = plot(xd,yd,label=pd.syl,ms=opts['ms'], lw=opts['lw'], marker=marker, ls=ls)
+                    lod.line = lines[0]
+                    lod.connect()
+                    self.lodLines.append(lod)
+                else:
+                    plot(pd.x,pd.y,label=pd.syl,ms=opts['ms'], lw=opts['lw'], marker=marker, ls=ls)
                 try:
                     bAllNeg = bAllNeg and all(pd.y<=0)
                 except:
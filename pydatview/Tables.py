@@ -1,11 +1,13 @@
 import numpy as np
 import os.path
+import itertools
 from dateutil import parser
 import datetime
 import pandas as pd
 from pydatview.common import no_unit, ellude_common, getDt, exception2string, PyDatViewException
+from pydatview.common import guessDateFormat, toDatetime64
 import pydatview.io as weio # File Formats and File Readers
-from pydatview.formulae import evalFormula
+from pydatview.formulae import evalFormula, formulaOrder, compileMask
 
 # --------------------------------------------------------------------------------}
 # --- TabList 
@@ -17,21 +19,42 @@ class TableList(object): # todo inherit list
             tabs =[]
         self._tabs  = tabs
         self.hasswap=False
+        self._fileCache = None
 
         self.options = self.defaultOptions() if options is None else options
 
     # --- Options 
-    def saveOptions(self, optionts):
+    def saveOptions(self, options):
         options['naming']   = self.options['naming']
         options['dayfirst'] = self.options['dayfirst']
+        options['lazy']     = self.options['lazy']
+        options['cache']    = self.options['cache']
+        options['cacheMaxMB'] = self.options['cacheMaxMB']
+        options['nWorkers'] = self.options['nWorkers']
+        options['pool']     = self.options['pool']
         
     @staticmethod
     def defaultOptions():
         options={}
         options['naming']   = 'Ellude'
         options['dayfirst'] = False
+        options['lazy']     = False # Memory-map large binary files and decode columns on demand
+        options['cache']    = False # Store the parsed files on disk, see filecache.py
+        options['cacheMaxMB'] = 2048
+        options['nWorkers'] = 1         # Number of files read in parallel
+        options['pool']     = 'process' # 'process' or 'thread', see load_tables_from_files
         return options
 
+    @property
+    def fileCache(self):
+        """ Persistent cache of parsed files, None if the cache is not activated """
+        if not self.options.get('cache', False):
+            return None
+        if self._fileCache is None:
+            from pydatview.filecache import FileCache
+            self._fileCache = FileCache(maxBytes=self.options.get('cacheMaxMB', 2048)*1024**2)
+        return self._fileCache
+
     # --- behaves like a list...
     #def __delitem__(self, key):
     #    self.__delattr__(key)
@@ -76,90 +99,125 @@ class TableList(object): # todo inherit list
             if df is not None:
                 self.append(Table(data=df, name=name, dayfirst=self.options['dayfirst']))
 
-    def load_tables_from_files(self, filenames=[], fileformats=None, bAdd=False, bReload=False, statusFunction=None):
-        """ load multiple files into table list"""
+    def load_tables_from_files(self, filenames=[], fileformats=None, bAdd=False, bReload=False, statusFunction=None, nWorkers=None, pool=None):
+        """ load multiple files into table list
+        INPUTS:
+         - nWorkers: number of files read concurrently. Default: self.options['nWorkers']
+                     If >1, the files are read in parallel, the order of the tables is preserved.
+         - pool: 'process' or 'thread'. Default: self.options['pool']
+                 Use 'thread' for readers that release the GIL (e.g. binary files)
+        """
         if not bAdd:
             self.clean() # TODO figure it out
         if bReload:
             self.hasswap=False
+        if nWorkers is None:
+            nWorkers = self.options.get('nWorkers', 1)
+        if pool is None:
+            pool = self.options.get('pool', 'process')
 
         if fileformats is None:
             fileformats=[None]*len(filenames)
         assert type(fileformats) ==list, 'fileformats must be a list'
 
-        # Loop through files, appending tables within files
-        warnList=[]
-        newTabs=[]
+        # --- Files that need to be read
+        warnList = [None]*len(filenames)
+        jobs = []
+        unique_filenames = self.unique_filenames
         for i, (f,ff) in enumerate(zip(filenames, fileformats)):
-            if statusFunction is not None:
-                statusFunction(i)
-            if f in self.unique_filenames:
-                warnList.append('Warn: Cannot add a file already opened ' + f)
+            if f in unique_filenames:
+                warnList[i] = 'Warn: Cannot add a file already opened ' + f
             elif len(f)==0:
                 pass
                 #    warn+= 'Warn: an empty filename was skipped' +'\n'
             else:
-                tabs, warnloc = self._load_file_tabs(f,fileformat=ff, bReload=bReload) 
-                if len(warnloc)>0:
-                    warnList.append(warnloc)
-                self.append(tabs)
-                newTabs +=tabs
+                jobs.append(i)
+                unique_filenames.append(f)
+
+        # --- Reading files, serially or in parallel
+        if nWorkers is not None and nWorkers>1 and len(jobs)>1:
+            results = self._read_files_parallel([filenames[i] for i in jobs], [fileformats[i] for i in jobs], bReload=bReload, nWorkers=nWorkers, pool=pool, statusFunction=statusFunction)
+        else:
+            results = []
+            for i in jobs:
+                if statusFunction is not None:
+                    statusFunction(i) # Index in filenames
+                results.append(self._read_file(filenames[i], fileformat=fileformats[i], bReload=bReload))
+
+        # --- Creating tables, in the order of the filenames
+        newTabs=[]
+        for i, (dfs, F, fileformat, warnloc) in zip(jobs, results):
+            tabs, warnloc = self._create_tabs(filenames[i], dfs, F, fileformat, warnloc)
+            if len(warnloc)>0:
+                warnList[i] = warnloc
+            self.append(tabs)
+            newTabs +=tabs
+        warnList = [w for w in warnList if w is not None]
+        if self.fileCache is not None:
+            self.fileCache.flush()
         
         return newTabs, warnList
 
+    def _read_files_parallel(self, filenames, fileformats, bReload=False, nWorkers=2, pool='process', statusFunction=None):
+        """ Read files concurrently, returns the list of results of `_read_file`, in the order of filenames"""
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+        results = [None]*len(filenames)
+        # Files found in the cache, and files with specific reader options (e.g. memory-mapped) are read here
+        futures = {}
+        Executor = ThreadPoolExecutor if pool=='thread' else ProcessPoolExecutor
+        with Executor(max_workers=nWorkers) as executor:
+            for i, (f, ff) in enumerate(zip(filenames, fileformats)):
+                readOptions = self._readOptions(f, ff)
+                dfs = None
+                if self.fileCache is not None and len(readOptions)==0 and os.path.isfile(f):
+                    dfs, cachedFormat = self._loadFromCache(f, ff)
+                if dfs is not None:
+                    results[i] = (dfs, None, cachedFormat, '')
+                elif len(readOptions)>0:
+                    results[i] = self._read_file(f, fileformat=ff, bReload=bReload)
+                else:
+                    futures[executor.submit(_read_file, f, ff, bReload)] = i
+            nDone = len(filenames)-len(futures)
+            for future in as_completed(futures):
+                i = futures[future]
+                if statusFunction is not None:
+                    statusFunction(nDone)
+                nDone += 1
+                try:
+                    results[i] = future.result()
+                except Exception:
+                    # E.g. file object that cannot be sent between processes. We read it here, 
+                    # which will raise the exception again if it was thrown by the reader.
+                    results[i] = _read_file(filenames[i], fileformats[i], bReload)
+                dfs, F, fileformat, warn = results[i]
+                if self.fileCache is not None and len(warn)==0 and F is not None:
+                    self._storeInCache(filenames[i], fileformat, dfs)
+        return results
+
     def _load_file_tabs(self, filename, fileformat=None, bReload=False):
         """ load a single file, returns a list (often of size one) of tables """
-        # Returning a list of tables 
+        dfs, F, fileformat, warn = self._read_file(filename, fileformat=fileformat, bReload=bReload)
+        return self._create_tabs(filename, dfs, F, fileformat, warn)
+
+    def _read_file(self, filename, fileformat=None, bReload=False):
+        """ Read a file, using the cache if possible. Returns dfs, F, fileformat, warn"""
+        # --- Attempt to use the persistent cache of parsed files
+        readOptions = self._readOptions(filename, fileformat)
+        useCache = self.fileCache is not None and len(readOptions)==0 and os.path.isfile(filename)
+        if useCache:
+            dfs, cachedFormat = self._loadFromCache(filename, fileformat)
+            if dfs is not None:
+                return dfs, None, cachedFormat, ''
+
+        dfs, F, fileformat, warn = _read_file(filename, fileformat=fileformat, bReload=bReload, readOptions=readOptions)
+        if useCache and len(warn)==0 and F is not None:
+            self._storeInCache(filename, fileformat, dfs)
+        return dfs, F, fileformat, warn
+
+    def _create_tabs(self, filename, dfs, F, fileformat, warn=''):
+        """ Create list of tables from the dataframe(s) returned by a reader"""
         tabs=[]
-        warn=''
-        if not os.path.isfile(filename):
-            warn = 'Error: File not found: `'+filename+'`\n'
-            return tabs, warn
-
-        fileformatAllowedToFailOnReload = (fileformat is not None) and bReload
-        if fileformatAllowedToFailOnReload:
-            try:
-                F = fileformat.constructor(filename=filename)
-                dfs = F.toDataFrame()
-            except:
-                warnLoc = 'Failed to read file:\n\n   {}\n\nwith fileformat: {}\n\nIf you see this message, the reader tried again and succeeded with "auto"-fileformat.\n\n'.format(filename, fileformat.name)
-                tabs,warn = self._load_file_tabs(filename, fileformat=None, bReload=False)
-                return tabs, warnLoc+warn
-
-        else:
-
-            try:
-                #F = weio.read(filename, fileformat = fileformat)
-                # --- Expanded version of weio.read
-                F = None
-                if fileformat is None:
-                    fileformat, F = weio.detectFormat(filename)
-                # Reading the file with the appropriate class if necessary
-                if not isinstance(F, fileformat.constructor):
-                    F=fileformat.constructor(filename=filename)
-                dfs = F.toDataFrame()
-            except weio.FileNotFoundError as e:
-                warn = 'Error: A file was not found!\n\n While opening:\n\n {}\n\n the following file was not found:\n\n {}\n'.format(filename, e.filename)
-            except IOError:
-                warn = 'Error: IO Error thrown while opening file: '+filename+'\n'
-            except MemoryError:
-                warn='Error: Insufficient memory!\n\nFile: '+filename+'\n\nTry closing and reopening the program, or use a 64 bit version of this program (i.e. of python).\n'
-            except weio.EmptyFileError:
-                warn='Error: File empty!\n\nFile is empty: '+filename+'\n\nOpen a different file.\n'
-            except weio.FormatNotDetectedError:
-                warn='Error: File format not detected!\n\nFile: '+filename+'\n\nUse an explicit file-format from the list\n'
-            except weio.WrongFormatError as e:
-                warn='Error: Wrong file format!\n\nFile: '+filename+'\n\n'   \
-                        'The file parser for the selected format failed to open the file.\n\n'+   \
-                        'The reported error was:\n'+e.args[0]+'\n\n' +   \
-                        'Double-check your file format and report this error if you think it''s a bug.\n'
-            except weio.BrokenFormatError as e:
-                warn = 'Error: Inconsistency in the file format!\n\nFile: '+filename+'\n\n'   \
-                       'The reported error was:\n\n'+e.args[0]+'\n\n' +   \
-                       'Double-check your file format and report this error if you think it''s a bug.'
-            except:
-                raise
-        if len(warn)>0:
+        if dfs is None and len(warn)>0:
             return tabs, warn
 
         # --- Creating list of tables here
@@ -176,6 +234,42 @@ class TableList(object): # todo inherit list
             warn='Warn: No dataframe found in file: '+filename+'\n'
         return tabs, warn
 
+    def _storeInCache(self, filename, fileformat, dfs):
+        try:
+            self.fileCache.set(filename, fileformat.name, dfs)
+        except Exception as e:
+            print('[WARN] Failed to store file in cache: {}\n{}'.format(filename, e))
+
+    def _loadFromCache(self, filename, fileformat=None):
+        """ Return DataFrame(s) and fileformat from the cache, or (None, None) """
+        try:
+            dfs, formatName = self.fileCache.get(filename, None if fileformat is None else fileformat.name)
+        except Exception as e:
+            print('[WARN] Failed to access cache for file: {}\n{}'.format(filename, e))
+            return None, None
+        if dfs is None:
+            return None, None
+        if fileformat is None:
+            formats = [ff for ff in weio.fileFormats() if ff.name==formatName]
+            if len(formats)==0:
+                return None, None
+            fileformat = formats[0]
+        return dfs, fileformat
+
+    def _readOptions(self, filename, fileformat=None):
+        """ Keyword arguments passed to the file reader """
+        readOptions = {}
+        if self.options.get('lazy', False):
+            # NOTE: only OpenFAST binary files and TurbSim boxes support lazy reading for now
+            from pydatview.io.fast_output_file import FASTOutputFile
+            from pydatview.io.turbsim_file import TurbSimFile
+            ext = os.path.splitext(filename.lower())[1]
+            if ext=='.outb' and (fileformat is None or fileformat.constructor is FASTOutputFile):
+                readOptions['lazy'] = True
+            elif ext=='.bts' and (fileformat is None or fileformat.constructor is TurbSimFile):
+                readOptions['compact'] = True # Memory map, only the header is read
+        return readOptions
+
     def reloadOneTab(self, iTab, desired_fileformat=None):
         filename = self._tabs[iTab].filename
         if desired_fileformat is None:
@@ -193,6 +287,8 @@ class TableList(object): # todo inherit list
 
         # Load the file
         tabs, warn = self._load_file_tabs(filename, fileformat=fileformat, bReload=False)
+        if self.fileCache is not None:
+            self.fileCache.flush()
         # Replace in tab list:
         nTabs = len(tabs)
         for i in range(nTabs): 
@@ -207,10 +303,36 @@ class TableList(object): # todo inherit list
                     # If swapped were used, we can't really reuse their old names
                     self._tabs[iTab].name = OldNames[i]
 
+    def follow(self):
+        """ Append to the tables the rows written to their files since they were read.
+        Files that cannot be appended to (e.g. rewritten) are fully reloaded.
+        Returns the indices of the tables updated, and of the tables reloaded.
+        """
+        from pydatview.io.follow import FollowReset
+        IUpdated  = []
+        IReloaded = []
+        for iTab in range(len(self._tabs)):
+            tab = self._tabs[iTab]
+            try:
+                if tab.follow():
+                    IUpdated.append(iTab)
+            except FollowReset as e:
+                print('[INFO] {}, reloading.'.format(e))
+                self.reloadOneTab(iTab)
+                IReloaded.append(iTab)
+                try:
+                    self._tabs[iTab].follow() # The follower is created with the content just read
+                except Exception:
+                    pass # Handled at the next call
+            except Exception as e:
+                print('[WARN] Failed to follow file {}: {}'.format(tab.filename, e))
+                tab._follower = False # Not tried again
+        return IUpdated, IReloaded
+
     def haveSameColumns(self,I=None):
         if I is None:
             I=list(range(len(self._tabs)))
-        A=[len(self._tabs[i].data.columns)==len(self._tabs[I[0]].data.columns) for i in I ]
+        A=[self._tabs[i].nCols==self._tabs[I[0]].nCols for i in I ]
         if all(A):
             B=[self._tabs[i].columns_clean==self._tabs[I[0]].columns_clean for i in I] #list comparison
             return all(B)
@@ -402,6 +524,27 @@ class TableList(object): # todo inherit list
         return '\n'.join([t.__repr__() for t in self._tabs])
 
     # --- Mask related
+    def evalMasks(self, maskStrings, nWorkers=None):
+        """ Evaluate one mask string per table, concurrently (threads, the numerical evaluations release the GIL).
+        The masks are not applied but cached in the tables, see Table.evalMask.
+        Returns the list of exceptions (None for successful masks). """
+        from concurrent.futures import ThreadPoolExecutor
+        def evalMask(args):
+            tab, sMask = args
+            if len(sMask.strip())==0 or sMask.strip().lower()=='no mask':
+                return None
+            try:
+                tab.evalMask(sMask)
+            except Exception as e:
+                return e
+        jobs = list(zip(self._tabs, maskStrings))
+        if nWorkers is None:
+            nWorkers = min(len(jobs), os.cpu_count() or 1)
+        if nWorkers<=1:
+            return [evalMask(job) for job in jobs]
+        with ThreadPoolExecutor(max_workers=nWorkers) as executor:
+            return list(executor.map(evalMask, jobs))
+
 #     @property
 #     def maskStrings(self):
 #         return [t.maskString for t in self._tabs]
@@ -450,8 +593,8 @@ class TableList(object): # todo inherit list
         """ formuals: dict as returned by storeFormulas"""
         for tab in self._tabs:
             if tab.raw_name in formulas.keys():
-                for f in formulas[tab.raw_name]:
-                    tab.addColumnByFormula(f['name'], f['formula'], f['pos']-1)
+                # NOTE: formulas are compiled once for all tables with the same columns
+                tab.addColumnsByFormula(formulas[tab.raw_name])
 
 
 #     # --- Resampling TODO MOVE THIS OUT OF HERE OR UNIFY
@@ -505,6 +648,85 @@ class TableList(object): # todo inherit list
         return tablist
 
 
+# --------------------------------------------------------------------------------}
+# --- File reading
+# --------------------------------------------------------------------------------{
+def _read_file(filename, fileformat=None, bReload=False, readOptions=None):
+    """ Read a file and return its dataframe(s)
+    NOTE: module function, so that it can be sent to a process pool by TableList
+    OUTPUTS:
+      - dfs: DataFrame, dict of DataFrame, or lazy data (see Table)
+      - F: file object
+      - fileformat: the fileformat used to read the file
+      - warn: string, non empty if the file could not be read
+    """
+    dfs  = None
+    F    = None
+    warn = ''
+    if readOptions is None:
+        readOptions = {}
+    if not os.path.isfile(filename):
+        warn = 'Error: File not found: `'+filename+'`\n'
+        return dfs, F, fileformat, warn
+
+    fileformatAllowedToFailOnReload = (fileformat is not None) and bReload
+    if fileformatAllowedToFailOnReload:
+        try:
+            F = fileformat.constructor(filename=filename)
+            dfs = F.toDataFrame()
+        except:
+            warnLoc = 'Failed to read file:\n\n   {}\n\nwith fileformat: {}\n\nIf you see this message, the reader tried again and succeeded with "auto"-fileformat.\n\n'.format(filename, fileformat.name)
+            dfs, F, fileformat, warn = _read_file(filename, fileformat=None, bReload=False, readOptions=readOptions)
+            return dfs, F, fileformat, warnLoc+warn
+
+    else:
+
+        try:
+            #F = weio.read(filename, fileformat = fileformat)
+            # --- Expanded version of weio.read
+            if fileformat is None:
+                fileformat, F = weio.detectFormat(filename, **readOptions)
+            # Reading the file with the appropriate class if necessary
+            if not isinstance(F, fileformat.constructor):
+                F=fileformat.constructor(filename=filename, **readOptions)
+            if getattr(F, 'lazy', False):
+                dfs = F.lazyData # Table will decode the columns on demand
+            elif hasattr(F, 'toLazyDataFrame') and (readOptions.get('lazy', False) or readOptions.get('compact', False)):
+                dfs = F.toLazyDataFrame() # Tables computed when first selected
+            else:
+                dfs = F.toDataFrame()
+        except weio.FileNotFoundError as e:
+            warn = 'Error: A file was not found!\n\n While opening:\n\n {}\n\n the following file was not found:\n\n {}\n'.format(filename, e.filename)
+        except IOError:
+            warn = 'Error: IO Error thrown while opening file: '+filename+'\n'
+        except MemoryError:
+            warn='Error: Insufficient memory!\n\nFile: '+filename+'\n\nTry closing and reopening the program, or use a 64 bit version of this program (i.e. of python).\n'
+        except weio.EmptyFileError:
+            warn='Error: File empty!\n\nFile is empty: '+filename+'\n\nOpen a different file.\n'
+        except weio.FormatNotDetectedError:
+            warn='Error: File format not detected!\n\nFile: '+filename+'\n\nUse an explicit file-format from the list\n'
+        except weio.WrongFormatError as e:
+            warn='Error: Wrong file format!\n\nFile: '+filename+'\n\n'   \
+                    'The file parser for the selected format failed to open the file.\n\n'+   \
+                    'The reported error was:\n'+e.args[0]+'\n\n' +   \
+                    'Double-check your file format and report this error if you think it''s a bug.\n'
+        except weio.BrokenFormatError as e:
+            warn = 'Error: Inconsistency in the file format!\n\nFile: '+filename+'\n\n'   \
+                   'The reported error was:\n\n'+e.args[0]+'\n\n' +   \
+                   'Double-check your file format and report this error if you think it''s a bug.'
+        except:
+            raise
+    return dfs, F, fileformat, warn
+
+
+def _readOnly(x):
+    """ Read-only view on an array, to share the table data without copies """
+    if not isinstance(x, np.ndarray):
+        return x # e.g. pandas extension arrays
+    x = x.view()
+    x.flags.writeable = False
+    return x
+
 # --------------------------------------------------------------------------------}
 # --- Table 
 # --------------------------------------------------------------------------------{
@@ -525,6 +747,12 @@ class Table(object):
       - mask
       - maskString
       - formulas
+      - pyramids      # cached min/max/mean aggregates of large columns, see getPyramid
+
+    The data is either a pandas DataFrame, or a "lazy data" object (e.g. FASTBinaryData, LazyTable),
+    which provides: `columns`, `shape`, `column(i)` and `toDataFrame()`.
+    For lazy tables, `getColumn` decodes only the requested column, and the DataFrame 
+    is created the first time `data` is accessed.
     """
     # TODO sort out the naming
     # Main naming concepts:
@@ -532,8 +760,12 @@ class Table(object):
     #    active_name : 
     #    raw_name    : 
     #    filename    : 
+    _uids = itertools.count() # Unique identifiers of tables, used to key cached statistics
+
     def __init__(self, data=None, name='', filename='', fileformat=None, dayfirst=False, fileobject=None):
         # Default init
+        self.uid = next(Table._uids)
+        self.version = 0 # Incremented when the data or mask changes
         self.maskString=''
         self.fileobject = fileobject
         self.mask=None
@@ -546,28 +778,64 @@ class Table(object):
         else:
             self.fileformat_name = ''
         self.formulas = []
-
-        if not isinstance(data, pd.DataFrame):
+        self._dayfirst = dayfirst
+        self._lazyData = None
+        self._pyramids = {}
+        self._dateColumns = {} # Date columns converted to seconds, see getColumn
+        self._dateFormats = {} # Format of date columns read as strings, see convertTimeColumns
+        self._maskIndex   = None # Indices of the rows selected by the mask, see maskIndex
+        self._maskCache   = {}   # Evaluated mask strings, see evalMask
+        self._indexAdded = False # True if the column 'Index' was added to the data
+        self._follower   = None  # Reads the rows appended to the file (see `follow`)
+        self._rowBuffer  = None  # Storage of appended numerical data: (data, values, index)
+
+        if isinstance(data, pd.DataFrame):
+            # --- Modify and store input DataFrame 
+            self.setData(data, dayfirst=dayfirst)
+        elif hasattr(data, 'column') and hasattr(data, 'toDataFrame'):
+            # --- Lazy data, the DataFrame will be created on first access
+            self._data     = None
+            self._lazyData = data
+            self._indexAdded = True
+        else:
             raise NotImplementedError('Tables that are not dataframe not implemented.')
-        
-        # --- Modify and store input DataFrame 
-        self.setData(data, dayfirst=dayfirst)
 
         # --- Trying to figure out how to name this table
         if name is None or len(str(name))==0:
-            if data.columns.name is not None:
+            if isinstance(data, pd.DataFrame) and data.columns.name is not None:
                 name=data.columns.name
         self.setupName(name=str(name))
 
+    @property
+    def data(self):
+        if self._lazyData is not None:
+            # Creating the full DataFrame, the lazy data is no longer needed
+            lazyData = self._lazyData
+            self._lazyData = None
+            self.setData(lazyData.toDataFrame(), dayfirst=self._dayfirst)
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        self._lazyData = None
+        self._data = data
+        self._maskCache = {}
+        self.clearPyramids()
+
+    @property
+    def lazy(self):
+        return self._lazyData is not None
+
     def setData(self, data, dayfirst=False):
         # sanitize columns, we only accept strings
         data.columns = data.columns.astype(str)
 
         # Adding index
         if data.columns[0].lower().find('index')>=0:
-            pass
+            self._indexAdded = False
         else:
             data.insert(0, 'Index', np.arange(data.shape[0]))
+            self._indexAdded = True
 
         # Delete empty columns at the end (e.g. csv files)
         while True:
@@ -650,29 +918,28 @@ class Table(object):
     def clearMask(self):
         self.maskString=''
         self.mask=None
+        self.clearPyramids()
 
     def applyMaskString(self, sMask, bAdd=True):
         # Remove any existing filter
         self.clearMask()
         # Apply mask on Table
-        df = self.data
         df_new   = None
         name_new = None
         if len(sMask.strip())>0 and sMask.strip().lower()!='no mask':
             try:
-                mask = np.asarray(eval(sMask))
-                if bAdd:
-                    df_new = df[mask]
-                    name_new=self.raw_name+'_masked'
-                else:
-                    self.mask=mask
-                    self.maskString=sMask
-            except:
-                # TODO come up with better error messages
-                raise Exception('Error: The mask failed to evaluate for table: '+self.nickname)
-            if sum(mask)==0:
-                self.clearMask()
+                mask = self.evalMask(sMask)
+            except Exception as e:
+                raise PyDatViewException('Error: The mask failed to evaluate for table: {}\n{}'.format(self.nickname, e))
+            if len(mask)==0 or (mask.dtype==bool and not mask.any()):
                 raise PyDatViewException('Error: The mask returned no value for table: '+self.nickname)
+            if bAdd:
+                df_new = self.data.iloc[mask]
+                name_new=self.raw_name+'_masked'
+            else:
+                self.mask=mask
+                self.maskString=sMask
+                self.clearPyramids()
         return df_new, name_new
 
     # --- Important manipulation TODO MOVE THIS OUT OF HERE OR UNIFY
@@ -764,10 +1031,13 @@ class Table(object):
     def convertTimeColumns(self, dayfirst=False):
 
         def convertTimeColumn(c):
-            print('[INFO] Converting column {} to datetime, dayfirst: {}. May take a while...'.format(c, dayfirst))
+            values = self.data[c].values
+            # Format detected on a sample of values, the conversion is then vectorized
+            fmt = guessDateFormat(values, dayfirst=dayfirst)
+            print('[INFO] Converting column {} to datetime, dayfirst: {}, format: {}'.format(c, dayfirst, fmt))
             try:
-                # TODO THIS CAN BE VERY SLOW...
-                self.data[c]=pd.to_datetime(self.data[c].values, dayfirst=dayfirst, infer_datetime_format=True).to_pydatetime()
+                self.data[c]=toDatetime64(values, fmt=fmt, dayfirst=dayfirst)
+                self._dateFormats[c] = fmt
                 print('       Done.')
             except:
                 try:
@@ -817,6 +1087,7 @@ class Table(object):
     # --- Column manipulations
     def renameColumn(self,iCol,newName):
         self.data.columns.values[iCol]=newName
+        self.version += 1
 
     def renameColumns(self, strReplDict=None, regReplDict=None):
         """ Rename all the columns  of given table
@@ -839,6 +1110,7 @@ class Table(object):
         else:
             raise NotImplementedError('Provide a replace dictionary')
         self.data.columns = newcols
+        self.version += 1
 
 
     def deleteColumns(self, ICol):
@@ -866,6 +1138,7 @@ class Table(object):
         elif i>self.data.shape[1]+1:
             i=self.data.shape[1]
         self.data.insert(int(i+1),sNewName,NewCol)
+        self.clearPyramids() # Column indices have changed
         # Due to new column, formulas position needs to be incremented.
         for f in self.formulas:
             if f['pos'] > i:
@@ -884,16 +1157,28 @@ class Table(object):
         
     def getColumn(self, i):
         """ Return column of data
-        If a mask exist, the mask is applied
+        If a mask exist, the mask is applied (the values are copied), otherwise a read-only view
+        on the data is returned.
 
         TODO TODO TODO get rid of this!
         """
-        if self.mask is not None:
-            c = self.data.iloc[self.mask, i]
-            x = self.data.iloc[self.mask, i].values
+        idx = self.maskIndex
+        if self._lazyData is not None:
+            # Only the requested column is decoded
+            if i==0:
+                x = np.arange(self.nRows)
+            else:
+                x = self._lazyData.column(i-1)
+            x = _readOnly(x) if idx is None else x[idx]
+            c = pd.Series(x, name=self.columns[i], copy=False)
+            return x, False, False, c
+
+        c = self.data.iloc[:, i]
+        if idx is not None:
+            x = c.values[idx]
+            c = pd.Series(x, name=c.name, copy=False)
         else:
-            c = self.data.iloc[:, i]
-            x = self.data.iloc[:, i].values
+            x = _readOnly(c.values)
 
         isString = c.dtype == object and isinstance(c.values[0], str)
         if isString:
@@ -902,11 +1187,145 @@ class Table(object):
         if isDate:
             dt=getDt(x)
             if dt>1:
-                x=x.astype('datetime64[s]')
-            else:
-                x=x.astype('datetime64')
+                # Conversion of the full column done once
+                key = (i, self.columns[i])
+                if key not in self._dateColumns:
+                    self._dateColumns[key] = _readOnly(self.data.iloc[:, i].values.astype('datetime64[s]'))
+                x = self._dateColumns[key]
+                if idx is not None:
+                    x = x[idx]
         return x,isString,isDate,c
 
+    @property
+    def maskIndex(self):
+        """ Indices of the rows selected by the mask (computed once per mask), or None """
+        if self.mask is None:
+            return None
+        if self._maskIndex is None:
+            mask = np.asarray(self.mask)
+            self._maskIndex = np.flatnonzero(mask) if mask.dtype==bool else mask
+        return self._maskIndex
+
+    def evalMask(self, sMask):
+        """ Return the rows selected by a mask string (boolean array), without applying the mask.
+        The mask is compiled once for all tables with the same columns (see formulae.compileMask),
+        and the result is cached until the data changes. """
+        key = (sMask, id(self._data), self.nRows, tuple(self.columns))
+        mask = self._maskCache.get(key, None)
+        if mask is None:
+            expr = compileMask(sMask, self.columns)
+            mask = expr.evaluate(self._maskColumn, self.nRows, getData=lambda: self.data)
+            if len(self._maskCache)>=4:
+                self._maskCache = {}
+            self._maskCache[key] = mask
+        return mask
+
+    def _maskColumn(self, i):
+        """ Unmasked values of column i, lazy tables are not converted to DataFrame """
+        if self._lazyData is not None:
+            return np.arange(self.nRows) if i==0 else self._lazyData.column(i-1)
+        return self.data.iloc[:, i]
+
+    # --- Pyramids
+    def getPyramid(self, i, x=None):
+        """ Return the pyramid of min/max/mean aggregates of column i (mask applied).
+        The pyramid is built on first call, and reused until the mask, the data, or the columns change.
+        Returns None for small or non-numeric columns.
+        x: column values, as returned by getColumn, if already available
+        """
+        from pydatview.tools.decimation import Pyramid
+        key = (i, self.columns[i]) # NOTE: the name changes when units are changed in place
+        if key in self._pyramids:
+            return self._pyramids[key]
+        if x is None:
+            x = self.getColumn(i)[0]
+        P = Pyramid(x) if Pyramid.canBuild(x) else None
+        self._pyramids[key] = P
+        return P
+
+    def clearPyramids(self):
+        """ Called when the data, the mask, or the columns change """
+        self._pyramids = {}
+        self._dateColumns = {}
+        self._maskIndex = None
+        self.version += 1
+
+    # --- Follow mode
+    @property
+    def fileColumns(self):
+        """ Columns that are read from the file (without the index and formula columns added) """
+        formulaCols = [f['name'] for f in self.formulas]
+        cols = [c for c in self.columns if c not in formulaCols]
+        if self._indexAdded:
+            cols = cols[1:]
+        return cols
+
+    def follow(self):
+        """ Append the rows written to the file since it was read (e.g. simulation in progress).
+        Returns True if rows were added. 
+        Raises FollowReset if the file needs to be fully reloaded. """
+        from pydatview.io.follow import createFollower, FollowReset
+        if self._follower is None:
+            self._follower = createFollower(self.filename, self.fileformat, self.fileobject, nRows=self.nRows, columns=self.fileColumns)
+            if self._follower is None:
+                self._follower = False # Not supported, not tried again
+        if self._follower is False:
+            return False
+        try:
+            df = self._follower.newRows()
+        except FollowReset:
+            self._follower = None
+            raise
+        if df is None or len(df)==0:
+            return False
+        self.appendRows(df)
+        return True
+
+    def appendRows(self, df):
+        """ Append rows at the end of the table. 
+        `df` has the columns of the file (see `fileColumns`), the index and formula columns are added.
+        Numerical tables are stored in a buffer that grows geometrically, so that the cost of appending
+        is proportional to the number of rows appended.
+        """
+        from pydatview.io.follow import FollowReset
+        n0, m = self.nRows, len(df)
+        fileCols = self.fileColumns
+        if len(df.columns)!=len(fileCols):
+            raise FollowReset('Number of columns changed for table {}'.format(self.nickname))
+        df.columns = fileCols
+        data = self.data
+        for c in fileCols:
+            if np.issubdtype(data[c].dtype, np.datetime64):
+                df[c] = toDatetime64(df[c].values, fmt=self._dateFormats.get(c, None), dayfirst=self._dayfirst)
+        numeric = len(self.formulas)==0 and all([data[c].dtype==np.float64 for c in fileCols])
+        if numeric:
+            buf = self._rowBuffer
+            if buf is None or buf[0] is not data or n0+m>buf[1].shape[0]:
+                # Reallocation, capacity doubled
+                nAlloc = max(2*(n0+m), 1024)
+                values = np.empty((nAlloc, len(fileCols)))
+                values[:n0] = data[fileCols].values
+                index = np.arange(nAlloc)
+            else:
+                _, values, index = buf
+            values[n0:n0+m] = df.values
+            data = pd.DataFrame(values[:n0+m], columns=fileCols)
+            if self._indexAdded:
+                data.insert(0, 'Index', index[:n0+m])
+        else:
+            if self._indexAdded:
+                df.insert(0, 'Index', np.arange(n0, n0+m))
+            data = pd.concat([data, df], ignore_index=True)
+            # Formulas are evaluated on the full table (they may not be local in time)
+            for f in formulaOrder(self.formulas, data.columns):
+                data[f['name']] = evalFormula(data, f['formula'])
+        self.data = data
+        self._rowBuffer = (data, values, index) if numeric else None
+        # The mask needs to be evaluated on the new rows
+        if self.mask is not None:
+            maskString = self.maskString
+            self.applyMaskString(maskString, bAdd=False)
+
     def addColumnByFormula(self, sNewName, sFormulaRaw, i=-1):
         NewCol=evalFormula(self.data, sFormulaRaw)
         if NewCol is None:
@@ -921,8 +1340,49 @@ class Table(object):
             return False
         else:
             self.setColumn(sNewName,NewCol,i,sFormulaRaw)
+            # The formulas using this column are updated
+            self.recomputeFormulas(changed=[sNewName])
             return True
 
+    def addColumnsByFormula(self, formulas):
+        """ Add formula columns, e.g. formulas restored after a reload.
+        formulas: list of dict('pos','formula','name'), sorted by position
+        The formulas are evaluated in the order of their dependencies, and inserted at their positions.
+        Returns the list of formulas that could not be evaluated. """
+        work = self.data.copy(deep=False) # New columns are added to this DataFrame only
+        values = {}
+        for f in formulaOrder(formulas, self.columns):
+            values[f['name']] = evalFormula(work, f['formula'])
+            if values[f['name']] is not None:
+                work[f['name']] = values[f['name']]
+        failed = []
+        for f in formulas:
+            if values[f['name']] is None:
+                failed.append(f)
+            else:
+                self.addColumn(f['name'], values[f['name']], f['pos']-1, f['formula'])
+        return failed
+
+    def recomputeFormulas(self, changed=None):
+        """ Evaluate again the formula columns that depend on the columns `changed` (all formulas if None),
+        in the order of their dependencies. Returns the names of the columns updated. """
+        formulas = formulaOrder(self.formulas, self.columns, changed=changed)
+        if len(formulas)==0:
+            return []
+        data = self.data
+        updated = []
+        for f in formulas:
+            NewCol = evalFormula(data, f['formula'])
+            if NewCol is None:
+                print('[WARN] Formula {} failed to evaluate for table {}'.format(f['name'], self.nickname))
+            else:
+                data[f['name']] = NewCol
+                updated.append(f['name'])
+        self.data = data # Cached values are cleared
+        if self.mask is not None:
+            self.applyMaskString(self.maskString, bAdd=False)
+        return updated
+
 
     def export(self, path, fformat='auto'):
         from pydatview.io.converters import writeDataFrameAutoFormat, writeDataFrameToFormat
@@ -952,6 +1412,8 @@ class Table(object):
 
     @property
     def columns(self):
+        if self._lazyData is not None:
+            return np.asarray(['Index']+list(self._lazyData.columns), dtype=object)
         return self.data.columns.values #.astype(str)
 
     @columns.setter
@@ -960,7 +1422,7 @@ class Table(object):
 
     @property
     def columns_clean(self):
-        return [no_unit(s) for s in self.data.columns.values.astype(str)]
+        return [no_unit(s) for s in self.columns.astype(str)]
 
     @property
     def name(self):
@@ -990,6 +1452,8 @@ class Table(object):
 
     @property
     def nRows(self):
+        if self._lazyData is not None:
+            return self._lazyData.shape[0]
         return len(self.data.iloc[:,0]) # TODO if not panda
     
     @staticmethod
@@ -206,6 +206,98 @@ def getDt(x):
     # TODO if dt> int res... do something
     return dt
 
+# --------------------------------------------------------------------------------}
+# --- Dates 
+# --------------------------------------------------------------------------------{
+def guessDateFormat(values, dayfirst=False, nSample=20):
+    """ Return the datetime format (e.g. '%Y-%m-%d %H:%M:%S') common to a sample of string values, or None.
+    The format is guessed from the first value of the sample, and checked on the other values."""
+    try:
+        from pandas.tseries.api import guess_datetime_format # pandas>=2.0
+    except ImportError:
+        from pandas.core.tools.datetimes import guess_datetime_format
+    n = len(values)
+    if n==0:
+        return None
+    I = np.unique(np.linspace(0, n-1, min(n, nSample)).astype(int))
+    sample = [values[i].strip() for i in I if isinstance(values[i], str)]
+    sample = [v for v in sample if v not in ['', 'NaT', 'nan', 'NaN']]
+    if len(sample)==0:
+        return None
+    fmt = guess_datetime_format(sample[0], dayfirst=dayfirst)
+    if fmt is None:
+        return None
+    try:
+        pd.to_datetime(sample, format=fmt)
+    except (ValueError, TypeError):
+        return None
+    return fmt
+
+def _fixedWidthDates(values, fmt):
+    """ Convert fixed width date strings with a numeric format (%Y, %m, %d, %H, %M, %S, %f) to datetime64[ns],
+    by moving the characters to the ISO 8601 layout, parsed by numpy. Returns None if not applicable. """
+    widths = {'Y':4, 'm':2, 'd':2, 'H':2, 'M':2, 'S':2}
+    isoPos = {'Y':0, 'm':5, 'd':8, 'H':11, 'M':14, 'S':17, 'f':20}
+    try:
+        b = np.asarray(values).astype('S')
+    except (UnicodeEncodeError, ValueError, TypeError):
+        return None
+    n, L = len(b), b.dtype.itemsize
+    if n==0 or L==0 or np.any(np.char.str_len(b)!=L):
+        return None
+    u = b.view(np.uint8).reshape(n, L)
+    fields   = {} # directive: (position in string, width)
+    literals = [] # (position in string, character)
+    pos, i = 0, 0
+    while i<len(fmt):
+        if fmt[i]=='%' and i+1<len(fmt):
+            d = fmt[i+1]
+            if d=='f' and i+2==len(fmt):
+                w = L-pos  # Fraction of seconds, last field
+                if w<1 or w>9:
+                    return None
+            elif d in widths:
+                w = widths[d]
+            else:
+                return None
+            fields[d] = (pos, w)
+            pos += w
+            i += 2
+        else:
+            literals.append((pos, fmt[i]))
+            pos += 1
+            i += 1
+    if pos!=L or not all([d in fields for d in ['Y', 'm', 'd']]):
+        return None
+    for p, ch in literals:
+        if not np.all(u[:,p]==ord(ch)):
+            return None
+    iso = b'0000-01-01T00:00:00'
+    if 'f' in fields:
+        iso += b'.' + b'0'*fields['f'][1]
+    out = np.empty((n, len(iso)), dtype=np.uint8)
+    out[:] = np.frombuffer(iso, dtype=np.uint8)
+    for d, (p, w) in fields.items():
+        out[:, isoPos[d]:isoPos[d]+w] = u[:, p:p+w]
+    try:
+        return out.view('S{}'.format(len(iso))).ravel().astype('datetime64[ns]')
+    except ValueError:
+        return None
+
+def toDatetime64(values, fmt=None, dayfirst=False):
+    """ Convert an array of strings (or datetime objects) to datetime64[ns].
+    If a format is provided (see guessDateFormat), the conversion is vectorized. """
+    values = np.asarray(values)
+    if fmt is not None:
+        x = _fixedWidthDates(values, fmt)
+        if x is not None:
+            return x
+        try:
+            return pd.to_datetime(values, format=fmt)
+        except (ValueError, TypeError):
+            pass
+    return pd.to_datetime(values, dayfirst=dayfirst, infer_datetime_format=True)
+
 def getTabCommonColIndices(tabs):
     colLists = [ [s for s in t.columns] for t in tabs]
     return getCommonColIndices(colLists)
@@ -1710,9 +1710,11 @@ def findPeriodTimeRange(df, nPeriods=3, filename='', colPsi=None, colTime=None):
             tStart=time[iBef[-1-nPeriods]]
     return tStart, tEnd
 
-def averageDF(df,avgMethod='periods',avgParam=None,ColMap=None,ColKeep=None,ColSort=None,stats=['mean'], filename=''):
+def averageDF(df,avgMethod='periods',avgParam=None,ColMap=None,ColKeep=None,ColSort=None,stats=['mean'], filename='', m=[3,4,5,8,10,12], multiIndex=False):
     """
     See average PostPro for documentation, same interface, just does it for one dataframe
+    The statistics of all the columns are computed together, see tools.stats.multiStats
+    `multiIndex`: if True, the columns of the returned one-row dataframe are a MultiIndex (stat, channel)
     """
     def renameCol(x):
         for k,v in ColMap.items():
@@ -1754,6 +1756,7 @@ def averageDF(df,avgMethod='periods',avgParam=None,ColMap=None,ColKeep=None,ColS
             raise WELIBException('The sensor `RotSpeed_[rpm]` does not appear to be in the dataframe{}. You cannot use the averaging method by `periods_omega`, use `periods` or `constantwindow` instead.'.format(filename))
         Omega=df['RotSpeed_[rpm]'].mean()/60*2*np.pi
         Period = 2*np.pi/Omega 
+        tEnd = timenoNA[-1]
         if avgParam is None:
             nRotations=np.floor(tEnd/Period)
         else:
@@ -1773,21 +1776,26 @@ def averageDF(df,avgMethod='periods',avgParam=None,ColMap=None,ColKeep=None,ColS
     IWindow    = np.where((time>=tStart) & (time<=tEnd) & (~np.isnan(time)))[0]
     iEnd   = IWindow[-1]
     iStart = IWindow[0]
-    ## Absolute and relative differences at window extremities
-    DeltaValuesAbs=(df.iloc[iEnd]-df.iloc[iStart]).abs()
-#         DeltaValuesRel=(df.iloc[iEnd]-df.iloc[iStart]).abs()/df.iloc[iEnd]
-    DeltaValuesRel=(df.iloc[IWindow].max()-df.iloc[IWindow].min())/df.iloc[IWindow].mean()
-    #EndValues=df.iloc[iEnd]
-    #if avgMethod.lower()=='periods_omega':
-    #    if DeltaValuesRel['RotSpeed_[rpm]']*100>5:
-    #        print('[WARN] Rotational speed vary more than 5% in averaging window ({}%) for simulation: {}'.format(DeltaValuesRel['RotSpeed_[rpm]']*100,f))
-    ## Stats values during window
-    # MeanValues = df[IWindow].mean()
-    # StdValues  = df[IWindow].std()
-    if 'mean' in stats:
-        MeanValues = pd.DataFrame(df.iloc[IWindow].mean()).transpose()
-    else:
-        raise NotImplementedError()
+    ## Stats values during window, for all numeric columns at once (one contiguous block)
+    from pydatview.tools.stats import multiStats
+    cols = [c for c in df.columns if np.issubdtype(df[c].dtype, np.number)]
+    M = np.ascontiguousarray(df[cols].values[IWindow], dtype=np.float64)
+    if len(stats)==0:
+        raise ValueError('No statistics requested{}, use a list of: mean, std, min, max, absmax, ti, leq, pXX (percentile, e.g. p90), or functions f(time, M)'.format(filename))
+    statsNoLeq = [s for s in stats if not (isinstance(s, str) and s.lower()=='leq')]
+    values = [(name, cols, v) for name, v in multiStats(M, statsNoLeq, time=time[IWindow])]
+    if len(statsNoLeq)<len(stats):
+        # Equivalent loads, the rain flow counting is done once for all Wohler exponents (time excluded)
+        iLeq = [j for j,c in enumerate(cols) if c not in sTAllowed]
+        colsLeq = [cols[j] for j in iLeq]
+        values += [(name, colsLeq, v) for name, v in multiStats(M[:,iLeq], ['leq'], time=time[IWindow], m=m)]
+    # --- One row dataframe, columns (stat, channel)
+    keys = [(name, c) for name, cs, _ in values for c in cs]
+    V = np.concatenate([v for _, _, v in values])
+    MeanValues = pd.DataFrame(V.reshape(1,-1), columns=pd.MultiIndex.from_tuples(keys, names=['Stat', 'Channel']))
+    if not multiIndex:
+        # Flat column names: '<channel>' for the mean, '<stat>_<channel>' otherwise
+        MeanValues.columns = [c if stat.lower()=='mean' else '{}_{}'.format(stat, c) for stat,c in keys]
     return MeanValues
 
 def FAIL(msg):
@@ -1833,12 +1841,106 @@ class FileErrorLogger():
         basename = os.path.basename(filename)
         FAIL('File {} {}'.format(basename, msg))
 
+def _averageColumns(avgMethod, ColMap, ColKeep):
+    """ Columns of a file needed by averageDF, None if all columns are needed """
+    if ColKeep is None:
+        return None
+    ColMap = {} if ColMap is None else ColMap
+    cols = ['Time_[s]', 'Time [s]'] + [ColMap.get(c, c) for c in ColKeep] + list(ColMap.values())
+    if avgMethod.lower()=='periods':
+        cols += ['Azimuth_[deg]', 'Azimuth [deg]', 'Azimuth', 'Psi']
+    elif avgMethod.lower()=='periods_omega':
+        cols += ['RotSpeed_[rpm]']
+    return list(dict.fromkeys(cols))
+
+
+def _readAverageDF(f, columns=None, tWindow=None):
+    """ 
+    Read the dataframe of a file for averageDF.
+    For binary OpenFAST outputs, only the `columns` and the rows of the last `tWindow` seconds are decoded.
+    """
+    if isinstance(f, pd.DataFrame):
+        return f
+    if str(f).lower().endswith('.outb'):
+        lazyData = FASTOutputFile(f, lazy=True).lazyData
+        if lazyData is not None:
+            i0 = 0
+            if tWindow is not None:
+                time = lazyData.time()
+                timenoNA = time[~np.isnan(time)]
+                if len(timenoNA)>0:
+                    # NOTE: one row before the window is kept, consistent with the full file
+                    i0 = max(np.searchsorted(time, timenoNA[-1]-tWindow, side='left')-1, 0)
+            I = [i for i,c in enumerate(lazyData.columns) if columns is None or c in columns]
+            return pd.DataFrame({lazyData.columns[i]: lazyData.column(i, i0=i0) for i in I}, columns=[lazyData.columns[i] for i in I])
+    df = weio.read(f).toDataFrame()
+    if columns is not None:
+        df = df[[c for c in df.columns if c in columns]]
+    return df
+
+
+def _averageFile(i, f, kwargs, columns, tWindow):
+    """ Read and average one file (called by the workers of iterAveragePostPro).
+    Returns (i, df_avg, readError) """
+    try:
+        df = _readAverageDF(f, columns=columns, tWindow=tWindow)
+    except:
+        return i, None, True
+    filename = '' if isinstance(f, pd.DataFrame) else str(f)
+    df_avg = averageDF(df, filename=filename, **kwargs)
+    df_avg.index = [i]
+    return i, df_avg, False
+
+
+def iterAveragePostPro(outFiles_or_DFs, avgMethod='periods', avgParam=None, 
+        ColMap=None, ColKeep=None, stats=['mean'], m=[3,4,5,8,10,12], nWorkers=1, multiIndex=False):
+    """ 
+    Generator of the averages of a list of files, yields (i, df_avg) as the files are processed,
+    where df_avg is a one-row dataframe (None if the file cannot be read).
+    The results are not yielded in the order of the files when several workers are used.
+    See averagePostPro for the inputs.
+    `nWorkers`: number of processes. Default: 1, the files are processed serially. None: number of CPUs. 
+                Dataframes are processed serially. See averagePostPro for the `if __name__=='__main__'` guard.
+    """
+    kwargs  = dict(avgMethod=avgMethod, avgParam=avgParam, ColMap=ColMap, ColKeep=ColKeep, stats=stats, m=m, multiIndex=multiIndex)
+    columns = _averageColumns(avgMethod, ColMap, ColKeep)
+    # The rows before the window are not needed
+    tWindow = avgParam if (avgMethod.lower()=='constantwindow' and avgParam is not None) else None
+    files = list(outFiles_or_DFs)
+    if nWorkers is None:
+        nWorkers = os.cpu_count() or 1
+    nWorkers = min(nWorkers, len(files))
+    if nWorkers<=1 or any([isinstance(f, pd.DataFrame) for f in files]):
+        for i, f in enumerate(files):
+            i, df_avg, _ = _averageFile(i, f, kwargs, columns, tWindow)
+            yield i, df_avg
+        return
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from concurrent.futures.process import BrokenProcessPool
+    done = set()
+    try:
+        with ProcessPoolExecutor(max_workers=nWorkers) as executor:
+            futures = [executor.submit(_averageFile, i, f, kwargs, columns, tWindow) for i, f in enumerate(files)]
+            for fut in as_completed(futures):
+                i, df_avg, _ = fut.result()
+                done.add(i)
+                yield i, df_avg
+    except BrokenProcessPool:
+        # E.g. script without `if __name__=='__main__'` guard, with the "spawn" start method (Windows, macOS)
+        print('[WARN] The process pool failed, the remaining files are processed serially')
+        for i, f in enumerate(files):
+            if i not in done:
+                i, df_avg, _ = _averageFile(i, f, kwargs, columns, tWindow)
+                yield i, df_avg
+
+
 def averagePostPro(outFiles_or_DFs,avgMethod='periods',avgParam=None,
         ColMap=None,ColKeep=None,ColSort=None,stats=['mean'],
-        skipIfWrongCol=False):
+        skipIfWrongCol=False, m=[3,4,5,8,10,12], nWorkers=1, callback=None, multiIndex=False):
     """ Opens a list of FAST output files, perform average of its signals and return a panda dataframe
-    For now, the scripts only computes the mean within a time window which may be a constant or a time that is a function of the rotational speed (see `avgMethod`).
-    The script only computes the mean for now. Other stats will be added
+    The statistics are computed within a time window which may be a constant or a time that is a function of the rotational speed (see `avgMethod`).
+    The files may be processed in parallel (see `nWorkers`). For binary files, only the columns needed by `ColKeep` 
+    (and the time window for 'constantwindow') are read.
     INPUTS:
 
      outFiles_or_DFs: list of fst filenames or dataframes
@@ -1860,60 +1962,63 @@ def averagePostPro(outFiles_or_DFs,avgMethod='periods',avgParam=None,
                    Default: None, as many period as possible are used
                 - for 'constantwindow': the number of seconds for the window
                    Default: None, full simulation length is used
+    `stats`: list of statistics to compute within the window:
+                - 'mean': mean value of each signal
+                - 'std', 'min', 'max', 'absmax', 'ti' (std/mean): columns are named 'std_<signal>', etc.
+                - 'pXX': percentile XX of each signal (e.g. 'p90'), columns are named 'p90_<signal>'
+                - 'leq': equivalent loads of each signal, for the Wohler exponents `m`,
+                   columns are named 'Leq(m=3)_<signal>'.
+                - a function f(time, M), returning one value per column of the 2D array M (see tools.stats.multiStats)
+    `multiIndex`: if True, the columns of the result are a MultiIndex (stat, channel), e.g. result['std']
+    `nWorkers`: number of processes used. Default: 1, the files are processed serially. None: number of CPUs.
+                NOTE: with several processes, scripts must call averagePostPro within an
+                `if __name__=='__main__':` block (processes are started with "spawn" on Windows and macOS).
+                If the process pool fails, the remaining files are processed serially.
+    `callback`: function called with (i, df_avg) when file i is processed (df_avg: one-row dataframe, or None)
     """
-    result=None
     if len(outFiles_or_DFs)==0:
         raise Exception('No outFiles or DFs provided')
 
+    nFiles = len(outFiles_or_DFs)
+    avgs   = {}
     invalidFiles =[]
-    log = FileErrorLogger()
-    # Loop trough files and populate result
-    for i,f in enumerate(outFiles_or_DFs):
-        if isinstance(f, pd.DataFrame):
-            df = f
+    for i, df_avg in iterAveragePostPro(outFiles_or_DFs, avgMethod=avgMethod, avgParam=avgParam, ColMap=ColMap, ColKeep=ColKeep, stats=stats, m=m, nWorkers=nWorkers, multiIndex=multiIndex):
+        if df_avg is None:
+            invalidFiles.append(outFiles_or_DFs[i])
         else:
-            try:
-                df=weio.read(f).toDataFrame()
-                #df=FASTOutputFile(f).toDataFrame()A # For pyFAST
-            except:
-                invalidFiles.append(f)
-                continue
-        df_avg = averageDF(df, avgMethod=avgMethod, avgParam=avgParam, ColMap=ColMap, ColKeep=ColKeep,ColSort=ColSort,stats=stats, filename=f)
-        MeanValues= df_avg.copy() # todo
-        if result is None:
-            # We create a dataframe here, now that we know the colums
-            columns = MeanValues.columns
-            result = pd.DataFrame(np.nan, index=np.arange(len(outFiles_or_DFs)), columns=columns)
-        if MeanValues.shape[1]!=result.shape[1]:
-            columns_ref = set(result.columns)
-            columns_loc = set(MeanValues.columns)
-            if skipIfWrongCol:
-                log.WARN(f, 'has {} columns and not {}. Skipping.'.format(MeanValues.shape[1], result.shape[1]))
-            else:
-                columns_com = list(columns_ref.intersection(columns_loc))
-                n_ref = len(columns_ref)
-                n_loc = len(columns_loc)
-                n_com = len(columns_com)
-                if n_com == 0:
-                    log.FAIL(f, 'has no columns in common with first file. Skipping.')
-                    continue
-                try:
-                    result.iloc[i][columns_com] = MeanValues[columns_com].iloc[0]
-                    log.WARN(f, 'has {} columns, first file has {} columns, with {} in common. Truncating.'.format(n_loc, n_loc, n_com))
-                except:
-                    log.FAIL(f, 'has {} columns, first file has {} columns, with {} in common. Failed to assign common columns.'.format(n_loc, n_loc, n_com))
-        else:
-            try:
-                result.iloc[i] = MeanValues.iloc[0]
-            except:
-                import pdb; pdb.set_trace()
-
+            avgs[i] = df_avg
+        if callback is not None:
+            callback(i, df_avg)
 
-    if len(invalidFiles)==len(outFiles_or_DFs):
+    if len(invalidFiles)==nFiles:
         raise Exception('None of the files can be read (or exist)!. For instance, cannot find: {}'.format(invalidFiles[0]))
     elif len(invalidFiles)>0:
         print('[WARN] There were {} missing/invalid files: \n {}'.format(len(invalidFiles),'\n'.join(invalidFiles)))
 
+    # --- Columns of the first file, files with different columns are truncated or skipped
+    log = FileErrorLogger()
+    I = sorted(avgs.keys())
+    columns = avgs[I[0]].columns
+    columns_ref = set(columns)
+    for i in I[1:]:
+        columns_loc = set(avgs[i].columns)
+        if columns_loc==columns_ref:
+            continue
+        f = outFiles_or_DFs[i] if isinstance(outFiles_or_DFs[i], str) else 'DataFrame {}'.format(i)
+        n_com = len(columns_ref.intersection(columns_loc))
+        if skipIfWrongCol:
+            log.WARN(f, 'has {} columns and not {}. Skipping.'.format(len(columns_loc), len(columns_ref)))
+            del avgs[i]
+        elif n_com == 0:
+            log.FAIL(f, 'has no columns in common with first file. Skipping.')
+            del avgs[i]
+        else:
+            log.WARN(f, 'has {} columns, first file has {} columns, with {} in common. Truncating.'.format(len(columns_loc), len(columns_ref), n_com))
+
+    # --- Result table, built at once. Rows of invalid files are NaN
+    result = pd.concat([avgs[i].reindex(columns=columns) for i in sorted(avgs.keys())], axis=0)
+    result = result.reindex(index=np.arange(nFiles))
+
     if ColSort is not None:
         if not ColSort in result.keys():
             print('[INFO] Columns present: ', result.keys())
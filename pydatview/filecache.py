@@ -0,0 +1,214 @@
+"""
+Persistent on-disk cache of the DataFrames returned by the file readers.
+
+The cache is stored in the user data directory (next to the pyDatView config file).
+Entries are keyed by the absolute path of the file, and are only valid if the size,
+the modification time and the reader (fileformat name) match the ones stored.
+The DataFrames are stored using parquet when pyarrow is available, and pickle otherwise.
+Entries are evicted by "least recently used" order when the total size exceeds `maxBytes`.
+
+Main content:
+ - class FileCache
+ - def defaultCacheDir()
+"""
+import os
+import json
+import time
+import hashlib
+import pandas as pd
+from pydatview.io import defaultUserDataDir
+
+def defaultCacheDir():
+    return os.path.join(defaultUserDataDir(), 'pyDatView', 'cache')
+
+class FileCache(object):
+    """
+    Cache of the DataFrames returned by the file readers.
+
+    Example:
+        cache = FileCache()
+        dfs   = cache.get(filename, formatName)    # None if not in cache or out of date
+        if dfs is None:
+            dfs = weio.read(filename).toDataFrame()
+            cache.set(filename, formatName, dfs)
+        cache.flush()
+    """
+    def __init__(self, cacheDir=None, maxBytes=2*1024**3):
+        if cacheDir is None:
+            cacheDir = defaultCacheDir()
+        self.cacheDir = cacheDir
+        self.maxBytes = maxBytes
+        self._index   = None
+        self._dirty   = False
+
+    # --- Index
+    @property
+    def indexFile(self):
+        return os.path.join(self.cacheDir, 'index.json')
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = {}
+            if os.path.exists(self.indexFile):
+                try:
+                    with open(self.indexFile) as f:
+                        self._index = json.load(f)
+                except:
+                    print('[WARN] FileCache: index file corrupted, the cache is cleared.')
+                    self.clear()
+        return self._index
+
+    def flush(self):
+        """ Write the index to disk if it was modified """
+        if not self._dirty:
+            return
+        os.makedirs(self.cacheDir, exist_ok=True)
+        tmpFile = self.indexFile + '.tmp'
+        with open(tmpFile, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(tmpFile, self.indexFile)
+        self._dirty = False
+
+    @staticmethod
+    def _fileKey(filename):
+        return os.path.normcase(os.path.abspath(filename))
+
+    @staticmethod
+    def _fileStat(filename):
+        st = os.stat(filename)
+        return st.st_size, st.st_mtime_ns
+
+    # --- Main methods
+    def get(self, filename, formatName=None):
+        """
+        Return the DataFrame(s) stored for `filename` and the reader name
+        Returns (None, None) if the file is not in the cache, has changed since it was stored,
+        or was read with a different reader than `formatName` (if provided).
+        """
+        key   = self._fileKey(filename)
+        entry = self.index.get(key, None)
+        if entry is None:
+            return None, None
+        size, mtime = self._fileStat(filename)
+        if entry['size']!=size or entry['mtime']!=mtime or (formatName is not None and entry['reader']!=formatName):
+            self.remove(filename)
+            return None, None
+        try:
+            dfs = [self._readDF(f, entry['storage']) for f in entry['files']]
+        except:
+            print('[WARN] FileCache: failed to read cache entry for {}'.format(filename))
+            self.remove(filename)
+            return None, None
+        entry['lastAccess'] = time.time()
+        self._dirty = True
+        if entry['keys'] is None:
+            dfs = dfs[0]
+        else:
+            dfs = dict(zip(entry['keys'], dfs))
+        return dfs, entry['reader']
+
+    def set(self, filename, formatName, dfs):
+        """ Store the DataFrame(s) `dfs` (DataFrame or dict of DataFrames) read from `filename` """
+        if dfs is None:
+            return
+        key = self._fileKey(filename)
+        self.remove(filename)
+        if isinstance(dfs, dict):
+            keys    = [str(k) for k in dfs.keys()]
+            dfsList = list(dfs.values())
+        else:
+            keys    = None
+            dfsList = [dfs]
+        if not all([isinstance(df, pd.DataFrame) for df in dfsList]):
+            return
+        os.makedirs(self.cacheDir, exist_ok=True)
+        size, mtime = self._fileStat(filename)
+        base = os.path.join(self.cacheDir, hashlib.md5(key.encode('utf-8')).hexdigest())
+        files   = []
+        storage = 'parquet'
+        try:
+            for i, df in enumerate(dfsList):
+                files.append(self._writeDF(df, '{}_{}'.format(base, i), storage))
+        except:
+            # e.g. pyarrow not installed, duplicated columns, or mixed types
+            for f in files:
+                self._removeFile(f)
+            files   = []
+            storage = 'pickle'
+            for i, df in enumerate(dfsList):
+                files.append(self._writeDF(df, '{}_{}'.format(base, i), storage))
+        nBytes = sum([os.path.getsize(f) for f in files])
+        self.index[key] = {'size':size, 'mtime':mtime, 'reader':formatName, 'keys':keys,
+                'files':files, 'storage':storage, 'nBytes':nBytes, 'lastAccess':time.time()}
+        self._dirty = True
+        self.evict()
+
+    def remove(self, filename):
+        key   = self._fileKey(filename)
+        entry = self.index.pop(key, None)
+        if entry is not None:
+            for f in entry['files']:
+                self._removeFile(f)
+            self._dirty = True
+
+    def evict(self, maxBytes=None):
+        """ Remove the least recently used entries until the total size is below maxBytes """
+        if maxBytes is None:
+            maxBytes = self.maxBytes
+        entries = sorted(self.index.items(), key=lambda kv: kv[1]['lastAccess'])
+        nBytes = sum([e['nBytes'] for _,e in entries])
+        for key, entry in entries:
+            if nBytes <= maxBytes:
+                break
+            for f in entry['files']:
+                self._removeFile(f)
+            nBytes -= entry['nBytes']
+            del self.index[key]
+            self._dirty = True
+
+    def clear(self):
+        self._index = {}
+        if os.path.exists(self.cacheDir):
+            for f in os.listdir(self.cacheDir):
+                self._removeFile(os.path.join(self.cacheDir, f))
+        self._dirty = True
+
+    @property
+    def nBytes(self):
+        return sum([e['nBytes'] for e in self.index.values()])
+
+    def __len__(self):
+        return len(self.index)
+
+    def __repr__(self):
+        s ='<{} object>:\n'.format(type(self).__name__)
+        s+=' - cacheDir: {}\n'.format(self.cacheDir)
+        s+=' - entries : {}\n'.format(len(self))
+        s+=' - size    : {:.1f}MB / {:.1f}MB\n'.format(self.nBytes/1024**2, self.maxBytes/1024**2)
+        return s
+
+    # --- Low level IO
+    @staticmethod
+    def _writeDF(df, base, storage):
+        if storage=='parquet':
+            filename = base+'.parquet'
+            df.to_parquet(filename)
+        else:
+            filename = base+'.pkl'
+            df.to_pickle(filename)
+        return filename
+
+    @staticmethod
+    def _readDF(filename, storage):
+        if storage=='parquet':
+            return pd.read_parquet(filename)
+        else:
+            return pd.read_pickle(filename)
+
+    @staticmethod
+    def _removeFile(filename):
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
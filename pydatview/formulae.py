@@ -1,12 +1,337 @@
-from pydatview.common import no_unit
+import ast
+import re
+from pydatview.common import no_unit, PyDatViewException
 
 # --- Give access to numpy and other useful functions for "eval"
 import numpy as np
+import pandas as pd
 from numpy import cos, sin, exp, log, pi
 
+# --------------------------------------------------------------------------------}
+# --- Compiled expressions
+# --------------------------------------------------------------------------------{
+# Masks and formulas are parsed once into a syntax tree, where the references to columns ("{Time}" 
+# or "df['Time_[s]']") are replaced by variables and checked against the columns of the table.
+# Element-wise expressions of numerical columns are evaluated with numexpr if it is installed, 
+# otherwise with numpy by chunks of rows, identical sub-expressions being evaluated only once. 
+# Other expressions (e.g. on dates or strings, pandas methods) are evaluated with `eval`.
+_EXPR_CHUNK      = 2**16 # Number of rows evaluated at once with numpy
+_EXPR_CACHE      = {}    # (class, string, columns) -> Expression, shared by tables with the same columns
+_EXPR_CACHE_SIZE = 256
+_QUOTED = re.compile(r'''('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")''')
+_COLREF = re.compile(r'\{([^{}]+)\}')
+_COLVAR = '__col{}'
+
+# Element-wise functions: numpy name -> numexpr name (None if not available in numexpr)
+_FUNCS = {
+    'sin':'sin', 'cos':'cos', 'tan':'tan', 'arcsin':'arcsin', 'arccos':'arccos', 'arctan':'arctan', 'arctan2':'arctan2',
+    'sinh':'sinh', 'cosh':'cosh', 'tanh':'tanh', 'exp':'exp', 'expm1':'expm1', 'log':'log', 'log10':'log10', 'log1p':'log1p',
+    'sqrt':'sqrt', 'abs':'abs', 'absolute':'abs', 'floor':None, 'ceil':None, 'mod':None,
+    'isnan':None, 'isfinite':None, 'isinf':None, 'logical_and':None, 'logical_or':None, 'logical_not':None,
+}
+_CONSTS = {'pi':np.pi}
+_BINOPS = {ast.Add:(np.add,'+'), ast.Sub:(np.subtract,'-'), ast.Mult:(np.multiply,'*'), ast.Div:(np.true_divide,'/'),
+           ast.Pow:(np.power,'**'), ast.Mod:(np.mod,'%'), ast.FloorDiv:(np.floor_divide,None),
+           ast.BitAnd:(np.bitwise_and,'&'), ast.BitOr:(np.bitwise_or,'|'), ast.BitXor:(np.bitwise_xor,None)}
+_CMPOPS = {ast.Eq:(np.equal,'=='), ast.NotEq:(np.not_equal,'!='), ast.Lt:(np.less,'<'), ast.LtE:(np.less_equal,'<='),
+           ast.Gt:(np.greater,'>'), ast.GtE:(np.greater_equal,'>=')}
+_UNARYOPS = {ast.USub:(np.negative,'-'), ast.UAdd:(np.positive,''), ast.Invert:(np.invert,'~')}
+
+_numexpr = False
+def _getNumexpr():
+    """ numexpr module if installed, None otherwise (imported on first use) """
+    global _numexpr
+    if _numexpr is False:
+        try:
+            import numexpr as _numexpr
+        except ImportError:
+            _numexpr = None
+    return _numexpr
+
+
+class _NotElementwise(Exception):
+    pass
+
+
+def columnIndex(columns, name):
+    """ Index of the first column referenced by its name without unit (or full name), None if not found"""
+    name = name.strip()
+    for i, c in enumerate(columns):
+        if no_unit(c).strip()==name or c==name:
+            return i
+    return None
+
+
+def _substituteColumns(s, columns, kind='expression'):
+    """ Replace "{Name}" by variables, and "&&"/"||" by "and"/"or" (outside of strings) """
+    refs = {}
+    def colVar(m):
+        i = columnIndex(columns, m.group(1))
+        if i is None:
+            if ',' in m.group(1) or ':' in m.group(1):
+                return m.group(0) # python set or dictionary
+            raise PyDatViewException('Unknown column in {}: {}'.format(kind, m.group(0)))
+        refs[i] = _COLVAR.format(i)
+        return refs[i]
+    parts = _QUOTED.split(s)
+    for k in range(0, len(parts), 2):
+        code = parts[k].replace('&&',' and ').replace('||',' or ')
+        parts[k] = _COLREF.sub(colVar, code)
+    return ''.join(parts).strip(), refs
+
+
+class _ExprTransformer(ast.NodeTransformer):
+    """ Replaces df['Name'] and np.asarray(df['Name']) by variables, and logical operations
+    involving columns by their element-wise equivalent """
+    def __init__(self, columns, refs, kind='expression'):
+        self.columns = columns
+        self.refs    = refs
+        self.kind    = kind
+
+    def _hasRef(self, node):
+        return any(isinstance(n, ast.Name) and n.id in self.refs.values() for n in ast.walk(node))
+
+    def visit_Subscript(self, node):
+        node = self.generic_visit(node)
+        s = node.slice
+        if type(s).__name__=='Index': # python<3.9
+            s = s.value
+        if isinstance(node.value, ast.Name) and node.value.id=='df' and isinstance(s, ast.Constant) and isinstance(s.value, str):
+            if s.value not in self.columns:
+                raise PyDatViewException('Unknown column in {}: {}'.format(self.kind, s.value))
+            i = list(self.columns).index(s.value)
+            self.refs[i] = _COLVAR.format(i)
+            return ast.copy_location(ast.Name(id=self.refs[i], ctx=ast.Load()), node)
+        return node
+
+    def visit_Call(self, node):
+        node = self.generic_visit(node)
+        f = node.func
+        if isinstance(f, ast.Attribute) and isinstance(f.value, ast.Name) and f.value.id=='np' and f.attr in ['asarray','array'] \
+           and len(node.args)==1 and len(node.keywords)==0 and isinstance(node.args[0], ast.Name) and node.args[0].id in self.refs.values():
+            return node.args[0]
+        return node
+
+    def visit_BoolOp(self, node):
+        # (A) and (B) -> (A) & (B)
+        node = self.generic_visit(node)
+        if not self._hasRef(node):
+            return node
+        op = ast.BitAnd() if isinstance(node.op, ast.And) else ast.BitOr()
+        expr = node.values[0]
+        for v in node.values[1:]:
+            expr = ast.BinOp(left=expr, op=op, right=v)
+        return ast.copy_location(expr, node)
+
+    def visit_Compare(self, node):
+        # a < b < c -> (a < b) & (b < c)
+        node = self.generic_visit(node)
+        if len(node.ops)==1 or not self._hasRef(node):
+            return node
+        operands = [node.left] + node.comparators
+        expr = None
+        for a, op, b in zip(operands[:-1], node.ops, operands[1:]):
+            cmp = ast.Compare(left=a, ops=[op], comparators=[b])
+            expr = cmp if expr is None else ast.BinOp(left=expr, op=ast.BitAnd(), right=cmp)
+        return ast.copy_location(expr, node)
+
+    def visit_UnaryOp(self, node):
+        # not A -> ~A
+        node = self.generic_visit(node)
+        if isinstance(node.op, ast.Not) and self._hasRef(node):
+            return ast.copy_location(ast.UnaryOp(op=ast.Invert(), operand=node.operand), node)
+        return node
+
+
+class Expression(object):
+    """ 
+    Expression compiled for a list of columns. 
+    Columns are referenced with "{Name}" (name with or without unit), or "df['Name']".
+    """
+    kind = 'expression'
+
+    def __init__(self, s, columns):
+        self.s = s
+        expr, refs = _substituteColumns(s, columns, self.kind)
+        try:
+            tree = ast.parse(expr, mode='eval')
+        except SyntaxError as e:
+            raise PyDatViewException('Invalid {} syntax: {}\n{}'.format(self.kind, s, e.msg))
+        tree = _ExprTransformer(columns, refs, self.kind).visit(tree)
+        ast.fix_missing_locations(tree)
+        self.refs   = {v:i for i,v in refs.items()} # variable -> column index
+        self.inputs = [columns[i] for i in sorted(refs.keys())] # names of the columns used
+        self.code   = compile(tree, '<{}>'.format(self.kind), 'eval')
+        self.usesDF = any(isinstance(n, ast.Name) and n.id=='df' for n in ast.walk(tree))
+        # Row-wise: each row of the result only depends on the same row of the columns
+        self.rowwise = all([_isRowwise(n, self.refs) for n in ast.walk(tree.body)])
+        # Element-wise evaluation
+        self.program, self.neString = None, None
+        try:
+            self.program = []
+            _buildProgram(tree.body, self.program, {}, self.refs)
+        except _NotElementwise:
+            self.program = None
+        if self.program is not None:
+            try:
+                self.neString = _neString(tree.body, self.refs)
+            except _NotElementwise:
+                pass
+
+    def evaluate(self, getColumn, nRows, getData=None):
+        """ Evaluate the expression
+        INPUTS:
+          - getColumn: function returning the values of column i (array or Series)
+          - nRows: number of rows
+          - getData: function returning the DataFrame, for expressions using `df`
+        """
+        values = {v: getColumn(i) for v,i in self.refs.items()}
+        arrays = {}
+        for v, x in values.items():
+            # NOTE: pandas extension types (e.g. Int64, boolean, category) are evaluated with pandas
+            if not isinstance(getattr(x, 'dtype', None), np.dtype) or not (np.issubdtype(x.dtype, np.number) or x.dtype==bool):
+                break
+            arrays[v] = x.values if isinstance(x, pd.Series) else x
+        try:
+            if self.program is not None and len(arrays)==len(values):
+                return self._evalElementwise(arrays, nRows)
+            env = {'np':np, 'pd':pd, 'cos':cos, 'sin':sin, 'exp':exp, 'log':log, 'pi':pi}
+            env.update(values)
+            if self.usesDF:
+                env['df'] = getData()
+            return eval(self.code, env)
+        except Exception as e:
+            # Error of the expression itself, e.g. invalid operation or unknown function
+            raise PyDatViewException('Failed to evaluate the {} `{}`: {}'.format(self.kind, self.s, e))
+
+    def _evalElementwise(self, values, nRows):
+        ne = _getNumexpr()
+        if ne is not None and self.neString is not None and len(values)>0:
+            try:
+                return ne.evaluate(self.neString, local_dict={'c{}'.format(self.refs[v]):x for v,x in values.items()})
+            except Exception:
+                pass # e.g. unsupported types, evaluated with numpy
+        if len(values)==0:
+            return _runProgram(self.program, values)
+        if len(self.program)==1:
+            return np.array(_runProgram(self.program, values)) # Copy of a column
+        out = None
+        for i0 in range(0, nRows, _EXPR_CHUNK):
+            r = _runProgram(self.program, {v:x[i0:i0+_EXPR_CHUNK] for v,x in values.items()})
+            if out is None:
+                out = np.empty(nRows, dtype=np.asarray(r).dtype)
+            out[i0:i0+_EXPR_CHUNK] = r
+        return out
+
+    def __repr__(self):
+        return '<{} "{}" (columns:{}, elementwise:{}, numexpr:{})>'.format(type(self).__name__, self.s, 
+                sorted(self.refs.values()), self.program is not None, self.neString is not None)
+
+
+def _compile(cls, s, columns):
+    """ Return the expression of class `cls`, compiled once for a given list of columns """
+    key = (cls, s, tuple(columns))
+    expr = _EXPR_CACHE.get(key, None)
+    if expr is None:
+        expr = cls(s, columns)
+        if len(_EXPR_CACHE)>=_EXPR_CACHE_SIZE:
+            _EXPR_CACHE.clear()
+        _EXPR_CACHE[key] = expr
+    return expr
+
+
+def _buildProgram(node, program, index, refs):
+    """ Flatten an element-wise expression into a list of operations (kind, value, arguments).
+    Identical sub-expressions are only added once. Returns the position of the node in the program."""
+    key = ast.dump(node)
+    if key in index:
+        return index[key]
+    if isinstance(node, ast.Name) and node.id in refs:
+        op = ('var', node.id, [])
+    elif isinstance(node, ast.Name) and node.id in _CONSTS:
+        op = ('const', _CONSTS[node.id], [])
+    elif isinstance(node, ast.Constant) and isinstance(node.value, (bool, int, float)):
+        op = ('const', node.value, [])
+    elif isinstance(node, ast.BinOp) and type(node.op) in _BINOPS:
+        op = ('call', _BINOPS[type(node.op)][0], [_buildProgram(n, program, index, refs) for n in [node.left, node.right]])
+    elif isinstance(node, ast.Compare) and len(node.ops)==1 and type(node.ops[0]) in _CMPOPS:
+        op = ('call', _CMPOPS[type(node.ops[0])][0], [_buildProgram(n, program, index, refs) for n in [node.left, node.comparators[0]]])
+    elif isinstance(node, ast.UnaryOp) and type(node.op) in _UNARYOPS:
+        op = ('call', _UNARYOPS[type(node.op)][0], [_buildProgram(node.operand, program, index, refs)])
+    elif isinstance(node, ast.Call) and _funcName(node) in _FUNCS and len(node.keywords)==0:
+        op = ('call', getattr(np, _funcName(node)), [_buildProgram(n, program, index, refs) for n in node.args])
+    else:
+        raise _NotElementwise()
+    program.append(op)
+    index[key] = len(program)-1
+    return index[key]
+
+
+def _isRowwise(node, refs):
+    """ True for the nodes of a row-wise expression (operators, comparisons, element-wise functions) """
+    if isinstance(node, ast.Name):
+        return node.id in refs or node.id in _CONSTS or node.id in ['np', 'cos', 'sin', 'exp', 'log', 'abs']
+    if isinstance(node, ast.Attribute):
+        return isinstance(node.value, ast.Name) and node.value.id=='np' and node.attr in _FUNCS
+    if isinstance(node, ast.Call):
+        return _funcName(node) in _FUNCS
+    return isinstance(node, (ast.Constant, ast.BinOp, ast.BoolOp, ast.Compare, ast.UnaryOp, ast.operator, 
+        ast.boolop, ast.cmpop, ast.unaryop, ast.Load))
+
+
+def _runProgram(program, values):
+    r = [None]*len(program)
+    for k, (kind, v, args) in enumerate(program):
+        if kind=='var':
+            r[k] = values[v]
+        elif kind=='const':
+            r[k] = v
+        else:
+            r[k] = v(*[r[a] for a in args])
+    return r[-1]
+
+
+def _funcName(node):
+    """ Name of a function called as np.f(...) or f(...) """
+    f = node.func
+    if isinstance(f, ast.Attribute) and isinstance(f.value, ast.Name) and f.value.id=='np':
+        return f.attr
+    if isinstance(f, ast.Name) and f.id in ['cos','sin','exp','log','abs']:
+        return f.id
+    return None
+
+
+def _neString(node, refs):
+    """ Expression string for numexpr """
+    if isinstance(node, ast.Name) and node.id in refs:
+        return 'c{}'.format(refs[node.id])
+    elif isinstance(node, ast.Name) and node.id in _CONSTS:
+        return repr(_CONSTS[node.id])
+    elif isinstance(node, ast.Constant):
+        return repr(node.value)
+    elif isinstance(node, ast.BinOp) and _BINOPS[type(node.op)][1] is not None:
+        return '({} {} {})'.format(_neString(node.left, refs), _BINOPS[type(node.op)][1], _neString(node.right, refs))
+    elif isinstance(node, ast.Compare):
+        return '({} {} {})'.format(_neString(node.left, refs), _CMPOPS[type(node.ops[0])][1], _neString(node.comparators[0], refs))
+    elif isinstance(node, ast.UnaryOp):
+        return '({}{})'.format(_UNARYOPS[type(node.op)][1], _neString(node.operand, refs))
+    elif isinstance(node, ast.Call) and _FUNCS[_funcName(node)] is not None:
+        return '{}({})'.format(_FUNCS[_funcName(node)], ', '.join([_neString(n, refs) for n in node.args]))
+    raise _NotElementwise()
+
+
 # --------------------------------------------------------------------------------}
 # --- Formula 
 # --------------------------------------------------------------------------------{
+class FormulaExpression(Expression):
+    """ Formula compiled for a list of columns, see `compileFormula` """
+    kind = 'formula'
+
+
+def compileFormula(sFormula, columns):
+    """ Return the FormulaExpression of a formula, compiled once for a given list of columns """
+    return _compile(FormulaExpression, sFormula, columns)
+
 
 def formatFormula(df, sFormulaRaw):
     sFormula = sFormulaRaw
@@ -17,10 +342,89 @@ def formatFormula(df, sFormulaRaw):
     return sFormula
 
 def evalFormula(df, sFormulaRaw):
-    sFormula=formatFormula(df, sFormulaRaw)
+    """ Values of a formula evaluated on a DataFrame, None if the evaluation failed """
     try:
-        NewCol=eval(sFormula)
-        return NewCol
-    except:
+        expr = compileFormula(sFormulaRaw, df.columns)
+        return expr.evaluate(lambda i: df.iloc[:, i], len(df), getData=lambda: df)
+    except PyDatViewException: # Invalid formula, or formula failing to evaluate
         return None
 
+
+def formulaDependencies(formulas, columns):
+    """ Dependency graph of formula columns: {name: names of the columns used by the formula}
+    formulas: list of dict('pos','formula','name'), as stored in Table.formulas
+    columns: columns of the table, the formula columns may not be present yet
+    """
+    names   = [f['name'] for f in formulas]
+    columns = list(columns) + [n for n in names if n not in columns]
+    graph = {}
+    for f in formulas:
+        try:
+            inputs = compileFormula(f['formula'], columns).inputs
+        except Exception:
+            inputs = [] # Reported when the formula is evaluated
+        graph[f['name']] = set(inputs) - set([f['name']])
+    return graph
+
+
+def formulaOrder(formulas, columns, changed=None):
+    """ 
+    Return the formulas sorted such that each formula comes after the formulas it uses 
+    (and otherwise in their original order).
+    If `changed` (list of column names) is provided, only the formulas that depend, directly or not, 
+    on these columns are returned.
+    """
+    graph = formulaDependencies(formulas, columns)
+    names = set(graph.keys())
+    if changed is not None:
+        downstream, front = set(), set(changed)
+        while len(front)>0:
+            front = set([n for n in names-downstream if len(graph[n] & front)>0])
+            downstream |= front
+        formulas = [f for f in formulas if f['name'] in downstream]
+    # Topological sort
+    ordered, done = [], set()
+    remaining = list(formulas)
+    pending   = set([f['name'] for f in formulas])
+    while len(remaining)>0:
+        ready = [f for f in remaining if len(graph[f['name']] & (pending-done))==0]
+        if len(ready)==0:
+            raise PyDatViewException('Circular dependency between the formulas: {}'.format(', '.join([f['name'] for f in remaining])))
+        for f in ready:
+            ordered.append(f)
+            done.add(f['name'])
+        remaining = [f for f in remaining if f['name'] not in done]
+    return ordered
+
+
+# --------------------------------------------------------------------------------}
+# --- Masks 
+# --------------------------------------------------------------------------------{
+class MaskExpression(Expression):
+    """ Mask string compiled for a list of columns, see `compileMask` """
+    kind = 'mask'
+
+    def evaluate(self, getColumn, nRows, getData=None):
+        """ Return the array of the selected rows (boolean, or indices) """
+        return _asMask(Expression.evaluate(self, getColumn, nRows, getData=getData), nRows)
+
+
+def compileMask(sMask, columns):
+    """ Return the MaskExpression of a mask string, compiled once for a given list of columns """
+    return _compile(MaskExpression, sMask, columns)
+
+
+def _asMask(mask, nRows):
+    """ Check the result of a mask: boolean array of length nRows, or array of row indices """
+    if isinstance(getattr(mask, 'dtype', None), pd.BooleanDtype):
+        mask = mask.to_numpy(dtype=bool, na_value=False) # Missing values are not selected
+    elif hasattr(mask, 'to_numpy'):
+        mask = mask.to_numpy()
+    mask = np.asarray(mask)
+    if mask.ndim==0 and mask.dtype==bool:
+        return np.full(nRows, bool(mask))
+    if mask.ndim!=1 or not (mask.dtype==bool or np.issubdtype(mask.dtype, np.integer)):
+        raise PyDatViewException('The mask should return an array of booleans (got {} of shape {})'.format(mask.dtype, mask.shape))
+    if mask.dtype==bool and len(mask)!=nRows:
+        raise PyDatViewException('The mask returned {} values for {} rows'.format(len(mask), nRows))
+    return mask
@@ -14,6 +14,47 @@ class UserFormatImportError(Exception):
 
 _FORMATS=None
 
+# Library formats: priority, module, class name, format name, extensions.
+# NOTE: name and extensions should match the static methods `formatName` and `defaultExtensions` of the class
+LIBRARY_FORMATS = [
+    (0 , 'csv_file'               , 'CSVFile'              , 'CSV file'                  , ['.csv', '.txt']),
+    (0 , 'excel_file'             , 'ExcelFile'            , 'Excel file'                , ['.xls', '.xlsx']),
+    (10, 'tecplot_file'           , 'TecplotFile'          , 'Tecplot ASCII file'        , ['.dat']),
+    (10, 'bladed_out_file'        , 'BladedFile'           , 'Bladed output file'        , ['.%*', '.$*']),
+    (20, 'fast_input_file'        , 'FASTInputFile'        , 'FAST input file'           , ['.dat', '.fst', '.txt', '.fstf', '.dvr']),
+    (20, 'fast_output_file'       , 'FASTOutputFile'       , 'FAST output file'          , ['.out', '.outb', '.elm', '.elev', '.dbg', '.dbg2']),
+    (20, 'fast_wind_file'         , 'FASTWndFile'          , 'FAST determ. wind file'    , ['.wnd']),
+    (20, 'fast_linearization_file', 'FASTLinearizationFile', 'FAST linearization output' , ['.lin']),
+    (20, 'fast_summary_file'      , 'FASTSummaryFile'      , 'FAST summary file'         , ['.sum', '.yaml']),
+    (20, 'turbsim_ts_file'        , 'TurbSimTSFile'        , 'TurbSim time series'       , ['.txt']),
+    (20, 'turbsim_file'           , 'TurbSimFile'          , 'TurbSim binary'            , ['.bts']),
+    (30, 'hawc2_dat_file'         , 'HAWC2DatFile'         , 'HAWC2 dat file'            , ['.dat', '.sel']),
+    (30, 'hawc2_htc_file'         , 'HAWC2HTCFile'         , 'HAWC2 htc file'            , ['.htc']),
+    (30, 'hawc2_st_file'          , 'HAWC2StFile'          , 'HAWC2 st file'             , ['.st', '.dat']),
+    (30, 'hawc2_pc_file'          , 'HAWC2PCFile'          , 'HAWC2 PC file'             , ['.dat', '.pc', '.txt']),
+    (30, 'hawc2_ae_file'          , 'HAWC2AEFile'          , 'HAWC2 AE file'             , ['.dat', '.ae', '.txt']),
+    (30, 'hawcstab2_pwr_file'     , 'HAWCStab2PwrFile'     , 'HAWCStab2 power file'      , ['.pwr', '.txt']),
+    (30, 'hawcstab2_ind_file'     , 'HAWCStab2IndFile'     , 'HAWCStab2 induction file'  , ['.ind', '.txt']),
+    (30, 'hawcstab2_cmb_file'     , 'HAWCStab2CmbFile'     , 'HAWCStab2 Campbell file'   , ['.cmb']),
+    (30, 'mannbox_file'           , 'MannBoxFile'          , 'HAWC2 Turbulence box'      , ['.u', '.v', '.w', '.bin']),
+    (40, 'flex_blade_file'        , 'FLEXBladeFile'        , 'FLEX blade file'           , ['.bld', '.bla', '.00X']),
+    (40, 'flex_profile_file'      , 'FLEXProfileFile'      , 'FLEX profile file'         , ['.pro', '.00X']),
+    (40, 'flex_out_file'          , 'FLEXOutFile'          , 'FLEX output file'          , ['.res', '.int']),
+    (40, 'flex_wavekin_file'      , 'FLEXWaveKinFile'      , 'FLEX WaveKin file'         , ['.wko']),
+    (40, 'flex_doc_file'          , 'FLEXDocFile'          , 'FLEX WaveKin file'         , ['.out', 'doc']),
+    (50, 'bmodes_out_file'        , 'BModesOutFile'        , 'BModes output file'        , ['.out']),
+    (50, 'rosco_discon_file'      , 'ROSCODISCONFile'      , 'ROSCO DISCON file'         , ['.in']),
+    (50, 'rosco_performance_file' , 'ROSCOPerformanceFile' , 'ROSCO Performance file'    , ['.txt']),
+    (60, 'netcdf_file'            , 'NetCDFFile'           , 'NetCDF file (<=2D)'        , ['.nc']),
+    (60, 'vtk_file'               , 'VTKFile'              , 'VTK file'                  , ['.vtk', '.vtp']),
+    (60, 'tdms_file'              , 'TDMSFile'             , 'TDMS file'                 , ['.tdms']),
+    (60, 'gnuplot_file'           , 'GNUPlotFile'          , 'GNUPlot file'              , ['.dat', '.raw']),
+    (60, 'parquet_file'           , 'ParquetFile'          , 'Parquet file'              , ['.parquet']),
+    (60, 'pickle_file'            , 'PickleFile'           , 'Pickle file'               , ['.pkl']),
+    (70, 'cactus_file'            , 'CactusFile'           , 'CACTUS file'               , ['.in']),
+    (70, 'raawmat_file'           , 'RAAWMatFile'          , 'RAAW .mat file'            , ['.mat']),
+]
+
 def fileFormats(userpath=None, ignoreErrors=False, verbose=False):
     """ return list of fileformats supported by the library
     If userpath is provided, 
@@ -32,84 +73,15 @@ def fileFormats(userpath=None, ignoreErrors=False, verbose=False):
             return _FORMATS, errors
         else:
             return _FORMATS
-    # --- Library formats
-    from .fast_input_file         import FASTInputFile
-    from .fast_output_file        import FASTOutputFile
-    from .csv_file                import CSVFile
-    from .fast_wind_file          import FASTWndFile
-    from .fast_linearization_file import FASTLinearizationFile
-    from .fast_summary_file       import FASTSummaryFile
-    from .bmodes_out_file         import BModesOutFile
-    from .hawc2_pc_file           import HAWC2PCFile
-    from .hawc2_ae_file           import HAWC2AEFile
-    from .hawc2_dat_file          import HAWC2DatFile
-    from .hawc2_htc_file          import HAWC2HTCFile
-    from .hawc2_st_file           import HAWC2StFile
-    from .hawcstab2_pwr_file      import HAWCStab2PwrFile
-    from .hawcstab2_ind_file      import HAWCStab2IndFile
-    from .hawcstab2_cmb_file      import HAWCStab2CmbFile
-    from .gnuplot_file            import GNUPlotFile 
-    from .mannbox_file            import MannBoxFile 
-    from .flex_blade_file         import FLEXBladeFile
-    from .flex_profile_file       import FLEXProfileFile
-    from .flex_out_file           import FLEXOutFile
-    from .flex_doc_file           import FLEXDocFile
-    from .flex_wavekin_file       import FLEXWaveKinFile
-    from .excel_file              import ExcelFile
-    from .turbsim_ts_file         import TurbSimTSFile
-    from .turbsim_file            import TurbSimFile
-    from .netcdf_file             import NetCDFFile
-    from .tdms_file               import TDMSFile
-    from .tecplot_file            import TecplotFile 
-    from .vtk_file import VTKFile
-    from .bladed_out_file         import BladedFile
-    from .parquet_file            import ParquetFile
-    from .pickle_file             import PickleFile        
-    from .cactus_file             import CactusFile
-    from .raawmat_file            import RAAWMatFile
-    from .rosco_discon_file       import ROSCODISCONFile
-    from .rosco_performance_file  import ROSCOPerformanceFile
+    # --- Library formats (modules are imported when the format is used, see FileFormat.constructor)
     priorities = []
     formats = []
     def addFormat(priority, fmt):
+        fmt.priority = priority
         priorities.append(priority)
         formats.append(fmt)
-    addFormat(0, FileFormat(CSVFile))
-    addFormat(0, FileFormat(ExcelFile))
-    addFormat(10, FileFormat(TecplotFile))
-    addFormat(10, FileFormat(BladedFile))
-    addFormat(20, FileFormat(FASTInputFile))
-    addFormat(20, FileFormat(FASTOutputFile))
-    addFormat(20, FileFormat(FASTWndFile))
-    addFormat(20, FileFormat(FASTLinearizationFile))
-    addFormat(20, FileFormat(FASTSummaryFile))
-    addFormat(20, FileFormat(TurbSimTSFile))
-    addFormat(20, FileFormat(TurbSimFile))
-    addFormat(30, FileFormat(HAWC2DatFile))
-    addFormat(30, FileFormat(HAWC2HTCFile))
-    addFormat(30, FileFormat(HAWC2StFile))
-    addFormat(30, FileFormat(HAWC2PCFile))
-    addFormat(30, FileFormat(HAWC2AEFile))
-    addFormat(30, FileFormat(HAWCStab2PwrFile))
-    addFormat(30, FileFormat(HAWCStab2IndFile))
-    addFormat(30, FileFormat(HAWCStab2CmbFile))
-    addFormat(30, FileFormat(MannBoxFile))
-    addFormat(40, FileFormat(FLEXBladeFile))
-    addFormat(40, FileFormat(FLEXProfileFile))
-    addFormat(40, FileFormat(FLEXOutFile))
-    addFormat(40, FileFormat(FLEXWaveKinFile))
-    addFormat(40, FileFormat(FLEXDocFile))
-    addFormat(50, FileFormat(BModesOutFile))
-    addFormat(50, FileFormat(ROSCODISCONFile))
-    addFormat(50, FileFormat(ROSCOPerformanceFile))
-    addFormat(60, FileFormat(NetCDFFile))
-    addFormat(60, FileFormat(VTKFile))
-    addFormat(60, FileFormat(TDMSFile))
-    addFormat(60, FileFormat(GNUPlotFile))
-    addFormat(60, FileFormat(ParquetFile))
-    addFormat(60, FileFormat(PickleFile))
-    addFormat(70, FileFormat(CactusFile))
-    addFormat(70, FileFormat(RAAWMatFile))
+    for priority, module, className, name, extensions in LIBRARY_FORMATS:
+        addFormat(priority, FileFormat(module='.'+module, className=className, name=name, extensions=extensions, package=__name__))
 
     # --- User defined formats from user path
     UserClasses, UserPaths, UserModules, UserModuleNames, errors = userFileClasses(userpath, ignoreErrors, verbose=verbose)
@@ -218,44 +190,72 @@ def defaultUserDataDir():
 
 
 
-def detectFormat(filename, **kwargs):
-    """ Detect the file formats by looping through the known list. 
-        The method may simply try to open the file, if that's the case
-        the read file is returned. """
-    import os
+def _extensionMatch(myformat, ext):
+    """ True if the extension `ext` is one of the extensions (or patterns) of the format"""
     import re
-    global _FORMATS
-    if _FORMATS is None:
-        formats=fileFormats()
-    else:
-        formats=_FORMATS
+    if ext in myformat.extensions:
+        return True
+    # Try patterns if present
+    extPatterns = [ef.replace('.',r'\.').replace('$',r'\$').replace('*','[.]*') for ef in myformat.extensions if '*' in ef]
+    return any([re.match(pat, ext) is not None for pat in extPatterns])
+
+
+def formatCandidates(filename, formats=None):
+    """ 
+    Ranked list of candidate formats for a file, based on its extension, and on the probes 
+    of the file classes (File.sniff) applied to the first bytes of the file.
+    Candidates are sorted by priority, then by probe result (True, then None).
+    OUTPUTS:
+      - candidates: list of (fileformat, sniff), where sniff is True (very likely), None (unknown) 
+                    or False (certainly not, these are at the end of the list)
+    """
+    from .file import SNIFF_BYTES
+    if formats is None:
+        formats = fileFormats() if _FORMATS is None else _FORMATS
     ext = os.path.splitext(filename.lower())[1]
-    detected = False
-    i = 0 
-    while not detected and i<len(formats):
-        myformat = formats[i]
-        if ext in myformat.extensions:
-            extMatch = True
-        else:
-            # Try patterns if present
-            extPatterns = [ef.replace('.',r'\.').replace('$',r'\$').replace('*','[.]*') for ef in myformat.extensions if '*' in ef]
-            if len(extPatterns)>0:
-                extPatMatch = [re.match(pat, ext) is not None for pat in extPatterns]
-                extMatch = any(extPatMatch)
-            else:
-                extMatch = False
-        if extMatch: # we have a match on the extension
-            #print('Trying format: ',myformat)
-            valid, F = isRightFormat(myformat, filename, **kwargs)
-            if valid:
-                #print('File detected as :',myformat)
-                detected=True
-                return myformat,F
+    header = None
+    candidates = []
+    for i, myformat in enumerate(formats):
+        if not _extensionMatch(myformat, ext):
+            continue
+        # Importing the module of the format
+        try:
+            cls = myformat.constructor
+        except ImportError as e:
+            print('[WARN] Format `{}` not available: {}'.format(myformat.name, e))
+            continue
+        sniff = getattr(cls, 'sniff', None)
+        result = None
+        if sniff is not None:
+            if header is None:
+                with open(filename, 'rb') as f:
+                    header = f.read(SNIFF_BYTES)
+            try:
+                result = sniff(header, filename)
+            except Exception as e:
+                print('[WARN] Probe of format `{}` failed: {}'.format(myformat.name, e))
+        rank = {True:0, None:1, False:2}[result]
+        priority = myformat.priority if myformat.priority is not None else 0
+        candidates.append(((rank==2, priority, rank, i), myformat, result))
+    candidates.sort(key=lambda c: c[0])
+    return [(myformat, result) for _, myformat, result in candidates]
 
-        i += 1
 
-    if not detected:
-        raise FormatNotDetectedError('The file format could not be detected for the file: '+filename)
+def detectFormat(filename, **kwargs):
+    """ Detect the file formats by looping through the candidate formats (see formatCandidates). 
+        The method may simply try to open the file, if that's the case
+        the read file is returned. 
+        Formats for which the probes are negative are only tried if no other format could read the file.
+    """
+    for myformat, sniff in formatCandidates(filename):
+        #print('Trying format: ',myformat, sniff)
+        valid, F = isRightFormat(myformat, filename, **kwargs)
+        if valid:
+            #print('File detected as :',myformat)
+            if sniff is False:
+                print('[WARN] File {} detected as {}, but the probe of the format was negative'.format(filename, myformat.name))
+            return myformat,F
+    raise FormatNotDetectedError('The file format could not be detected for the file: '+filename)
 
 def read(filename, fileformat=None, **kwargs):
     F = None
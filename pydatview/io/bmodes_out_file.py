@@ -39,6 +39,15 @@ class BModesOutFile(File):
         """ Short string (~100 char) identifying the file format"""
         return 'BModes output file'
 
+    @staticmethod
+    def sniff(header, filename=None):
+        """ "BModes" should be present on the first line """
+        from .file import sniffLines
+        lines = sniffLines(header, filename)
+        if lines is None or len(lines)==0:
+            return None
+        return lines[0].find('BModes')>=0
+
     def __init__(self, filename=None, **kwargs):
         """ Class constructor. If a `filename` is given, the file is read. """
         self.filename = filename
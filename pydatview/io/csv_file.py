@@ -249,6 +249,7 @@ class CSVFile(File):
         if (self.commentLines is not None) and len(self.commentLines)>0:
             skiprows = skiprows + self.commentLines
         skiprows =list(sorted(set(skiprows)))
+        self.nHeader = skiprows[-1]+1 if len(skiprows)>0 else 0 # Number of lines before the data
         if self.sep is not None:
             if self.sep=='\t':
                 self.sep=r'\s+'
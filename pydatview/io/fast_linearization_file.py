@@ -1,14 +1,17 @@
 import os
 import numpy as np
 import re
+import warnings
 try:
-    from .file import File, WrongFormatError, BrokenFormatError
+    from .file import File, WrongFormatError, BrokenFormatError, EmptyFileError
 except:
     File = dict
     class BrokenFormatError(Exception): pass
+    class EmptyFileError(Exception): pass
 
-class SlowReaderNeededError(Exception):
-    pass
+# --- StarValues replacement `*****` -> inf
+_starPattern = re.compile(r"[\*]+")
+_starSubStr  = ' inf '
 
 
 _lin_vec = ['x','xd','xdot','u','y','z','header']
@@ -40,6 +43,10 @@ class FASTLinearizationFile(File):
         print(df['A'].columns)
         print(df['A'])
 
+        # read only the matrix A of several files, stacked: (nFiles x nx x nx)
+        lins = readLinFiles(['5MW.1.lin', '5MW.2.lin'], matrices=['A'])
+        print(lins['A'].shape)
+
     """
     @staticmethod
     def defaultExtensions():
@@ -55,7 +62,7 @@ class FASTLinearizationFile(File):
         if filename:
             self.read(**kwargs)
 
-    def read(self, filename=None, starSub=None, removeStatesPattern=None):
+    def read(self, filename=None, starSub=None, removeStatesPattern=None, matrices=None):
         """ Reads the file self.filename, or `filename` if provided
 
         - starSub: if None, raise an error if `****` are present
@@ -64,6 +71,8 @@ class FASTLinearizationFile(File):
                            otherwise search for states matching a pattern and remove them
                            e.g:  'tower|Drivetrain'  or '^AD'
                            see removeStates in this file.
+        - matrices: list of matrices to read, e.g. ['A'], the other matrices are skipped.
+                           if None, all the matrices are read
         """
         
         # --- Standard tests and exceptions (generic code)
@@ -80,63 +89,63 @@ class FASTLinearizationFile(File):
         self['header']=[]
 
         # --- StarValues replacement `*****` -> inf
-        starPattern = re.compile(r"[\*]+")
-        starSubStr = ' inf '
-        starSubFn  = lambda si: starPattern.sub(starSubStr, si)
-
-        # Reading function, with slow or fast reader. See sub functions at end of this file
-        def doRead(slowReader=False):
-            with open(self.filename, 'r', errors="surrogateescape") as f:
-                # --- Reader header
-                self['header'], lastLine=readToMarker(f, 'Jacobians included', 30)
-                self['header'].append(lastLine)
-                nx   = extractVal(self['header'],'Number of continuous states:'    , dtype=int, NA=np.nan, missing=None)
-                nxd  = extractVal(self['header'],'Number of discrete states:'      , dtype=int, NA=np.nan, missing=None)
-                nz   = extractVal(self['header'],'Number of constraint states:'    , dtype=int, NA=np.nan, missing=None)
-                nu   = extractVal(self['header'],'Number of inputs:'               , dtype=int, NA=np.nan, missing=None)
-                ny   = extractVal(self['header'],'Number of outputs:'              , dtype=int, NA=np.nan, missing=None)
-                bJac = extractVal(self['header'],'Jacobians included in this file?', dtype=bool, NA=False, missing=None)
-                self['Azimuth']   = extractVal(self['header'], 'Azimuth:'    , dtype=float, NA=np.nan, missing=None)
-                self['RotSpeed']  = extractVal(self['header'], 'Rotor Speed:', dtype=float, NA=np.nan, missing=None) # rad/s
-                self['WindSpeed'] = extractVal(self['header'], 'Wind Speed:' , dtype=float, NA=np.nan, missing=None)
-                self['t']  = extractVal(self['header'],'Simulation time:'    , dtype=float, NA=np.nan, missing=None)
-                for i, line in enumerate(f):
-                    line = line.strip()
-                    if line.find('Order of continuous states:')>=0:
-                        self['x'], self['x_info'] = readOP(f, nx, 'x', defaultDerivOrder=1, starSubFn=starSubFn, starSub=starSub)
-                    elif line.find('Order of continuous state derivatives:')>=0:
-                        self['xdot'], self['xdot_info'] = readOP(f, nx, 'xdot', defaultDerivOrder=2, starSubFn=starSubFn, starSub=starSub)
-                    elif line.find('Order of discrete states:')>=0:
-                        self['xd'], self['xd_info'] = readOP(f, nxd, 'xd', defaultDerivOrder=2, starSubFn=starSubFn, starSub=starSub)
-                    elif line.find('Order of inputs')>=0:
-                        self['u'], self['u_info'] = readOP(f, nu, 'u', defaultDerivOrder=0, starSubFn=starSubFn, starSub=starSub)
-                    elif line.find('Order of outputs')>=0:
-                        self['y'], self['y_info'] = readOP(f, ny, 'y', defaultDerivOrder=0, starSubFn=starSubFn, starSub=starSub)
-                    elif line.find('Order of constraint states:')>=0:
-                        self['z'], self['z_info'] = readOP(f, nz, 'z', defaultDerivOrder=0, starSubFn=starSubFn, starSub=starSub)
-                    elif line.find('A:')>=0:
-                        self['A'] = readMat(f, nx, nx, 'A', slowReader=slowReader, filename=self.filename, starSubFn=starSubFn, starSub=starSub)
-                    elif line.find('B:')>=0:
-                        self['B'] = readMat(f, nx, nu, 'B', slowReader=slowReader, filename=self.filename, starSubFn=starSubFn, starSub=starSub)
-                    elif line.find('C:')>=0:
-                        self['C'] = readMat(f, ny, nx, 'C', slowReader=slowReader, filename=self.filename, starSubFn=starSubFn, starSub=starSub)
-                    elif line.find('D:')>=0:
-                        self['D'] = readMat(f, ny, nu, 'D', slowReader=slowReader, filename=self.filename, starSubFn=starSubFn, starSub=starSub)
-                    elif line.find('dUdu:')>=0:
-                        self['dUdu'] = readMat(f, nu, nu,'dUdu', slowReader=slowReader, filename=self.filename, starSubFn=starSubFn, starSub=starSub)
-                    elif line.find('dUdy:')>=0:
-                        self['dUdy'] = readMat(f, nu, ny,'dUdy', slowReader=slowReader, filename=self.filename, starSubFn=starSubFn, starSub=starSub)
-                    elif line.find('StateRotation:')>=0:
-                        pass
-                        # TODO
-                        #StateRotation:
-                    elif line.find('ED M:')>=0:
+        starSubFn  = lambda si: _starPattern.sub(_starSubStr, si)
+
+        # Matrices: key in file and name. See sub functions at end of this file
+        matKeys = [('A:', 'A'), ('B:', 'B'), ('C:', 'C'), ('D:', 'D'), ('dUdu:', 'dUdu'), ('dUdy:', 'dUdy')]
+        if matrices is not None:
+            matrices = list(matrices)
+        nMatLeft = len(matrices) if matrices is not None else -1
+
+        with open(self.filename, 'r', errors="surrogateescape") as f:
+            # --- Reader header
+            self['header'], lastLine=readToMarker(f, 'Jacobians included', 30)
+            self['header'].append(lastLine)
+            nx   = extractVal(self['header'],'Number of continuous states:'    , dtype=int, NA=np.nan, missing=None)
+            nxd  = extractVal(self['header'],'Number of discrete states:'      , dtype=int, NA=np.nan, missing=None)
+            nz   = extractVal(self['header'],'Number of constraint states:'    , dtype=int, NA=np.nan, missing=None)
+            nu   = extractVal(self['header'],'Number of inputs:'               , dtype=int, NA=np.nan, missing=None)
+            ny   = extractVal(self['header'],'Number of outputs:'              , dtype=int, NA=np.nan, missing=None)
+            bJac = extractVal(self['header'],'Jacobians included in this file?', dtype=bool, NA=False, missing=None)
+            self['Azimuth']   = extractVal(self['header'], 'Azimuth:'    , dtype=float, NA=np.nan, missing=None)
+            self['RotSpeed']  = extractVal(self['header'], 'Rotor Speed:', dtype=float, NA=np.nan, missing=None) # rad/s
+            self['WindSpeed'] = extractVal(self['header'], 'Wind Speed:' , dtype=float, NA=np.nan, missing=None)
+            self['t']  = extractVal(self['header'],'Simulation time:'    , dtype=float, NA=np.nan, missing=None)
+            shapes = {'A':(nx,nx), 'B':(nx,nu), 'C':(ny,nx), 'D':(ny,nu), 'dUdu':(nu,nu), 'dUdy':(nu,ny), 'M':(24,24)}
+            for i, line in enumerate(f):
+                line = line.strip()
+                if line.find('Order of continuous states:')>=0:
+                    self['x'], self['x_info'] = readOP(f, nx, 'x', defaultDerivOrder=1, starSubFn=starSubFn, starSub=starSub)
+                elif line.find('Order of continuous state derivatives:')>=0:
+                    self['xdot'], self['xdot_info'] = readOP(f, nx, 'xdot', defaultDerivOrder=2, starSubFn=starSubFn, starSub=starSub)
+                elif line.find('Order of discrete states:')>=0:
+                    self['xd'], self['xd_info'] = readOP(f, nxd, 'xd', defaultDerivOrder=2, starSubFn=starSubFn, starSub=starSub)
+                elif line.find('Order of inputs')>=0:
+                    self['u'], self['u_info'] = readOP(f, nu, 'u', defaultDerivOrder=0, starSubFn=starSubFn, starSub=starSub)
+                elif line.find('Order of outputs')>=0:
+                    self['y'], self['y_info'] = readOP(f, ny, 'y', defaultDerivOrder=0, starSubFn=starSubFn, starSub=starSub)
+                elif line.find('Order of constraint states:')>=0:
+                    self['z'], self['z_info'] = readOP(f, nz, 'z', defaultDerivOrder=0, starSubFn=starSubFn, starSub=starSub)
+                elif line.find('StateRotation:')>=0:
+                    pass
+                    # TODO
+                    #StateRotation:
+                else:
+                    if line.find('ED M:')>=0:
+                        name = 'M'
                         self['EDDOF'] = line[5:].split()
-                        self['M']     = readMat(f, 24, 24,'M', slowReader=slowReader, filename=self.filename, starSubFn=starSubFn, starSub=starSub)
-        try:
-            doRead(slowReader=False)
-        except SlowReaderNeededError:
-            doRead(slowReader=True)
+                    else:
+                        name = next((name for key, name in matKeys if line.find(key)>=0), None)
+                    if name is None:
+                        continue
+                    n, m = shapes[name]
+                    if matrices is not None and name not in matrices:
+                        skipLines(f, n)
+                        continue
+                    self[name] = readMat(f, n, m, name, filename=self.filename, starSub=starSub)
+                    nMatLeft -= 1
+                    if nMatLeft==0:
+                        break # All the requested matrices were read
 
         if removeStatesPattern is not None:
             self.removeStates(pattern=removeStatesPattern)
@@ -531,7 +540,8 @@ def readOP(fid, n, name='', defaultDerivOrder=1, filename='', starSubFn=None, st
     bHasDeriv= colNames.find('Derivative Order')>=0
     for i, line in enumerate(fid):
         line = line.strip()
-        line = starSubFn(line)
+        if line.find('*')>=0:
+            line = starSubFn(line)
         sp   = line.split()
         if sp[1].find(',')>=0:
             #  Most likely this OP has three values (e.g. orientation angles)
@@ -567,38 +577,115 @@ def readOP(fid, n, name='', defaultDerivOrder=1, filename='', starSubFn=None, st
 
 
 
-def readMat(fid, n, m, name='', slowReader=False, filename='', starSubFn=None, starSub=None):
-    if not slowReader:
-        try:
-            return np.array([fid.readline().strip().split() for i in np.arange(n)],dtype=float)
-        except:
-            print('[INFO] Failed to read some value in matrix {}, trying slower reader'.format(name))
-            raise SlowReaderNeededError()
-    else:
-        #vals = vals.ravel()
-        #vals = np.array(list(map(starSubFn, vals))).reshape(n,m)
-        vals=np.array([starSubFn( fid.readline().strip() ).split() for i in np.arange(n)], dtype=str)
+def skipLines(fid, n):
+    for i in range(n):
+        fid.readline()
+
+def readMat(fid, n, m, name='', filename='', starSub=None):
+    """ 
+    Read a n x m matrix from the next n lines of a file. The block of text is converted at once.
+    Entries `****` are replaced by inf, and then by `starSub` (error if starSub is None)
+    """
+    txt = ''.join([fid.readline() for i in range(n)])
+    if txt.find('*')>=0:
+        txt = _starPattern.sub(_starSubStr, txt)
+    # Number of values of each row, the block conversion below only checks the total
+    nVals = [len(l.split()) for l in txt.splitlines()]
+    if len(nVals)!=n:
+        raise Exception('Shape of matrix `{}` has wrong dimension ({} rows instead of {}x{})\n\tin linfile: {}'.format(name, len(nVals), n, m, filename))
+    for i, nv in enumerate(nVals):
+        if nv!=m:
+            raise Exception('Shape of matrix `{}` has wrong dimension ({} values on row {} instead of {}x{})\n\tin linfile: {}'.format(name, nv, i+1, n, m, filename))
+    with warnings.catch_warnings():
+        # NOTE: numpy stops at the first value that cannot be converted, with a DeprecationWarning
+        warnings.simplefilter('error', DeprecationWarning)
         try:
-            vals = vals.astype(float) # This could potentially fail
-        except:
+            vals = np.fromstring(txt, sep=' ')
+        except (DeprecationWarning, ValueError):
             raise Exception('Failed to convert into an array of float the matrix `{}`\n\tin linfile: {}'.format(name, filename))
-        if vals.shape[0]!=n or vals.shape[1]!=m:
-            shape1 = vals.shape
-            shape2 = (n,m)
-            raise Exception('Shape of matrix `{}` has wrong dimension ({} instead of {})\n\tin linfile: {}'.format(name, shape1, shape2, name, filename))
-
-        nNaN = np.sum(np.isnan(vals.ravel()))
-        nInf = np.sum(np.isinf(vals.ravel()))
-        if nInf>0:
-            sErr = 'Some ill-formated/infinite values (e.g. `*******`) were found in the matrix `{}`\n\tin linflile: {}'.format(name, filename)
-            if starSub is None:
-                raise Exception(sErr)
-            else:
-                print('[WARN] '+sErr)
-                vals[np.isinf(vals)] = starSub
-        if nNaN>0:
-            raise Exception('Some NaN values were found in the matrix `{}`\n\tin linfile: `{}`.'.format(name, filename))
-        return vals
+    if vals.size!=n*m:
+        raise Exception('Shape of matrix `{}` has wrong dimension ({} values instead of {}x{})\n\tin linfile: {}'.format(name, vals.size, n, m, filename))
+    vals = vals.reshape(n,m)
+
+    bInf = np.isinf(vals)
+    if np.any(bInf):
+        sErr = 'Some ill-formated/infinite values (e.g. `*******`) were found in the matrix `{}`\n\tin linflile: {}'.format(name, filename)
+        if starSub is None:
+            raise Exception(sErr)
+        else:
+            print('[WARN] '+sErr)
+            vals[bInf] = starSub
+    if np.any(np.isnan(vals)):
+        raise Exception('Some NaN values were found in the matrix `{}`\n\tin linfile: `{}`.'.format(name, filename))
+    return vals
+
+
+# --------------------------------------------------------------------------------}
+# --- Multiple files
+# --------------------------------------------------------------------------------{
+def _readLinFile(i, filename, kwargs):
+    """ Read one file, returns (i, dict) """
+    return i, dict(FASTLinearizationFile(filename, **kwargs))
+
+def readLinFiles(filenames, matrices=['A','B','C','D'], nWorkers=1, **kwargs):
+    """ 
+    Read linearization files (e.g. the operating points of a Campbell diagram), in parallel.
+    The files must have the same states, inputs and outputs.
+    INPUTS:
+      - filenames: list of .lin files
+      - matrices: list of matrices to read, e.g. ['A']. If None, all matrices are read
+      - nWorkers: number of processes. Default: 1, the files are read serially. None: number of CPUs.
+                  NOTE: with several processes, scripts must call readLinFiles within an 
+                  `if __name__=='__main__':` block (processes are started with "spawn" on Windows and macOS).
+                  If the process pool fails, the files are read serially.
+      - kwargs: other arguments of FASTLinearizationFile.read (e.g. starSub, removeStatesPattern)
+    OUTPUTS:
+      - dictionary with:
+         - the matrices, stacked, e.g. 'A': (nFiles x nx x nx)
+         - the operating points, stacked, e.g. 'x': (nFiles x nx)
+         - 'WindSpeed', 'RotSpeed', 'Azimuth', 't': arrays of length nFiles
+         - 'x_info', 'u_info', etc.: information of the first file
+         - 'filenames'
+    """
+    filenames = list(filenames)
+    if len(filenames)==0:
+        raise Exception('No linearization file provided')
+    kwargs['matrices'] = matrices
+    if nWorkers is None:
+        nWorkers = os.cpu_count() or 1
+    nWorkers = min(nWorkers, len(filenames))
+    lins = [None]*len(filenames)
+    if nWorkers>1:
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            with ProcessPoolExecutor(max_workers=nWorkers) as executor:
+                futures = [executor.submit(_readLinFile, i, f, kwargs) for i, f in enumerate(filenames)]
+                for fut in futures:
+                    i, lins[i] = fut.result()
+        except BrokenProcessPool:
+            # E.g. script without `if __name__=='__main__'` guard, with the "spawn" start method (Windows, macOS)
+            print('[WARN] The process pool failed, the remaining files are read serially')
+    for i, f in enumerate(filenames):
+        if lins[i] is None:
+            _, lins[i] = _readLinFile(i, f, kwargs)
+
+    out = {'filenames': filenames}
+    for k in ['WindSpeed', 'RotSpeed', 'Azimuth', 't']:
+        out[k] = np.array([lin[k] for lin in lins], dtype=float)
+    for k in _lin_mat + [k for k in _lin_vec if k!='header']:
+        if k not in lins[0]:
+            continue
+        shape = np.shape(lins[0][k])
+        for f, lin in zip(filenames, lins):
+            if k not in lin or np.shape(lin[k])!=shape:
+                raise Exception('`{}` has a different shape in file {} than in file {}'.format(k, f, filenames[0]))
+        out[k] = np.stack([lin[k] for lin in lins])
+    for k in _lin_dict + ['xd_info', 'z_info', 'EDDOF']:
+        if k in lins[0]:
+            out[k] = lins[0][k]
+    return out
+
 
 if __name__ == '__main__':
     f = FASTLinearizationFile('../../data/example_files/StandstillSemi_ForID_EDHD.1.lin')
@@ -6,7 +6,8 @@ Main content:
 - class FASTOutputFile()
 - data, info = def load_output(filename)
 - data, info = def load_ascii_output(filename)
-- data, info = def load_binary_output(filename, use_buffer=True)
+- data, info = def load_binary_output(filename, use_buffer=True, lazy=False)
+- class FASTBinaryData()
 - def writeDataFrame(df, filename, binary=True)
 - def writeBinary(fileName, channels, chanNames, chanUnits, fileID=2, descStr='')
 
@@ -68,6 +69,11 @@ class FASTOutputFile(File):
         df['Time_[s]'] -=100
         f.writeDataFrame(df, '5MW_TimeShifted.outb')
 
+        # lazy reading of a large binary file: only the header is parsed, the 
+        # data is memory-mapped and the channels are decoded when accessed
+        f = FASTOutputFile('5MW.outb', lazy=True)
+        Omega = f.lazyData.column(f.lazyData.columns.index('RotSpeed_[rpm]'))
+
     """
 
     @staticmethod
@@ -78,17 +84,60 @@ class FASTOutputFile(File):
     def formatName():
         return 'FAST output file'
 
+    @staticmethod
+    def sniff(header, filename=None):
+        """ Binary files: check the FileID. ASCII files: look for the line "Time" or "Alpha" in the header """
+        from .file import sniffLines
+        ext = os.path.splitext(filename.lower())[1] if filename is not None else ''
+        if ext=='.outb':
+            if len(header)<2:
+                return False
+            FileID = struct.unpack('<h', header[:2])[0]
+            return FileID in [FileFmtID_WithTime, FileFmtID_WithoutTime, FileFmtID_NoCompressWithoutTime, FileFmtID_ChanLen_In]
+        if ext in ['.out', '.elev', '.dbg', '.dbg2']:
+            lines = sniffLines(header, filename)
+            if lines is None:
+                return None # binary or utf-16
+            maxHeaderLines = 35 # See load_ascii_output
+            for l in lines[:maxHeaderLines]:
+                if (l+' dummy').lower().split()[0] in ['time', 'alpha']:
+                    return True
+            if len(lines)>=maxHeaderLines or os.path.getsize(filename)<=len(header):
+                return False
+        return None
+
     def __init__(self, filename=None, **kwargs):
         """ Class constructor. If a `filename` is given, the file is read. """
         # Data
         self.filename    = filename
+        self.lazyData    = None  # FASTBinaryData, when the file is read with lazy=True
         self.data        = None  # pandas.DataFrame
         self.description = ''    # string
         if filename:
             self.read(**kwargs)
 
-    def read(self, filename=None, **kwargs):
-        """ Reads the file self.filename, or `filename` if provided """
+    @property
+    def data(self):
+        # The DataFrame is only created on first access when the file was read lazily
+        if self._data is None and self.lazyData is not None:
+            self._data    = pd.DataFrame(data=np.asarray(self.lazyData), columns=self.lazyData.columns)
+            self.lazyData = None # release the memory map
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        self._data    = data
+        self.lazyData = None
+
+    @property
+    def lazy(self):
+        return self.lazyData is not None and self._data is None
+
+    def read(self, filename=None, lazy=False, **kwargs):
+        """ Reads the file self.filename, or `filename` if provided 
+        If `lazy` is True, binary files are memory-mapped, only the header is read,
+        and the channels are decoded on demand (see `lazyData`).
+        """
         
         # --- Standard tests and exceptions (generic code)
         if filename:
@@ -116,7 +165,7 @@ class FASTOutputFile(File):
             if ext in ['.out','.elev','.dbg','.dbg2']:
                 self.data, info = load_ascii_output(self.filename, **kwargs)
             elif ext=='.outb':
-                self.data, info = load_binary_output(self.filename, **kwargs)
+                self.data, info = load_binary_output(self.filename, lazy=lazy, **kwargs)
                 self['binary']=True
             elif ext=='.elm':
                 F=CSVFile(filename=self.filename, sep=' ', commentLines=[0,2],colNamesLine=1)
@@ -126,7 +175,7 @@ class FASTOutputFile(File):
                 info['attribute_names']=self.data.columns.values
             else:
                 if isBinary(self.filename):
-                    self.data, info = load_binary_output(self.filename, **kwargs)
+                    self.data, info = load_binary_output(self.filename, lazy=lazy, **kwargs)
                     self['binary']=True
                 else:
                     self.data, info = load_ascii_output(self.filename, **kwargs)
@@ -152,7 +201,14 @@ class FASTOutputFile(File):
             cols=info['attribute_names']
         self.description = info.get('description', '')
         self.description = ''.join(self.description) if isinstance(self.description,list) else self.description
-        if isinstance(self.data, pd.DataFrame):
+        if isinstance(self._data, FASTBinaryData):
+            if len(cols)!=self._data.shape[1]:
+                raise BrokenFormatError('Inconstistent number of columns between headers ({}) and data ({}) for file {}'.format(len(cols), self._data.shape[1], self.filename))
+            lazyData = self._data
+            lazyData.columns = list(cols)
+            self._data    = None
+            self.lazyData = lazyData
+        elif isinstance(self.data, pd.DataFrame):
             self.data.columns = cols
         else:
             if len(cols)!=self.data.shape[1]:
@@ -186,29 +242,33 @@ class FASTOutputFile(File):
                         f.write('\n'.join(['\t'.join(['{:10.4f}'.format(y)]+['{: .5e}'.format(x) for x in y]) for y in self.data]))
 
     @property
-    def channels(self):
+    def columns(self):
+        if self.lazy:
+            return self.lazyData.columns
         if self.data is None:
             return []
+        return self.data.columns
+
+    @property
+    def channels(self):
         def no_unit(s):
             s=s.replace('(','[').replace(')',']').replace(' [','_[').strip(']')
             try:
                 return s.split('_[')[0].strip()
             except:
                 return s.strip()
-        channels = [no_unit(c) for c in self.data.columns]
+        channels = [no_unit(c) for c in self.columns]
         return channels
 
     @property
     def units(self):
-        if self.data is None:
-            return []
         def unit(s):
             s=s.replace('(','[').replace(')',']').replace(' [','_[').strip(']')
             try:
                 return s.split('_[')[1].strip()
             except:
                 return s.strip()
-        units = [unit(c) for c in self.data.columns]
+        units = [unit(c) for c in self.columns]
         return units
 
     def toDataFrame(self):
@@ -221,7 +281,10 @@ class FASTOutputFile(File):
     def __repr__(self):
         s='<{} object> with attributes:\n'.format(type(self).__name__)
         s+=' - filename:    {}\n'.format(self.filename)
-        s+=' - data ({})\n'.format(type(self.data))
+        if self.lazy:
+            s+=' - lazyData ({})\n'.format(self.lazyData)
+        else:
+            s+=' - data ({})\n'.format(type(self.data))
         s+=' - description: {}\n'.format(self.description)
         s+='and keys: {}\n'.format(self.keys())
         return s
@@ -366,8 +429,21 @@ def isBinary(filename):
 
 
 
-def load_ascii_output(filename, method='numpy', encoding='ascii', **kwargs):
+def load_ascii_output(filename, method='stream', encoding='ascii', channels=None, tRange=None, blockSize=2**22, **kwargs):
+    """ 
+    Read an ASCII OpenFAST output file
 
+    INPUTS:
+     - method: 'stream' (default), 'numpy', 'pandas', 'forLoop', 'listCompr'
+         'stream' reads the file by blocks of `blockSize` bytes, and only stores the rows and channels selected.
+     - channels: list of channel names (with or without units) or indices to read. Default: all channels.
+     - tRange: (tStart, tEnd), time window to read (based on the first column). Default: the full file.
+    OUTPUTS:
+     - data: array (nRows x nChannels)
+     - info: dictionary with 'name', 'description', 'attribute_names', 'attribute_units'
+    """
+    if method=='stream' and encoding!='ascii':
+        method='numpy'
 
     if method in ['forLoop','pandas']:
         from .file import numberOfLines
@@ -389,7 +465,7 @@ def load_ascii_output(filename, method='numpy', encoding='ascii', **kwargs):
                 f.close()
                 encoding=''
                 print('[WARN] Attempt to re-read the file with encoding utf-16')
-                return load_ascii_output(filename=filename, method=method, encoding='utf-16')
+                return load_ascii_output(filename=filename, method=method, encoding='utf-16', channels=channels, tRange=tRange)
             first_word = (l+' dummy').lower().split()[0]
             in_header=  (first_word != 'time') and  (first_word != 'alpha')
             if in_header:
@@ -405,8 +481,15 @@ def load_ascii_output(filename, method='numpy', encoding='ascii', **kwargs):
 
         nHeader = len(header)+1
         nCols = len(info['attribute_names'])
+        ISel = _channelIndices(info, channels)
 
-        if method=='numpy':
+        if method=='stream':
+            # Reading by blocks, only the selected channels and rows are stored
+            f.close()
+            data = _load_ascii_stream(filename, nHeader+1, ISel, tRange=tRange, blockSize=blockSize)
+            ISel, tRange = None, None # Selection already done
+
+        elif method=='numpy':
             # The most efficient, and will remove empty lines and the lines that starts with "This"
             #  ("This" is found at the end of some Hydro Out files..)
             data = np.loadtxt(f, comments=('This'))
@@ -414,15 +497,15 @@ def load_ascii_output(filename, method='numpy', encoding='ascii', **kwargs):
         elif method =='pandas':
             # Could probably be made more efficient, but 
             f.close()
-            nRows = nLines-nHeader
+            nRows = nLines-nHeader-1
             sep=r'\s+'
             cols= ['C{}'.format(i) for i in range(nCols)]
-            df = pd.read_csv(filename, sep=sep, header=0, skiprows=nHeader, names=cols, dtype=float, na_filter=False, nrows=nRows, engine='pyarrow'); print(df)
+            df = pd.read_csv(filename, sep=sep, header=0, skiprows=nHeader, names=cols, dtype=float, na_filter=False, nrows=nRows)
             data=df.values
 
         elif method == 'forLoop':
             # The most inefficient
-            nRows = nLines-nHeader
+            nRows = nLines-nHeader-1
             sep=r'\s+'
             data = np.zeros((nRows, nCols))
             for i in range(nRows):
@@ -437,15 +520,138 @@ def load_ascii_output(filename, method='numpy', encoding='ascii', **kwargs):
         else:
             raise NotImplementedError()
 
+    # --- Selection of rows and channels, for methods that read the full file
+    if tRange is not None:
+        data = np.atleast_2d(data)
+        data = data[(data[:,0]>=tRange[0]) & (data[:,0]<=tRange[1]),:]
+    if ISel is not None:
+        data = np.atleast_2d(data)[:,ISel]
     return data, info
 
 
-def load_binary_output(filename, use_buffer=False, method='mix', **kwargs):
+def _channelIndices(info, channels):
+    """ Return the indices of the selected channels (None for all), and reduce the names and units in `info` """
+    if channels is None:
+        return None
+    names = info['attribute_names']
+    units = info['attribute_units']
+    namesUnits = names
+    if units is not None and len(units)==len(names):
+        namesUnits = [n+'_['+u.replace('sec','s')+']' for n,u in zip(names, units)]
+    I = []
+    for c in channels:
+        if isinstance(c, (int, np.integer)):
+            I.append(int(c))
+        elif c in names:
+            I.append(names.index(c))
+        elif c in namesUnits:
+            I.append(namesUnits.index(c))
+        else:
+            raise Exception('Channel {} not found in file. Available channels: {}'.format(c, ', '.join(names)))
+    info['attribute_names'] = [names[i] for i in I]
+    if units is not None and len(units)==len(names):
+        info['attribute_units'] = [units[i] for i in I]
+    return I
+
+
+def _read_line_blocks(f, blockSize):
+    """ Yield blocks of complete lines (bytes) from a file opened in binary mode """
+    rem = b''
+    while True:
+        block = f.read(blockSize)
+        if not block:
+            if len(rem.strip())>0:
+                yield rem
+            return
+        block = rem + block
+        i = block.rfind(b'\n')+1
+        rem = block[i:]
+        if i>0:
+            yield block[:i]
+
+
+def _seek_time(f, t0, iStart, iEnd, minBytes=2**16):
+    """ Move the file position close to (before) the first line with a time above t0,
+    using a bisection on the byte position, assuming increasing time."""
+    lo, hi = iStart, iEnd
+    while hi-lo > minBytes:
+        mid = (lo+hi)//2
+        f.seek(mid)
+        f.readline() # Partial line
+        try:
+            t = float(f.readline().split()[0])
+        except (IndexError, ValueError):
+            break # End of file or comment line
+        if t<t0:
+            lo = mid
+        else:
+            hi = mid
+    f.seek(lo)
+    if lo>iStart:
+        f.readline() # Partial line, its time is below t0
+
+
+def _load_ascii_stream(filename, nHeaderLines, ISel=None, tRange=None, blockSize=2**22):
+    """ 
+    Read the numerical data of an ASCII output file by blocks of lines.
+    The blocks are parsed with numpy, and copied in a preallocated array that grows geometrically.
+    Only the channels `ISel` (all if None) and the rows with time (first column) within `tRange` are stored.
+    Lines starting with "This" (found at the end of some files) are ignored.
+    """
+    import io
+    data = None
+    n    = 0
+    with open(filename, 'rb') as f:
+        for i in range(nHeaderLines):
+            f.readline()
+        nBytes = os.path.getsize(filename)-f.tell()
+        if tRange is not None:
+            _seek_time(f, tRange[0], f.tell(), f.tell()+nBytes)
+        for block in _read_line_blocks(f, blockSize):
+            stop = False
+            if tRange is not None:
+                # First parse the time only, the blocks outside of the window are skipped
+                t = np.loadtxt(io.BytesIO(block), comments='This', usecols=[0], ndmin=1)
+                if len(t)==0 or t[-1]<tRange[0]:
+                    continue
+                stop = t[-1]>tRange[1] # NOTE: assumes increasing time
+                b = (t>=tRange[0]) & (t<=tRange[1])
+                if not np.any(b):
+                    if stop:
+                        break
+                    continue
+            values = np.loadtxt(io.BytesIO(block), comments='This', usecols=ISel, ndmin=2)
+            if tRange is not None:
+                values = values[b]
+            m = values.shape[0]
+            if data is None:
+                # Estimate of the number of rows based on the size of the file
+                nEst = m if tRange is not None else int(m*nBytes/len(block)*1.02)+1
+                data = np.empty((max(nEst, m), values.shape[1]))
+            elif n+m>data.shape[0]:
+                data2 = np.empty((max(2*data.shape[0], n+m), data.shape[1]))
+                data2[:n] = data[:n]
+                data = data2
+            data[n:n+m] = values
+            n += m
+            if stop:
+                break
+    if data is None:
+        return np.empty((0, 0 if ISel is None else len(ISel)))
+    if n<0.9*data.shape[0]:
+        return data[:n].copy()
+    return data[:n]
+
+
+def load_binary_output(filename, use_buffer=False, method='mix', lazy=False, **kwargs):
     """
     03/09/15: Ported from ReadFASTbinary.m by Mads M Pedersen, DTU Wind
     24/10/18: Low memory/buffered version by E. Branlard, NREL
     18/01/19: New file format for extended channels, by E. Branlard, NREL
     20/11/23: Improved performances using np.fromfile, by E. Branlard, NREL
+
+    If `lazy` is True, only the header is read, and `data` is returned as a 
+    `FASTBinaryData` object, which memory-maps the packed data and decodes channels on demand.
     """
     StructDict = {
             'uint8':   ('B', 1, np.uint8), 
@@ -571,6 +777,20 @@ def load_binary_output(filename, use_buffer=False, method='mix', **kwargs):
 
         nPts = NT * NumOutChans  # number of data points in the file
 
+        if lazy:
+            offset = fid.tell()
+            info = {'name': os.path.splitext(os.path.basename(filename))[0],
+                    'description': DescStr,
+                    'fileID': FileID,
+                    'attribute_names': ChanName,
+                    'attribute_units': ChanUnit}
+            if FileID == FileFmtID_WithTime:
+                timeInfo = (TimeScl, TimeOff)
+            else:
+                timeInfo = (TimeOut1, TimeIncr)
+            data = FASTBinaryData(filename, offset, FileID, NT, NumOutChans, ColScl, ColOff, timeInfo)
+            return data, info
+
         if FileID == FileFmtID_WithTime:
             PackedTime = fread(fid, NT, 'int32')  #read the time data
             cnt = len(PackedTime)
@@ -626,6 +846,108 @@ def load_binary_output(filename, use_buffer=False, method='mix', **kwargs):
     return data, info
 
 
+class FASTBinaryData():
+    """ 
+    Lazy access to the channels of an OpenFAST binary file.
+
+    The packed data block (and packed time, if present) is memory-mapped with `np.memmap`.
+    A channel is only decoded and scaled when requested, so that the memory used scales
+    with the number of channels accessed, and not with the size of the file.
+    Column 0 is the time, column i>0 is the output channel i-1, consistent with the 
+    DataFrame returned by `FASTOutputFile.toDataFrame`.
+
+    Main methods:
+      - column(i): returns the scaled values of column i
+      - toDataFrame(): returns the full (decoded) DataFrame
+    """
+    def __init__(self, filename, offset, FileID, NT, NumOutChans, ColScl, ColOff, timeInfo):
+        self.filename    = filename
+        self.FileID      = FileID
+        self.NT          = NT
+        self.NumOutChans = NumOutChans
+        self.ColScl      = np.asarray(ColScl, dtype=np.float64).ravel()
+        self.ColOff      = np.asarray(ColOff, dtype=np.float64).ravel()
+        self.timeInfo    = timeInfo
+        self.columns     = ['Time']+['C{}'.format(i) for i in range(NumOutChans)]
+        nBytesFile = os.path.getsize(filename)
+        if FileID == FileFmtID_WithTime:
+            if offset + 4*NT > nBytesFile:
+                raise Exception('Could not read entire %s file: time values missing' % (filename))
+            self._packedTime = np.memmap(filename, dtype=np.int32, mode='r', offset=offset, shape=(NT,))
+            offset += 4*NT
+        else:
+            self._packedTime = None
+        if FileID == FileFmtID_NoCompressWithoutTime:
+            dtype = np.float64
+        else:
+            dtype = np.int16
+        nBytes = NT*NumOutChans*np.dtype(dtype).itemsize
+        if offset + nBytes > nBytesFile:
+            raise Exception('Could not read entire %s file: read %d of %d values' % (filename, (nBytesFile-offset)/np.dtype(dtype).itemsize, NT*NumOutChans))
+        if NT*NumOutChans>0:
+            self._packedData = np.memmap(filename, dtype=dtype, mode='r', offset=offset, shape=(NT, NumOutChans))
+        else:
+            self._packedData = np.zeros((NT, NumOutChans), dtype=dtype)
+
+    @property
+    def shape(self):
+        return (self.NT, self.NumOutChans+1)
+
+    def __len__(self):
+        return self.NT
+
+    def time(self, i0=None, i1=None):
+        i0, i1, _ = slice(i0, i1).indices(self.NT)
+        if self.FileID == FileFmtID_WithTime:
+            TimeScl, TimeOff = self.timeInfo
+            return (np.asarray(self._packedTime[i0:i1]) - TimeOff) / TimeScl
+        else:
+            TimeOut1, TimeIncr = self.timeInfo
+            return TimeOut1 + TimeIncr * np.arange(i0, i1)
+
+    def column(self, i, i0=None, i1=None):
+        """ Return the scaled values of column `i` (0: time), optionally only for the rows i0 to i1 (excluded) """
+        if i==0:
+            return self.time(i0, i1)
+        iChan = i-1
+        if iChan<0 or iChan>=self.NumOutChans:
+            raise IndexError('Column index {} out of range for file with {} columns'.format(i, self.NumOutChans+1))
+        # NOTE: the strided memory-map is read once, and the operations are the ones of load_binary_output
+        return (self._packedData[i0:i1, iChan] - self.ColOff[iChan]) / self.ColScl[iChan]
+
+    def rows(self, i0, i1):
+        """ Return the scaled values of all columns for the rows i0 to i1 (excluded) """
+        i0, i1, _ = slice(i0, i1).indices(self.NT)
+        data = np.empty((max(i1-i0, 0), self.NumOutChans+1), dtype=np.float64)
+        if self.FileID == FileFmtID_WithTime:
+            TimeScl, TimeOff = self.timeInfo
+            data[:,0] = (np.asarray(self._packedTime[i0:i1]) - TimeOff) / TimeScl
+        else:
+            TimeOut1, TimeIncr = self.timeInfo
+            data[:,0] = TimeOut1 + TimeIncr * np.arange(i0, i1)
+        data[:,1:] = (self._packedData[i0:i1,:] - self.ColOff) / self.ColScl
+        return data
+
+    def __array__(self, dtype=None, copy=None):
+        """ Decode all channels (memory expensive, same as load_binary_output) """
+        data = np.empty((self.NT, self.NumOutChans+1), dtype=np.float64)
+        data[:,0] = self.time()
+        # Decoding by blocks of rows to limit the memory of intermediate arrays
+        nBlock = max(1, int(4096*40/max(self.NumOutChans,1)))
+        for i0 in range(0, self.NT, nBlock):
+            i1 = min(i0+nBlock, self.NT)
+            data[i0:i1,1:] = (self._packedData[i0:i1,:] - self.ColOff) / self.ColScl
+        if dtype is not None:
+            data = data.astype(dtype)
+        return data
+
+    def toDataFrame(self):
+        return pd.DataFrame(data=np.asarray(self), columns=self.columns)
+
+    def __repr__(self):
+        return '<{} (lazy) {}x{}>'.format(type(self).__name__, self.NT, self.NumOutChans+1)
+
+
 def writeBinary(fileName, channels, chanNames, chanUnits, fileID=4, descStr=''):
     """
     Write an OpenFAST binary file.
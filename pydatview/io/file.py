@@ -51,6 +51,10 @@ class File(OrderedDict):
     def toDataFrame(self):
         return self._toDataFrame()
 
+    def toLazyDataFrame(self):
+        """ Same as toDataFrame, but tables may be LazyTable, computed when first accessed (see tools/lazy_table) """
+        return self.toDataFrame()
+
     # --------------------------------------------------------------------------------
     # --- Properties
     # --------------------------------------------------------------------------------
@@ -136,6 +140,13 @@ class File(OrderedDict):
     def formatName():
         raise NotImplementedError("Method must be implemented in the subclass")
 
+    @staticmethod
+    def sniff(header, filename=None):
+        """ Cheap test on the first bytes of a file (`header`, see SNIFF_BYTES), done before reading it.
+        Returns False if the file is certainly not of this format (reading would raise a WrongFormatError),
+        True if it very likely is, None if unknown (default). """
+        return None
+
     def test_write_read(self,bDelete=False):
         """ Test that we can write and then read what we wrote
         NOTE: this does not check that what we read is the same..
@@ -197,6 +208,28 @@ def isBinary(filename):
             return True
 
 
+SNIFF_BYTES = 4096 # Number of bytes given to File.sniff
+
+def sniffLines(header, filename=None):
+    """ Lines of text contained in the first bytes of a file, used by File.sniff. 
+    The last line is dropped if the file is longer than `header` and the line is incomplete.
+    Returns None if the bytes are not text (binary or unknown encoding).
+    """
+    import codecs
+    if header.startswith(codecs.BOM_UTF8):
+        text = header[len(codecs.BOM_UTF8):].decode('utf-8', errors='ignore')
+    elif header.startswith(codecs.BOM_UTF16_LE) or header.startswith(codecs.BOM_UTF16_BE):
+        text = header.decode('utf-16', errors='ignore')
+    elif b'\x00' in header:
+        return None
+    else:
+        text = header.decode('latin-1')
+    lines = text.splitlines()
+    complete = filename is not None and os.path.getsize(filename)<=len(header)
+    if not complete and len(lines)>0 and not text.endswith(('\n','\r')):
+        lines = lines[:-1]
+    return lines
+
 def numberOfLines(filename, method=1):
 
     if method==1:
@@ -208,8 +241,14 @@ def numberOfLines(filename, method=1):
                 b = files.read(size)
                 if not b: break
                 yield b
+        n, last = 0, '\n'
         with open(filename, "r",encoding="utf-8",errors='ignore') as f:
-            return sum(bl.count("\n") for bl in blocks(f))
+            for bl in blocks(f):
+                n += bl.count("\n")
+                last = bl[-1]
+        if last!='\n':
+            n += 1 # Last line without end of line
+        return n
     else:
         raise NotImplementedError()
 
@@ -16,16 +16,39 @@ def isRightFormat(fileformat, filename, **kwargs):
         raise
 
 class FileFormat():
-    def __init__(self,fileclass=None):
-        self.constructor = fileclass
+    """ 
+    File format, either from a file class, or from static metadata (module, class name, extensions, name).
+    In the latter case, the module is only imported when the constructor is needed.
+    """
+    def __init__(self,fileclass=None, module=None, className=None, extensions=None, name=None, package=None):
+        self._constructor = fileclass
+        self._module      = module
+        self._className   = className
+        self._package     = package
+        self.priority     = None # Set when registered, see fileFormats
         if fileclass is None:
-            self.extensions = []
-            self.name = ''
+            self.extensions = [] if extensions is None else list(extensions)
+            self.name       = '' if name is None else name
         else:
             self.extensions  = fileclass.defaultExtensions()
             self.name        = fileclass.formatName()
 
+    @property
+    def constructor(self):
+        if self._constructor is None and self._module is not None:
+            import importlib
+            module = importlib.import_module(self._module, package=self._package)
+            self._constructor = getattr(module, self._className)
+        return self._constructor
+
+    @constructor.setter
+    def constructor(self, fileclass):
+        self._constructor = fileclass
+
+    @property
+    def isLoaded(self):
+        """ True if the file class is available without importing its module """
+        return self._constructor is not None or self._module is None
 
     def __repr__(self):
         return 'FileFormat object: {} ({})'.format(self.name,self.extensions[0])
-
@@ -19,6 +19,15 @@ class FLEXDocFile(File):
     def formatName():
         return 'FLEX WaveKin file'
 
+    @staticmethod
+    def sniff(header, filename=None):
+        """ First line starts with "#Program" """
+        from .file import sniffLines
+        lines = sniffLines(header, filename)
+        if lines is None or len(lines)==0:
+            return None
+        return lines[0].strip().find('#Program')==0
+
     def _read(self):
         with open(self.filename, 'r', errors="surrogateescape") as f:
             line1=f.readline().strip()
@@ -0,0 +1,223 @@
+"""
+Incremental reading of growing files, e.g. outputs of simulations in progress.
+
+A "follower" remembers how much of a file was read (byte offset and number of rows),
+and only reads the rows that were appended to the file since the last read.
+
+Supported files:
+ - ASCII OpenFAST outputs (.out, .elev, .dbg)
+ - CSV files (read with CSVFile)
+ - Binary OpenFAST outputs (.outb), the number of time steps is re-read from the header
+
+Main content:
+ - def createFollower(filename, fileformat, fileobject, nRows, columns)
+ - class TextFollower
+ - class BinaryOutFollower
+ - class FollowReset
+"""
+import os
+import io
+import zlib
+import numpy as np
+import pandas as pd
+
+
+class FollowReset(Exception):
+    """ The file was rewritten or cannot be appended to, it needs to be fully read again """
+    pass
+
+
+def createFollower(filename, fileformat=None, fileobject=None, nRows=0, columns=None):
+    """
+    Return a follower for a file that was read with `fileformat`, or None if the format is not supported.
+    INPUTS:
+      - fileformat: FileFormat used to read the file
+      - fileobject: file object returned by the reader (needed for CSV files)
+      - nRows: number of rows already read
+      - columns: columns of the file (used to name the new rows)
+    """
+    from .fast_output_file import FASTOutputFile, isBinary
+    from .csv_file import CSVFile
+    if filename is None or len(filename)==0 or not os.path.isfile(filename):
+        return None
+    constructor = getattr(fileformat, 'constructor', None)
+    if constructor is FASTOutputFile or isinstance(fileobject, FASTOutputFile):
+        ext = os.path.splitext(filename.lower())[1]
+        if ext in ['.out', '.elev', '.dbg', '.dbg2'] and not isBinary(filename):
+            nHeaderLines = _asciiOutHeaderLines(filename)
+            if nHeaderLines is None:
+                return None
+            return TextFollower(filename, nHeaderLines, nRows, columns, kind='out')
+        elif ext=='.outb':
+            return BinaryOutFollower(filename, nRows, columns)
+    elif isinstance(fileobject, CSVFile):
+        return TextFollower(filename, fileobject.nHeader, nRows, columns, kind='csv',
+                sep=fileobject.sep, commentChar=fileobject.commentChar, encoding=fileobject.encoding)
+    return None
+
+
+def _asciiOutHeaderLines(filename, maxHeaderLines=35):
+    """ Number of lines before the data of an ASCII OpenFAST output file (up to the line of units) """
+    with open(filename, 'rb') as f:
+        for i in range(maxHeaderLines):
+            l = f.readline().decode('ascii', errors='ignore')
+            first_word = (l+' dummy').lower().split()[0]
+            if first_word in ['time', 'alpha']:
+                return i+2
+    return None
+
+
+# --------------------------------------------------------------------------------}
+# --- Text files
+# --------------------------------------------------------------------------------{
+class TextFollower(object):
+    """
+    Follower for text files where each line is a row.
+    Only complete lines (ending with a new line) are read, the line being written is read at the next call.
+    A rewrite of the file is detected with checksums of the beginning of the file and of the last bytes read.
+    """
+    checkBytes = 2**16 # Size of the blocks of the checksums
+    def __init__(self, filename, nHeaderLines, nRows, columns, kind='out', sep=None, commentChar=None, encoding=None):
+        self.filename    = filename
+        self.nRows       = nRows
+        self.columns     = list(columns)
+        self.kind        = kind
+        self.sep         = sep
+        self.commentChar = commentChar
+        self.encoding    = encoding
+        self.offset      = self._skipRows(nHeaderLines, nRows)
+        self.stat        = None
+        with open(self.filename, 'rb') as f:
+            self.signature = self._signature(f)
+
+    def _isDataLine(self, line):
+        s = line.strip()
+        if len(s)==0:
+            return False
+        if self.kind=='out':
+            return not s.startswith(b'This')
+        if self.commentChar is not None and len(self.commentChar)>0:
+            return not s.startswith(self.commentChar.encode())
+        return True
+
+    def _skipRows(self, nHeaderLines, nRows):
+        """ Byte offset after the header and the rows already read """
+        with open(self.filename, 'rb') as f:
+            for i in range(nHeaderLines):
+                f.readline()
+            n = 0
+            while n<nRows:
+                line = f.readline()
+                if not line.endswith(b'\n'):
+                    # The file was modified, or the last row read was incomplete
+                    raise FollowReset('Rows read not found in file {}'.format(self.filename))
+                if self._isDataLine(line):
+                    n += 1
+            return f.tell()
+
+    def _signature(self, f):
+        """ Checksums of the beginning of the file, and of the bytes before the offset """
+        f.seek(0)
+        head = f.read(min(self.offset, self.checkBytes))
+        i0 = max(0, self.offset-self.checkBytes)
+        f.seek(i0)
+        tail = f.read(self.offset-i0)
+        return (zlib.crc32(head), zlib.crc32(tail))
+
+    def newRows(self):
+        """ Return a DataFrame with the rows appended to the file since the last read, or None """
+        st = os.stat(self.filename)
+        stat = (st.st_size, st.st_mtime_ns)
+        if stat==self.stat:
+            return None
+        size = st.st_size
+        if size<self.offset:
+            raise FollowReset('File {} was truncated'.format(self.filename))
+        with open(self.filename, 'rb') as f:
+            # The bytes already read should be unchanged (otherwise the file was rewritten)
+            if self._signature(f)!=self.signature:
+                raise FollowReset('File {} was rewritten'.format(self.filename))
+            self.stat = stat
+            if size==self.offset:
+                return None
+            f.seek(self.offset)
+            block = f.read(size-self.offset)
+        iEnd = block.rfind(b'\n')+1
+        if iEnd==0:
+            return None # Line being written
+        block = block[:iEnd]
+        if self.kind=='out':
+            values = np.loadtxt(io.BytesIO(block), comments='This', ndmin=2)
+            if values.shape[0]>0 and values.shape[1]!=len(self.columns):
+                raise FollowReset('Number of columns changed in file {}'.format(self.filename))
+            df = pd.DataFrame(data=values, columns=self.columns)
+        else:
+            try:
+                df = pd.read_csv(io.BytesIO(block), sep=self.sep, header=None, names=self.columns, comment=self.commentChar, encoding=self.encoding)
+            except pd.errors.ParserError:
+                raise FollowReset('New rows of file {} could not be parsed'.format(self.filename))
+        self.offset += iEnd
+        self.nRows  += len(df)
+        with open(self.filename, 'rb') as f:
+            self.signature = self._signature(f)
+        return df
+
+    def __repr__(self):
+        return '<{} {} ({} rows, offset {})>'.format(type(self).__name__, self.filename, self.nRows, self.offset)
+
+
+# --------------------------------------------------------------------------------}
+# --- OpenFAST binary files
+# --------------------------------------------------------------------------------{
+class BinaryOutFollower(object):
+    """
+    Follower for OpenFAST binary files. The header is read again to get the number of time steps,
+    and only the new time steps are decoded.
+    """
+    def __init__(self, filename, nRows, columns):
+        self.filename = filename
+        self.nRows    = nRows
+        self.columns  = list(columns)
+        self.size     = os.path.getsize(filename)
+        self.scaling  = self._scaling(self._read())
+
+    def newRows(self):
+        """ Return a DataFrame with the time steps appended to the file since the last read, or None """
+        size = os.path.getsize(self.filename)
+        if size==self.size:
+            return None
+        data = self._read()
+        if data is None:
+            return None # Most likely the file is being written
+        self.size = size
+        if data.NumOutChans+1!=len(self.columns) or data.NT<self.nRows:
+            raise FollowReset('File {} was rewritten'.format(self.filename))
+        # The packed values can only be appended if the scaling has not changed
+        scaling = self._scaling(data)
+        if self.scaling is not None and scaling!=self.scaling:
+            raise FollowReset('Scaling changed in file {}'.format(self.filename))
+        self.scaling = scaling
+        if data.NT==self.nRows:
+            return None
+        df = pd.DataFrame(data=data.rows(self.nRows, data.NT), columns=self.columns)
+        self.nRows = data.NT
+        return df
+
+    def _read(self):
+        """ Read the header, the data is memory-mapped """
+        from .fast_output_file import load_binary_output
+        try:
+            data, info = load_binary_output(self.filename, lazy=True)
+        except Exception:
+            return None
+        return data
+
+    @staticmethod
+    def _scaling(data):
+        if data is None:
+            return None
+        # NOTE: compared as bytes, since scaling factors can be NaN
+        return (data.ColScl.tobytes(), data.ColOff.tobytes(), np.asarray(data.timeInfo, dtype=float).tobytes())
+
+    def __repr__(self):
+        return '<{} {} ({} rows)>'.format(type(self).__name__, self.filename, self.nRows)
@@ -19,6 +19,21 @@ class HAWC2StFile(File):
     def formatName():
         return 'HAWC2 st file'
 
+    @staticmethod
+    def sniff(header, filename=None):
+        """ Some of the first lines start with `#` and `$` """
+        from .file import sniffLines
+        lines = sniffLines(header, filename)
+        if lines is None:
+            return None
+        nLinesMax = 13 # See _read
+        lines = lines[:nLinesMax]
+        if any([l.startswith('#') for l in lines]) and any([l.startswith('$') for l in lines]):
+            return True
+        if len(lines)>=nLinesMax or (filename is not None and os.path.getsize(filename)<=len(header)):
+            return False
+        return None
+
     def __init__(self,filename=None, **kwargs):
         self.filename = None
         if filename:
@@ -19,6 +19,16 @@ class HAWCStab2IndFile(File):
     def formatName():
         return 'HAWCStab2 induction file'
 
+    @staticmethod
+    def sniff(header, filename=None):
+        """ Header line starts with `#` and has 38, 14 or 18 columns """
+        from .file import sniffLines
+        lines = sniffLines(header, filename)
+        if lines is None or len(lines)==0:
+            return None
+        l = lines[0].strip()
+        return len(l)>0 and l[0]=='#' and l.count(']') in [38, 14, 18]
+
     def _read(self, *args, **kwargs):
         # Reading header line
         with open(self.filename,'r',encoding=self.encoding) as f:
@@ -18,6 +18,16 @@ class HAWCStab2PwrFile(File):
     def formatName():
         return 'HAWCStab2 power file'
 
+    @staticmethod
+    def sniff(header, filename=None):
+        """ Header line starts with `#` and has 15 columns """
+        from .file import sniffLines
+        lines = sniffLines(header, filename)
+        if lines is None or len(lines)==0:
+            return None
+        l = lines[0].strip()
+        return len(l)>0 and l[0]=='#' and l.count(']')==15
+
     def _read(self):
         # Reading header line
         with open(self.filename,'r',encoding=self.encoding) as f:
@@ -86,7 +86,7 @@ class MannBoxFile(File):
         if filename:
             self.read(filename=filename,**kwargs)
 
-    def read(self, filename=None, N=None, dy=1, dz=1, y0=None, z0=0, zMid=None):
+    def read(self, filename=None, N=None, dy=1, dz=1, y0=None, z0=0, zMid=None, compact=False):
         """ read MannBox
         INPUTS (all optional):
         - filename: name of input file to be read
@@ -94,6 +94,8 @@ class MannBoxFile(File):
         - y0: minimum value of the y vector (default is -ly/2 where ly = ny x dy)
         - z0: minimum value of the z vector (default is 0)
         - zMid: mid value of the z vector (default it lz/2 where lz= nz x dz )
+        - compact: if True, the file is memory-mapped, and 'field' is a read-only float32 view on it.
+                   Only the values accessed are read from the disk.
 
         SET:
          - the keys 'field', array of shape (nx x ny x nz)
@@ -120,25 +122,20 @@ class MannBoxFile(File):
                 raise BrokenFormatError('Reading a Mann box requires the knowledge of the dimensions. The dimensions can be inferred from the filename, for instance: `filebase_1024x32x32.u`. Try renaming your file such that the three last digits are the dimensions in x, y and z.')
         nx,ny,nz=N
 
-        def _read_buffered():
-            data=np.zeros((nx,ny,nz),dtype=np.float32)
-            with open(self.filename, mode='rb') as f:            
-                for ix in range(nx):
-                    Buffer = np.frombuffer(f.read(4*ny*nz), dtype=np.float32) # 4-bytes
-                    data[ix,:,:] =  np.flip(Buffer.reshape((ny,nz)),0)
-            return data
-
-        def _read_nonbuffered():
-            data = np.fromfile(self.filename, np.dtype('<f'), -1)
-            assert len(data) == nx*ny*nz, "Size of turbulence box (%d) does not match nx x ny x nz (%d)" % (len(data),nx*ny*nz)
-            # Fortran order z the fastest, then y then x. We then flip that back to nx, ny, nz
-            data = np.transpose(data.reshape(nz, ny, nx, order='F'), axes=(2,1,0))
-            # The issue is the y-coordinate in Mann Boxes go from Ly/2 -> -Ly/2
-            # So we flip the y-axis, so that the field is consistent with typical y values
-            return np.flip(data, 1) # i.e. data=data[:,::-1,:]
-
-#         self['field']= _read_nonbuffered()
-        self['field']= _read_buffered()
+        # z is the fast index, then y then x (i.e. C order for an array nx x ny x nz)
+        nBytes = os.path.getsize(self.filename)
+        if nBytes < 4*nx*ny*nz:
+            raise BrokenFormatError('Size of turbulence box ({}) does not match nx x ny x nz ({})'.format(nBytes//4, nx*ny*nz))
+        if compact:
+            data = np.memmap(self.filename, dtype=np.dtype('<f4'), mode='r', shape=(nx,ny,nz))
+        else:
+            data = np.fromfile(self.filename, dtype=np.dtype('<f4'), count=nx*ny*nz).reshape(nx,ny,nz)
+        # The issue is the y-coordinate in Mann Boxes go from Ly/2 -> -Ly/2
+        # So we flip the y-axis, so that the field is consistent with typical y values
+        data = data[:,::-1,:]
+        if not compact:
+            data = np.ascontiguousarray(data, dtype=np.float32)
+        self['field']= data
         self['dy']=dy
         self['dz']=dz
         self['y0']=y0
@@ -155,6 +155,22 @@ class TecplotFile(File):
     def formatName():
         return 'Tecplot ASCII file'
 
+    @staticmethod
+    def sniff(header, filename=None):
+        """ First line that is not a comment starts with a keyword """
+        from .file import sniffLines
+        lines = sniffLines(header, filename)
+        if lines is None:
+            return None
+        for l in lines:
+            l = l.strip().lower()
+            if len(l)==0:
+                return None
+            if l[0]=='#':
+                continue
+            return any([l.find(k)==0 for k in Keywords])
+        return None
+
     def __init__(self,filename=None,**kwargs):
         self.filename = None
         if filename:
@@ -0,0 +1,91 @@
+"""
+Table computed on first access, for readers returning several tables (e.g. derived quantities of a file).
+
+The names of the columns and the number of rows are known up front, so that the tables can be
+listed without computing them. The DataFrame is computed the first time the data is accessed, then cached.
+
+A LazyTable provides the "lazy data" interface of pydatview Tables:
+    columns, shape, column(i), toDataFrame()
+
+Example, in a reader:
+
+    def toLazyDataFrame(self):
+        dfs = {}
+        dfs['Profile'] = LazyTable(self._profileDF, columns=['z_[m]', 'u_[m/s]'], nRows=len(self['z']))
+        return dfs
+
+    def toDataFrame(self):
+        return evaluateLazyTables(self.toLazyDataFrame())
+"""
+import pandas as pd
+
+
+class LazyTable(object):
+
+    def __init__(self, function, columns, nRows, name=''):
+        """
+        function: function without arguments returning a DataFrame
+        columns: list of column names of the DataFrame (known before it is computed)
+        nRows: number of rows of the DataFrame (known before it is computed)
+        """
+        self.function  = function
+        self._columns  = list(columns)
+        self._nRows    = int(nRows)
+        self.name      = name
+        self._df       = None
+
+    @property
+    def computed(self):
+        return self._df is not None
+
+    def evaluate(self):
+        """ Compute the DataFrame, once """
+        if self._df is None:
+            df = self.function()
+            if not isinstance(df, pd.DataFrame):
+                df = pd.DataFrame(data=df, columns=self._columns)
+            self._df = df
+            self.function = None # Release the references held by the function
+        return self._df
+
+    # --- Lazy data interface
+    @property
+    def columns(self):
+        return list(self._df.columns) if self.computed else self._columns
+
+    @property
+    def shape(self):
+        return self._df.shape if self.computed else (self._nRows, len(self._columns))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def column(self, i):
+        """ Values of column i """
+        return self.evaluate().iloc[:, i].values
+
+    def toDataFrame(self):
+        """ Copy of the DataFrame, the cached one is not modified by the caller """
+        return self.evaluate().copy()
+
+    def __reduce__(self):
+        """ Pickling (e.g. tables sent by a process pool): the function may not be picklable, the table is computed """
+        return (_computedLazyTable, (self.evaluate(), self.name))
+
+    def __repr__(self):
+        return '<{} {} {}x{} ({})>'.format(type(self).__name__, self.name, self.shape[0], self.shape[1], 'computed' if self.computed else 'not computed')
+
+
+def _computedLazyTable(df, name=''):
+    table = LazyTable(None, df.columns, len(df), name=name)
+    table._df = df
+    return table
+
+
+def evaluateLazyTables(dfs):
+    """ Replace the LazyTable of a dict (or a single LazyTable) by their DataFrame """
+    if isinstance(dfs, LazyTable):
+        return dfs.evaluate()
+    if isinstance(dfs, dict):
+        return {k: (v.evaluate() if isinstance(v, LazyTable) else v) for k, v in dfs.items()}
+    return dfs
@@ -0,0 +1,122 @@
+"""
+Array stored in a compact form, decoded on access.
+
+Binary turbulence boxes (e.g. TurbSim) store the velocity field as int16 with a scale and an offset
+per velocity component. Keeping the packed values (possibly memory-mapped) requires 4 times less memory
+than the decoded float64 field. Only the slices or planes accessed are decoded:
+
+    values = (packed - offset[k]) / scale[k]    where k is the index along the first axis
+
+Example:
+
+    u = PackedArray(packed, scale, offset)  # packed: (3 x nt x ny x nz) int16
+    u[0,:,iy,iz]                            # decoded time series (float64)
+    u.mean(axis=1)                          # mean over time, computed on the packed values
+"""
+import numpy as np
+
+_CHUNK_BYTES = 2**24 # Maximum size of the intermediate arrays used by the reductions
+
+class PackedArray(object):
+
+    def __init__(self, packed, scale=None, offset=None, dtype=np.float64):
+        """
+        packed: n-d array (e.g. int16, may be a strided view on a memory map)
+        scale, offset: arrays of length packed.shape[0] (default: 1 and 0)
+        dtype: type of the decoded values
+        """
+        self.packed = packed
+        n0 = packed.shape[0]
+        self.scale  = np.ones(n0)  if scale  is None else np.asarray(scale , dtype=np.float64).ravel()
+        self.offset = np.zeros(n0) if offset is None else np.asarray(offset, dtype=np.float64).ravel()
+        self.dtype  = np.dtype(dtype)
+
+    # --- Array-like interface
+    @property
+    def shape(self):
+        return self.packed.shape
+
+    @property
+    def ndim(self):
+        return self.packed.ndim
+
+    @property
+    def size(self):
+        return self.packed.size
+
+    @property
+    def nbytes(self):
+        """ Memory used by the packed values """
+        return self.packed.nbytes
+
+    def __len__(self):
+        return len(self.packed)
+
+    def _broadcast(self, v):
+        """ Per-component values, broadcasted (without copy) to the shape of the array """
+        return np.broadcast_to(v.reshape((-1,)+(1,)*(self.ndim-1)), self.shape)
+
+    def __getitem__(self, key):
+        """ Decoded values of a slice, e.g. u[0,:,iy,iz] """
+        P = self.packed[key]
+        off = self._broadcast(self.offset)[key]
+        scl = self._broadcast(self.scale)[key]
+        return ((P - off) / scl).astype(self.dtype, copy=False)
+
+    def __setitem__(self, key, value):
+        raise Exception('A packed array is read-only, decode it first with `np.asarray`')
+
+    def __array__(self, dtype=None, copy=None):
+        """ Decode all values (memory expensive), by component """
+        data = np.empty(self.shape, dtype=self.dtype if dtype is None else dtype)
+        for k in range(self.shape[0]):
+            data[k] = self[k]
+        return data
+
+    def __repr__(self):
+        return '<{} {} packed as {} ({:.1f} MB)>'.format(type(self).__name__, 'x'.join([str(n) for n in self.shape]), self.packed.dtype, self.nbytes/1e6)
+
+    # --- Reductions on the packed values (the decoding is linear)
+    def _reduce(self, func, axis):
+        """ Apply func(P, axis) on the packed values of each component, by chunks of a non-reduced axis """
+        if axis is None or axis==0 or self.ndim<2:
+            return func(np.asarray(self, dtype=np.float64), axis)
+        axis = axis % self.ndim
+        keep = [a for a in range(1, self.ndim) if a!=axis]
+        out = np.empty(tuple(n for a, n in enumerate(self.shape) if a!=axis), dtype=np.float64)
+        if len(keep)==0:
+            for k in range(self.shape[0]):
+                out[k] = func(self.packed[k].astype(np.float64), axis-1)
+            return out
+        ca = keep[-1] # axis chunked
+        nPerSlice = int(np.prod([n for a, n in enumerate(self.shape) if a not in [0, ca]]))
+        nChunk = max(1, _CHUNK_BYTES//(8*max(nPerSlice, 1)))
+        for k in range(self.shape[0]):
+            for i0 in range(0, self.shape[ca], nChunk):
+                sl = [slice(None)]*self.ndim
+                sl[0]  = k
+                sl[ca] = slice(i0, i0+nChunk)
+                res = func(self.packed[tuple(sl)].astype(np.float64), axis-1)
+                so = [slice(None)]*out.ndim
+                so[0] = k
+                so[ca if ca<axis else ca-1] = slice(i0, i0+nChunk)
+                out[tuple(so)] = res
+        return out
+
+    def _perComponent(self, v, axis):
+        """ Reshape per-component values for a reduced array """
+        if axis is None or axis==0:
+            return None
+        return v.reshape((-1,)+(1,)*(self.ndim-2))
+
+    def mean(self, axis=None):
+        if axis is None or axis==0:
+            return np.mean(np.asarray(self), axis=axis)
+        m = self._reduce(lambda P, ax: np.mean(P, axis=ax), axis)
+        return (m - self._perComponent(self.offset, axis)) / self._perComponent(self.scale, axis)
+
+    def std(self, axis=None):
+        if axis is None or axis==0:
+            return np.std(np.asarray(self), axis=axis)
+        s = self._reduce(lambda P, ax: np.std(P, axis=ax), axis)
+        return s / np.abs(self._perComponent(self.scale, axis))
@@ -42,6 +42,10 @@ class TurbSimFile(File):
         print(ts['u'].shape)  
         u,v,w = ts.valuesAt(y=10.5, z=90)
 
+        # Large boxes: the field is kept packed as int16 and decoded when sliced
+        ts = TurbSimFile('Turb.bts', compact=True)
+        u,v,w = ts.valuesAt(y=10.5, z=90)
+
 
     """
 
@@ -53,15 +57,24 @@ class TurbSimFile(File):
     def formatName():
         return 'TurbSim binary'
 
+    @staticmethod
+    def sniff(header, filename=None):
+        """ Check the file identifier (7: non periodic, 8: periodic) """
+        if len(header)<2:
+            return False
+        return True if struct.unpack('<h', header[:2])[0] in [7, 8] else None
+
     def __init__(self, filename=None, **kwargs):
         self.filename = None
         if filename:
             self.read(filename, **kwargs)
 
-    def read(self, filename=None, header_only=False, tdecimals=8):
+    def read(self, filename=None, header_only=False, tdecimals=8, compact=False):
         """ read BTS file, with field: 
                      u    (3 x nt x ny x nz)
                      uTwr (3 x nt x nTwr)
+        If `compact` is True, the file is memory-mapped and the fields are kept packed as int16 
+        (4 times less memory than float64). `u` and `uTwr` are then PackedArray, decoded when sliced.
         """
         if filename:
             self.filename = filename
@@ -80,19 +93,26 @@ class TurbSimFile(File):
             scl[0],off[0],scl[1],off[1],scl[2],off[2] = struct.unpack('<6f' , f.read(6*4))
             nChar, = struct.unpack('<l',  f.read(4))
             info = (f.read(nChar)).decode()
-            # Reading turbulence field
-            if not header_only: 
-                u    = np.zeros((3,nt,ny,nz))
-                uTwr = np.zeros((3,nt,nTwr))
-                # For loop on time (acts as buffer reading, and only possible way when nTwr>0)
-                for it in range(nt):
-                    Buffer = np.frombuffer(f.read(2*3*ny*nz), dtype=np.int16).astype(np.float32).reshape([3, ny, nz], order='F')
-                    u[:,it,:,:]=Buffer
-                    Buffer = np.frombuffer(f.read(2*3*nTwr), dtype=np.int16).astype(np.float32).reshape([3, nTwr], order='F')
-                    uTwr[:,it,:]=Buffer
+            offset = f.tell()
+            # Each time step contains the grid (3 x ny x nz) and the tower (3 x nTwr) values, in Fortran order
+            record = np.dtype([('u', '<i2', (nz, ny, 3)), ('twr', '<i2', (nTwr, 3))])
+            # Reading turbulence field, at once
+            if not header_only and not compact:
+                packed = np.frombuffer(f.read(nt*record.itemsize), dtype=record, count=nt)
+        if not header_only:
+            if compact:
+                from pydatview.io.tools.packed_array import PackedArray
+                packed = np.memmap(self.filename, dtype=record, mode='r', offset=offset, shape=(nt,))
+                self['u']    = PackedArray(packed['u'].transpose(3,0,2,1), scale=scl, offset=off)
+                self['uTwr'] = PackedArray(packed['twr'].transpose(2,0,1), scale=scl, offset=off)
+            else:
+                u = np.empty((3,nt,ny,nz))
+                u[:] = packed['u'].transpose(3,0,2,1)
                 u -= off[:, None, None, None]
                 u /= scl[:, None, None, None]
                 self['u']    = u
+                uTwr = np.empty((3,nt,nTwr))
+                uTwr[:] = packed['twr'].transpose(2,0,1)
                 uTwr -= off[:, None, None]
                 uTwr /= scl[:, None, None]
                 self['uTwr'] = uTwr
@@ -201,6 +221,17 @@ class TurbSimFile(File):
     @property
     def nt(self): return len(self.t)
 
+    @property
+    def compact(self):
+        """ True if the fields are stored packed (see read) """
+        return 'u' in self.keys() and not isinstance(self['u'], np.ndarray)
+
+    def uncompact(self):
+        """ Decode the packed fields into float64 arrays (e.g. before modifying them) """
+        if self.compact:
+            self['u']    = np.asarray(self['u'])
+            self['uTwr'] = np.asarray(self['uTwr'])
+
     # --------------------------------------------------------------------------------}
     # --- Extracting relevant "Line" data at one point
     # --------------------------------------------------------------------------------{
@@ -372,8 +403,13 @@ class TurbSimFile(File):
         """
         if y_span=='full':
             # Compute statistics with respect to time first, then average over "y"
-            m = np.mean(np.mean(self['u'][:,:,:,:], axis=1), axis=1)
-            s = np.mean(np.std( self['u'][:,:,:,:], axis=1), axis=1)
+            if self.compact:
+                # Statistics computed on the packed values, by chunks
+                m = np.mean(self['u'].mean(axis=1), axis=1)
+                s = np.mean(self['u'].std (axis=1), axis=1)
+            else:
+                m = np.mean(np.mean(self['u'][:,:,:,:], axis=1), axis=1)
+                s = np.mean(np.std( self['u'][:,:,:,:], axis=1), axis=1)
         elif y_span=='mid':
             iy, iz = self.iMid
             m = np.mean(self['u'][:,:,iy,:], axis=1)
@@ -513,6 +549,7 @@ class TurbSimFile(File):
         TODO needs more thinking
         """
         # mean/std values for each points in the plane (averaged with time)
+        self.uncompact()
         old_plane_mean = np.mean(self['u'][component,:,:,:],axis=0)
         old_plane_std  = np.std( self['u'][component,:,:,:],axis=0)
         if reference=='mid':
@@ -545,6 +582,7 @@ class TurbSimFile(File):
 
     def makePeriodic(self):
         """ Make the box periodic in the streamwise direction by mirroring it """
+        self.uncompact()
         nDim, nt0, ny, nz = self['u'].shape
         u = self['u'].copy()
         del self['u']
@@ -619,77 +657,70 @@ class TurbSimFile(File):
         return s
 
     def toDataFrame(self):
-        dfs={}
+        from pydatview.io.tools.lazy_table import evaluateLazyTables
+        dfs = self.toLazyDataFrame()
+        # Mid csd
+        try:
+            import warnings
+            with warnings.catch_warnings():
+                warnings.filterwarnings('ignore') #, category=DeprecationWarning)
+            for k in ['Mid_csd_longi', 'Mid_csd_lat', 'Mid_csd_vert']:
+                dfs[k].evaluate()
+        except ModuleNotFoundError:
+            print('Module scipy.signal not available')
+            dfs = {k:v for k,v in dfs.items() if not k.startswith('Mid_csd')}
+        except ImportError:
+            print('Likely issue with fftpack')
+            dfs = {k:v for k,v in dfs.items() if not k.startswith('Mid_csd')}
+        return evaluateLazyTables(dfs)
 
+    def toLazyDataFrame(self):
+        """ 
+        Same tables as toDataFrame, but returned as LazyTable: the names of the columns and the 
+        number of rows are known without computation, the tables are computed when first accessed.
+        """
+        from pydatview.io.tools.lazy_table import LazyTable
+        dfs={}
+        nt = len(self['t'])
         ny = len(self['y'])
-        nz = len(self['y'])
+        nz = len(self['z'])
         # Index at mid box
         iy,iz = self.iMid
 
+        def nFreq(n):
+            """ Number of frequencies returned by scipy.signal.csd (default nperseg) """
+            return min(256, n)//2+1
+
         # Mean vertical profile
-        z, m, s = self.vertProfile()
-        ti = s/m*100
+        def vertProfile():
+            z, m, s = self.vertProfile()
+            ti = s/m*100
+            return np.column_stack((z, m[0,:],m[1,:],m[2,:],s[0,:],s[1,:],s[2,:],ti[0,:]))
         cols=['z_[m]','u_[m/s]','v_[m/s]','w_[m/s]','sigma_u_[m/s]','sigma_v_[m/s]','sigma_w_[m/s]','TI_[%]']
-        data = np.column_stack((z, m[0,:],m[1,:],m[2,:],s[0,:],s[1,:],s[2,:],ti[0,:]))
-        dfs['VertProfile'] = pd.DataFrame(data = data ,columns = cols)
-
-        # Mid time series
-        u = self['u'][:,:,iy,iz]
-        cols=['t_[s]','u_[m/s]','v_[m/s]','w_[m/s]']
-        data = np.column_stack((self['t'],u[0,:],u[1,:],u[2,:]))
-        dfs['ZMidLine'] = pd.DataFrame(data = data ,columns = cols)
-
+        dfs['VertProfile'] = LazyTable(vertProfile, cols, nz, name='VertProfile')
 
-        # ZMid YStart time series
-        u = self['u'][:,:,0,iz]
+        # Mid, YStart, YEnd time series
+        def timeSeries(iy):
+            u = self['u'][:,:,iy,iz]
+            return np.column_stack((self['t'],u[0,:],u[1,:],u[2,:]))
         cols=['t_[s]','u_[m/s]','v_[m/s]','w_[m/s]']
-        data = np.column_stack((self['t'],u[0,:],u[1,:],u[2,:]))
-        dfs['ZMidYStartLine'] = pd.DataFrame(data = data ,columns = cols)
+        dfs['ZMidLine']       = LazyTable(lambda: timeSeries(iy), cols, nt, name='ZMidLine')
+        dfs['ZMidYStartLine'] = LazyTable(lambda: timeSeries(0) , cols, nt, name='ZMidYStartLine')
+        dfs['ZMidYEndLine']   = LazyTable(lambda: timeSeries(-1), cols, nt, name='ZMidYEndLine')
 
-        # ZMid YEnd time series
-        u = self['u'][:,:,-1,iz]
-        cols=['t_[s]','u_[m/s]','v_[m/s]','w_[m/s]']
-        data = np.column_stack((self['t'],u[0,:],u[1,:],u[2,:]))
-        dfs['ZMidYEndLine'] = pd.DataFrame(data = data ,columns = cols)
-
-        # Mid crosscorr y
-        y, rho_uu_y, rho_vv_y, rho_ww_y = self.crosscorr_y()
+        # Mid crosscorr y and z
+        def crosscorr(func):
+            return np.column_stack(func())
         cols = ['y_[m]', 'rho_uu_[-]','rho_vv_[-]','rho_ww_[-]']
-        data = np.column_stack((y, rho_uu_y, rho_vv_y, rho_ww_y))
-        dfs['Mid_xcorr_y'] = pd.DataFrame(data = data ,columns = cols)
-
-        # Mid crosscorr z
-        z, rho_uu_z, rho_vv_z, rho_ww_z = self.crosscorr_z()
+        dfs['Mid_xcorr_y'] = LazyTable(lambda: crosscorr(self.crosscorr_y), cols, ny, name='Mid_xcorr_y')
         cols = ['z_[m]', 'rho_uu_[-]','rho_vv_[-]','rho_ww_[-]']
-        data = np.column_stack((z, rho_uu_z, rho_vv_z, rho_ww_z))
-        dfs['Mid_xcorr_z'] = pd.DataFrame(data = data ,columns = cols)
+        dfs['Mid_xcorr_z'] = LazyTable(lambda: crosscorr(self.crosscorr_z), cols, nz, name='Mid_xcorr_z')
 
         # Mid csd
-        try:
-            import warnings
-            with warnings.catch_warnings():
-                warnings.filterwarnings('ignore') #, category=DeprecationWarning)
-            fc, chi_uu, chi_vv, chi_ww = self.csd_longi()
-            cols = ['f_[Hz]','chi_uu_[-]', 'chi_vv_[-]','chi_ww_[-]']
-            data = np.column_stack((fc, chi_uu, chi_vv, chi_ww))
-            dfs['Mid_csd_longi'] = pd.DataFrame(data = data ,columns = cols)
-
-            # Mid csd
-            fc, chi_uu, chi_vv, chi_ww = self.csd_lat()
-            cols = ['f_[Hz]','chi_uu_[-]', 'chi_vv_[-]','chi_ww_[-]']
-            data = np.column_stack((fc, chi_uu, chi_vv, chi_ww))
-            dfs['Mid_csd_lat'] = pd.DataFrame(data = data ,columns = cols)
-
-            # Mid csd
-            fc, chi_uu, chi_vv, chi_ww = self.csd_vert()
-            cols = ['f_[Hz]','chi_uu_[-]', 'chi_vv_[-]','chi_ww_[-]']
-            data = np.column_stack((fc, chi_uu, chi_vv, chi_ww))
-            dfs['Mid_csd_vert'] = pd.DataFrame(data = data ,columns = cols)
-        except ModuleNotFoundError:
-            print('Module scipy.signal not available')
-        except ImportError:
-            print('Likely issue with fftpack')
-
+        cols = ['f_[Hz]','chi_uu_[-]', 'chi_vv_[-]','chi_ww_[-]']
+        dfs['Mid_csd_longi'] = LazyTable(lambda: crosscorr(self.csd_longi), cols, nFreq(nt), name='Mid_csd_longi')
+        dfs['Mid_csd_lat']   = LazyTable(lambda: crosscorr(self.csd_lat)  , cols, nFreq(ny), name='Mid_csd_lat')
+        dfs['Mid_csd_vert']  = LazyTable(lambda: crosscorr(self.csd_vert) , cols, nFreq(nz), name='Mid_csd_vert')
 
         # Hub time series
         #try:
@@ -48,6 +48,7 @@ from pydatview.appdata import loadAppData, saveAppData, configFilePath, defaultA
 PROG_NAME='pyDatView'
 PROG_VERSION='v0.5-local'
 ISTAT = 0 # Index of Status bar where main status info is provided
+FOLLOW_INTERVAL = 1000 # Refresh interval of the follow mode [ms]
 
 #matplotlib.rcParams['text.usetex'] = False
 # matplotlib.rcParams['font.sans-serif'] = 'DejaVu Sans'
@@ -98,11 +99,42 @@ class LoaderMenuPopup(wx.Menu):
         # Populate menu
         item = wx.MenuItem(self, -1, "Date format: dayfirst", kind=wx.ITEM_CHECK)
         self.Append(item)
-        self.Bind(wx.EVT_MENU, lambda ev: self.setCheck(ev, 'dayfirst') )
+        self.Bind(wx.EVT_MENU, lambda ev: self.setCheck(ev, 'dayfirst'), item)
         self.Check(item.GetId(), self.data['dayfirst']) # Checking the menu box
 
+        item = wx.MenuItem(self, -1, "Lazy loading of binary files (memory-mapped)", kind=wx.ITEM_CHECK)
+        self.Append(item)
+        self.Bind(wx.EVT_MENU, lambda ev: self.setCheck(ev, 'lazy'), item)
+        self.Check(item.GetId(), self.data['lazy'])
+
+        item = wx.MenuItem(self, -1, "Cache parsed files on disk", kind=wx.ITEM_CHECK)
+        self.Append(item)
+        self.Bind(wx.EVT_MENU, lambda ev: self.setCheck(ev, 'cache'), item)
+        self.Check(item.GetId(), self.data['cache'])
+
+        item = wx.MenuItem(self, -1, "Read files in parallel", kind=wx.ITEM_CHECK)
+        self.Append(item)
+        self.Bind(wx.EVT_MENU, self.setParallel, item)
+        self.Check(item.GetId(), self.data['nWorkers']>1)
+
+        item = wx.MenuItem(self, -1, "Clear file cache")
+        self.Append(item)
+        self.Bind(wx.EVT_MENU, self.onClearCache, item)
+
     def setCheck(self, event, label):
-        self.data['dayfirst'] = not self.data['dayfirst']
+        self.data[label] = not self.data[label]
+
+    def setParallel(self, event):
+        if self.data['nWorkers']>1:
+            self.data['nWorkers'] = 1
+        else:
+            self.data['nWorkers'] = max((os.cpu_count() or 1)-1, 2)
+
+    def onClearCache(self, event):
+        from pydatview.filecache import FileCache
+        cache = FileCache()
+        cache.clear()
+        cache.flush()
 
 
 # --------------------------------------------------------------------------------}
@@ -210,6 +242,10 @@ class MainFrame(wx.Frame):
         self.cbLivePlot = wx.CheckBox(tb, -1, 'Live Plot') #,(10,10))
         self.cbLivePlot.SetValue(True)
         tb.AddControl( self.cbLivePlot ) 
+        self.cbFollow = wx.CheckBox(tb, -1, 'Follow')
+        self.cbFollow.SetValue(False)
+        self.cbFollow.SetToolTip('Follow mode: the rows written to the files (e.g. by a simulation in progress) are added periodically')
+        tb.AddControl( self.cbFollow ) 
         tb.AddStretchableSpace()
         tb.AddControl( wx.StaticText(tb, -1, 'Format: ' ) )
         self.comboFormats = wx.ComboBox(tb, choices = self.FILE_FORMATS_NAMEXT, style=wx.CB_READONLY)  
@@ -233,6 +269,10 @@ class MainFrame(wx.Frame):
         self.Bind(wx.EVT_COMBOBOX, self.onFormatChange, self.comboFormats )
         tb.Bind(wx.EVT_BUTTON, self.onShowLoaderMenu, self.btLoaderMenu)
         tb.Bind(wx.EVT_CHECKBOX, self.onLivePlotChange, self.cbLivePlot)
+        tb.Bind(wx.EVT_CHECKBOX, self.onFollowChange, self.cbFollow)
+        # Timer for follow mode
+        self.followTimer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.onFollowTimer, self.followTimer)
 
         # --- Status bar
         self.statusbar=self.CreateStatusBar(3, style=0)
@@ -629,6 +669,24 @@ class MainFrame(wx.Frame):
                 #self.infoPanel.Enable(False)
 
 
+    def onFollowChange(self, event=None):
+        if self.cbFollow.IsChecked():
+            self.followTimer.Start(FOLLOW_INTERVAL)
+        else:
+            self.followTimer.Stop()
+
+    def onFollowTimer(self, event=None):
+        """ Follow mode: add the rows written to the files since the last refresh """
+        if self.tabList.len()==0:
+            return
+        IUpdated, IReloaded = self.tabList.follow()
+        if len(IReloaded)>0:
+            self.load_tabs_into_GUI(bReload=True, bAdd=False, bPlot=True)
+        elif len(IUpdated)>0:
+            if hasattr(self,'selPanel'):
+                self.setStatusBar(self.selPanel.tabPanel.lbTab.GetSelections())
+            self.redraw()
+
     def redrawCallback(self):
         if hasattr(self,'plotPanel'):
             if self.cbLivePlot.IsChecked():
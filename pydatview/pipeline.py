@@ -15,22 +15,74 @@ An action has:
 
     - plotDataFunction   (x, y , data=dict()) # applies to x,y arrays only
 
+  - A callback to process a table by chunks of rows (see streaming.py):
+
+    - df_new = chunkFunction(df, data=dict(), state=dict())   # applies to a chunk of rows, state is kept between chunks
+
   - guiEditorClass: to Edit the data of the action
 
   - code: a python script to manipulate a dataframe "df"
   - imports: import statements needed for the script
 
 """
+import hashlib
+from collections import OrderedDict
 import numpy as np
 from pydatview.common import exception2string, PyDatViewException
 
+
+# --------------------------------------------------------------------------------}
+# --- Hashing of action data
+# --------------------------------------------------------------------------------{
+def _hashUpdate(h, v):
+    """ Feed a canonical representation of v to the hash h (independent of the order of dict keys) """
+    if isinstance(v, dict):
+        h.update(b'{')
+        for k in sorted(v.keys(), key=repr):
+            _hashUpdate(h, k)
+            _hashUpdate(h, v[k])
+        h.update(b'}')
+    elif isinstance(v, (list, tuple)):
+        h.update(b'[' if isinstance(v, list) else b'(')
+        for vv in v:
+            _hashUpdate(h, vv)
+        h.update(b']')
+    elif isinstance(v, np.ndarray):
+        h.update('ndarray{}{}'.format(v.dtype.str, v.shape).encode('utf-8'))
+        if v.dtype.hasobject:
+            _hashUpdate(h, v.tolist())
+        else:
+            h.update(np.ascontiguousarray(v).tobytes())
+    elif isinstance(v, np.generic):
+        _hashUpdate(h, v.item())
+    elif callable(v):
+        h.update('function:{}.{}'.format(getattr(v, '__module__', ''), getattr(v, '__qualname__', repr(v))).encode('utf-8'))
+    else:
+        h.update('{}:{!r};'.format(type(v).__name__, v).encode('utf-8'))
+
+def dataHash(data):
+    """ Stable hash (hexadecimal string) of the data of an action, identical between python sessions """
+    h = hashlib.sha1()
+    _hashUpdate(h, data)
+    return h.hexdigest()
+
+def _readOnly(v):
+    """ Read-only view on an array, the array of the caller is not modified """
+    if isinstance(v, np.ndarray):
+        v = v.view()
+        v.flags.writeable = False
+    return v
+
+
 class Action(): 
     # TODO: store data per table and for all
     def __init__(self, name, 
             tableFunctionApply = None,
             tableFunctionCancel = None,
             tableFunctionAdd   = None,
+            tableFunctionPrepare = None,
             plotDataFunction = None,
+            chunkFunction = None,
             guiCallback=None, 
             guiEditorClass=None,
             data=None,
@@ -51,7 +103,9 @@ class Action():
         self.tableFunctionAdd    = tableFunctionAdd      # applies to a full table, create a new one
         self.tableFunctionApply  = tableFunctionApply    # applies to a full table
         self.tableFunctionCancel = tableFunctionCancel   # cancel action on a full table
+        self.tableFunctionPrepare = tableFunctionPrepare # called once on the table list before tableFunctionApply
         self.plotDataFunction    = plotDataFunction      # applies to x,y arrays only
+        self.chunkFunction       = chunkFunction         # applies to a chunk of rows of a table (streaming)
 
         self.guiCallback = guiCallback       # callback to update GUI after the action, 
                                              # TODO remove me, replace with generic "redraw", "update tab list"
@@ -84,6 +138,10 @@ class Action():
         if tabList is None:
             raise Exception('{}: cannot apply on None tabList'.format(self))
 
+        if self.tableFunctionPrepare is not None:
+            # E.g. processing of all tables concurrently
+            self.tableFunctionPrepare(tabList, data=self.data)
+
         for t in tabList:
             #print('>>> Applying action', self.name, 'to', t.nickname)
             try:
@@ -124,6 +182,11 @@ class Action():
         return dfs_new, names_new, errors
 
 
+    def dataHash(self):
+        """ Stable hash of the name and data of the action. 
+        NOTE: not stored, since the data is modified in place by the GUI editors """
+        return dataHash((self.name, self.data))
+
     def updateGUI(self):
         """ Typically called by a callee after append"""
         if self.guiCallback is not None:
@@ -274,6 +337,8 @@ class AdderAction(Action):
 # --- Pipeline 
 # --------------------------------------------------------------------------------{
 class Pipeline(object): 
+    plotCacheSize  = 64      # Maximum number of (x,y) results of plot filters kept in cache
+    plotCacheBytes = 256e6   # Maximum memory used by the cached results of plot filters
 
     def __init__(self, data=[]):
         self.actionsData = []
@@ -282,6 +347,8 @@ class Pipeline(object):
         self.user_warned   = False # Has the user been warn that errors are present
         self.plotFiltersData=[] # list of data for plot data filters, that plotData.py will use
         self.verbose=False
+        self._plotCache = OrderedDict() # (dataKey, tabID, hash of filters) -> (x, y, nBytes), see applyOnPlotData
+        self._plotCacheBytes = 0
 
     @property
     def actions(self):
@@ -387,13 +454,86 @@ class Pipeline(object):
 
 
 
-    def applyOnPlotData(self, x, y, tabID):
-        x = np.copy(x)
-        y = np.copy(y)
-        for action in self.actionsPlotFilters:
-            x, y = action.applyOnPlotData(x, y, tabID)
+    def applyChunked(self, source, output=None, chunkSize=None, statusFunction=None):
+        """ 
+        Apply the actions of the pipeline to a file (or DataFrame) by chunks of rows, and write the result 
+        to a Parquet file, with a bounded memory usage. See streaming.applyChunked.
+        Raises an exception if one of the actions cannot be applied by chunks.
+        """
+        from pydatview.streaming import applyChunked, CHUNK_SIZE
+        if chunkSize is None:
+            chunkSize = CHUNK_SIZE
+        return applyChunked(self.actions, source, output=output, chunkSize=chunkSize, statusFunction=statusFunction)
+
+    def applyOnPlotData(self, x, y, tabID, dataKey=None):
+        """ Apply the plot filters on x and y. 
+        x and y may be read-only views on the table data: they are only copied if a filter modifies them in place.
+        dataKey: key identifying the input data (e.g. table fingerprint and columns). If provided, the results 
+                 after each filter are cached, keyed by the hash of the chain of filters up to that filter. 
+                 Only the filters after the longest cached chain are then applied (e.g. when the parameters 
+                 of the last filter are changed). The returned arrays are then read-only.
+        """
+        if len(self.actionsPlotFilters)==0:
+            return x, y
+        if dataKey is None:
+            for action in self.actionsPlotFilters:
+                x, y = self._applyPlotFilter(action, x, y, tabID)
+            return x, y
+        keys = self.plotFiltersKeys()
+        # --- Longest chain of filters with cached results
+        i0 = 0
+        for i in range(len(keys), 0, -1):
+            key = (dataKey, tabID, keys[i-1])
+            if key in self._plotCache:
+                self._plotCache.move_to_end(key)
+                x, y, _ = self._plotCache[key]
+                i0 = i
+                break
+        # --- Apply remaining filters
+        for i in range(i0, len(keys)):
+            x, y = self._applyPlotFilter(self.actionsPlotFilters[i], x, y, tabID)
+            x, y = _readOnly(x), _readOnly(y)
+            self._cachePlotData((dataKey, tabID, keys[i]), x, y)
         return x, y
 
+    def _applyPlotFilter(self, action, x, y, tabID):
+        try:
+            return action.applyOnPlotData(x, y, tabID)
+        except ValueError as e:
+            if 'read-only' not in str(e):
+                raise
+        return action.applyOnPlotData(np.copy(x), np.copy(y), tabID)
+
+    def _cachePlotData(self, key, x, y):
+        nBytes = getattr(x, 'nbytes', 0) + getattr(y, 'nbytes', 0)
+        if nBytes>self.plotCacheBytes:
+            return
+        if key in self._plotCache:
+            self._plotCacheBytes -= self._plotCache.pop(key)[2]
+        self._plotCache[key] = (x, y, nBytes)
+        self._plotCacheBytes += nBytes
+        while len(self._plotCache)>self.plotCacheSize or self._plotCacheBytes>self.plotCacheBytes:
+            _, (_, _, n) = self._plotCache.popitem(last=False)
+            self._plotCacheBytes -= n
+
+    def clearPlotCache(self):
+        self._plotCache = OrderedDict()
+        self._plotCacheBytes = 0
+
+    def plotFiltersKeys(self):
+        """ Hashes of the chains of plot filters: key i identifies the filters 0..i and their data """
+        keys = []
+        h = hashlib.sha1()
+        for ac in self.actionsPlotFilters:
+            h.update(ac.dataHash().encode('utf-8'))
+            keys.append(h.hexdigest())
+        return keys
+
+    def plotFiltersKey(self):
+        """ Key identifying the plot filters and their data, used to key cached statistics """
+        keys = self.plotFiltersKeys()
+        return keys[-1] if len(keys)>0 else None
+
     def collectErrors(self):
         self.errorList=[]
         for action in self.actions:
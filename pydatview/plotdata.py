@@ -18,6 +18,80 @@ def PDL_xlabel(PDL):
     #PD[axes[-1].iPD[0]].sx, **font_options)
     return PDL[-1].sx
 
+# --------------------------------------------------------------------------------}
+# --- Statistics cache
+# --------------------------------------------------------------------------------{
+class StatsCache(object):
+    """ 
+    Memo of the statistics of plot data, shared by all PlotData, with "least recently used" eviction.
+    Keys identify the data: table, version, columns, mask, plot filters and transformations (see PlotData._statsKey).
+    Values are dictionaries {statName: value}.
+    """
+    def __init__(self, maxEntries=2000):
+        from collections import OrderedDict
+        self.maxEntries = maxEntries
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """ Return the dictionary of statistics for this key (created if needed) """
+        stats = self._entries.get(key, None)
+        if stats is None:
+            stats = {}
+            self._entries[key] = stats
+            while len(self._entries) > self.maxEntries:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+        return stats
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+statsCache = StatsCache()
+
+
+class SpectrumCache(object):
+    """ 
+    Memo of the raw spectra of plot data (see PlotData._fftKey), shared by all PlotData.
+    Values are tuples (frq, PSD, Info). Least recently used values are evicted when their total size exceeds maxBytes.
+    """
+    def __init__(self, maxBytes=100*2**20):
+        from collections import OrderedDict
+        self.maxBytes = maxBytes
+        self.nBytes   = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """ Return the value for this key, or None """
+        if key is None or key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        return self._entries[key][0]
+
+    def set(self, key, value):
+        if key is None:
+            return
+        nBytes = sum(getattr(v, 'nbytes', 0) for v in value)
+        if key in self._entries:
+            self.nBytes -= self._entries.pop(key)[1]
+        self._entries[key] = (value, nBytes)
+        self.nBytes += nBytes
+        while self.nBytes > self.maxBytes and len(self._entries)>0:
+            _, (_, n) = self._entries.popitem(last=False)
+            self.nBytes -= n
+
+    def clear(self):
+        self._entries.clear()
+        self.nBytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+spectrumCache = SpectrumCache()
+
 # --------------------------------------------------------------------------------}
 # --- PlotData 
 # --------------------------------------------------------------------------------{
@@ -28,6 +102,12 @@ class PlotData():
     For now, relies on some "indices" related to Tables/Columns/ and maybe Selection panel
     Not really elegant. These dependencies should be removed in the future
     """
+    # Wohler exponents computed together by `leq` (those of the info panel)
+    leqExponents = [3, 4, 5, 7, 8, 9, 10, 12]
+    # Statistics that depend on the GUI state or on the labels (not part of the data key), not cached
+    uncachedStats = ['ymeas1', 'ymeas2', 'yMeanMeas', 'yMinMeas', 'yMaxMeas', 'xAtYMinMeas', 'xAtYMaxMeas',
+                     'yName', 'fileName', 'baseDir', 'tabName']
+
     def __init__(PD, x=None, y=None, sx='', sy=''):
         """ Dummy init for now """
         PD.id=-1
@@ -66,6 +146,12 @@ class PlotData():
         PD._n0     = None
         PD.x0 = None
         PD.y0 = None
+        # Multi-resolution aggregates of x and y, provided by the table: {'x': (x, Pyramid), 'y':(y, Pyramid)}
+        PD._pyramids = {}
+        # Equivalent loads for all Wohler exponents, per method: {method: (x, y, {m: Leq})}
+        PD._leqs = {}
+        # Key of the data in the statistics cache, None if the data is not identified (e.g. fromXY)
+        PD._statsKey = None
         # Store xyMeas input values so we don't need to recompute xyMeas in case they didn't change
         PD.xyMeasInput1 = (None, None)
         PD.xyMeasInput2 = (None, None)
@@ -92,7 +178,7 @@ class PlotData():
         PD.y, PD.yIsString, PD.yIsDate,c = tabs[PD.it].getColumn(PD.iy)  # actual y data, with info
         PD.c =c  # raw values, used by PDF
 
-        PD._post_init(pipeline=pipeline)
+        PD._post_init(pipeline=pipeline, tab=tabs[PD.it])
 
     def fromXY(PD, x, y, sx='', sy=''):
         PD.x  = x
@@ -108,13 +194,32 @@ class PlotData():
         PD._post_init()
 
 
-    def _post_init(PD, pipeline=None):
+    def _post_init(PD, pipeline=None, tab=None):
 
         # --- Apply filters from pipeline on the fly
         #if pipeline is not None:
         #    print('[PDat]', pipeline.__reprFilters__())
+        dataKey = None
+        if tab is not None:
+            dataKey = (tab.uid, tab.version, tab.maskString, PD.ix, PD.iy)
         if pipeline is not None:
-            PD.x, PD.y = pipeline.applyOnPlotData(PD.x, PD.y, PD.tabID) # TODO pass the tabID
+            PD.x, PD.y = pipeline.applyOnPlotData(PD.x, PD.y, PD.tabID, dataKey=dataKey) # TODO pass the tabID
+
+        # --- Key of the data for cached statistics
+        PD._statsKey = None
+        if tab is not None:
+            filtersKey = None
+            if pipeline is not None and len(pipeline.actionsPlotFilters)>0:
+                filtersKey = pipeline.plotFiltersKey()
+            PD._statsKey = dataKey + (filtersKey,)
+
+        # --- Multi-resolution aggregates stored by the table, only valid if no filters were applied
+        PD._pyramids = {}
+        if tab is not None and (pipeline is None or len(pipeline.actionsPlotFilters)==0):
+            if not (PD.xIsString or PD.xIsDate):
+                PD._pyramids['x'] = (PD.x, tab.getPyramid(PD.ix, PD.x))
+            if not (PD.yIsString or PD.yIsDate):
+                PD._pyramids['y'] = (PD.y, tab.getPyramid(PD.iy, PD.y))
 
 
         # --- Store stats
@@ -135,8 +240,8 @@ class PlotData():
         PD._x0Max = PD._xMax
         PD._x0AtYMin = PD._xAtYMin
         PD._x0AtYMax = PD._xAtYMax
-        PD._y0Std  = PD.yStd()
-        PD._y0Mean = PD.yMean()
+        PD._y0Std  = PD.cachedStat('yStd')
+        PD._y0Mean = PD.cachedStat('yMean')
         PD._n0     = (n,'{:d}'.format(n))
         PD.x0 =PD.x
         PD.y0 =PD.y
@@ -166,6 +271,7 @@ class PlotData():
         NOTE: inPlace
         """
         from pydatview.tools.stats import pdf_gaussian_kde, pdf_histogram
+        PD._transformed('PDF', nBins, smooth)
 
         n=len(PD.y)
         if PD.yIsString:
@@ -207,6 +313,7 @@ class PlotData():
         """ Convert plot data to MinMax data based on GUI options
         NOTE: inPlace
         """
+        PD._transformed('MinMax', xScale, yScale, yCenter, yRef)
         # --- Scaling and offset for the y axis
         ymi = PD._y0Min[0]
         ymx = PD._y0Max[0]
@@ -274,18 +381,41 @@ class PlotData():
         NOTE: inplace (modifies itself), does not return a new instance
         """
         from pydatview.tools.spectral import fft_wrap
-
+        dt, key = PD._fftPrepare(yType, xType, avgMethod, avgWindow, bDetrend, nExp, nPerDecade)
+        # --- Computing fft - x is freq, y is the one sided PSD (reused if computed before)
+        raw = spectrumCache.get(key)
+        if raw is None:
+            raw = fft_wrap(PD.x, PD.y, dt=dt, output_type=None, averaging=avgMethod, averaging_window=avgWindow,detrend=bDetrend,nExp=nExp, nPerDecade=nPerDecade)
+            spectrumCache.set(key, raw)
+        return PD._fftSet(raw, yType, xType, bDetrend)
+
+    def _fftKey(PD, dt, avgMethod, avgWindow, bDetrend, nExp, nPerDecade):
+        """ Key of the raw spectrum in the spectrum cache, independent of the output type and x type"""
+        if PD._statsKey is None:
+            return None
+        return PD._statsKey + ('FFT', dt, avgMethod.lower(), avgWindow.lower(), bool(bDetrend), nExp, nPerDecade)
+
+    def _fftPrepare(PD, yType, xType, avgMethod, avgWindow, bDetrend, nExp, nPerDecade):
+        """ Checks before computing the FFT, returns the time step for dates and the key of the raw spectrum"""
         # --- TODO, make this independent of GUI
         if PD.yIsString or PD.yIsDate:
             raise Exception('Warn: Cannot plot FFT of dates or strings')
         elif PD.xIsString:
             raise Exception('Warn: Cannot plot FFT if x axis is string')
-
         dt=None
         if PD.xIsDate:
             dt = getDt(PD.x)
-        # --- Computing fft - x is freq, y is Amplitude
-        PD.x, PD.y, Info = fft_wrap(PD.x, PD.y, dt=dt, output_type=yType,averaging=avgMethod, averaging_window=avgWindow,detrend=bDetrend,nExp=nExp, nPerDecade=nPerDecade)
+        key = PD._fftKey(dt, avgMethod, avgWindow, bDetrend, nExp, nPerDecade)
+        PD._transformed('FFT', yType, xType, avgMethod, avgWindow, bDetrend, nExp, nPerDecade)
+        return dt, key
+
+    def _fftSet(PD, raw, yType, xType, bDetrend):
+        """ Scale the raw spectrum, set the FFT results and plot options """
+        from pydatview.tools.spectral import fft_scale
+        frq, PSD, Info = raw
+        frq, Y = fft_scale(frq, PSD, yType, detrend=bDetrend)
+        # NOTE: copies, the raw spectrum is stored in the cache
+        PD.x, PD.y = np.array(frq), np.array(Y)
         # --- Setting plot options
         PD._Info=Info
         PD.xIsDate=False
@@ -326,10 +456,11 @@ class PlotData():
         """ Convert plot data to polar data based on GUI options
         NOTE: inPlace
         """
+        PD._transformed('Polar', Deg, Bins, About, rRef)
         t = PD.x
         r = PD.y
         if Deg:
-            t *= np.pi/180
+            t = t*np.pi/180 # NOTE: not in place, x may be a view on the table data
         if rRef is not None:
             r = r - np.mean(r) + rRef # Mean will be rRef
         if Bins!='None':
@@ -370,12 +501,37 @@ class PlotData():
         have to compute them again
         NOTE: each variable is a tuple (v,s), with a float and its string representation
         """
-        PD._xMin  = PD._xMinCalc() 
-        PD._xMax  = PD._xMaxCalc()
-        PD._yMin  = PD._yMinCalc()
-        PD._yMax  = PD._yMaxCalc()
-        PD._xAtYMin  = PD._xAtYMinCalc(PD._yMin[0])
-        PD._xAtYMax  = PD._xAtYMaxCalc(PD._yMax[0])
+        PD._xMin, PD._xMax, PD._yMin, PD._yMax, PD._xAtYMin, PD._xAtYMax = PD.cachedStat('_range', PD._rangeCalc)
+
+    def _rangeCalc(PD):
+        yMin = PD._yMinCalc()
+        yMax = PD._yMaxCalc()
+        return PD._xMinCalc(), PD._xMaxCalc(), yMin, yMax, PD._xAtYMinCalc(yMin[0]), PD._xAtYMaxCalc(yMax[0])
+
+    def cachedStat(PD, name, func=None):
+        """ Return the statistic `name`, computed with `func()` (default: method `name`),
+        or reused from the statistics cache if it was computed before for the same data. """
+        if func is None:
+            func = getattr(PD, name)
+        if PD._statsKey is None or name in PlotData.uncachedStats:
+            return func()
+        stats = statsCache.get(PD._statsKey)
+        if name not in stats:
+            stats[name] = func()
+        return stats[name]
+
+    def _transformed(PD, *args):
+        """ Update the key of cached statistics after the data was transformed in place """
+        if PD._statsKey is not None:
+            PD._statsKey = PD._statsKey + (repr(args),)
+
+    def _pyramidStats(PD, var='y', i0=0, i1=None):
+        """ Stats of PD.x or PD.y within [i0, i1), using the table pyramid in O(log n).
+        Returns None if no pyramid is available, or if the data was modified (e.g. PDF, FFT)"""
+        v, P = PD._pyramids.get(var, (None, None))
+        if P is None or v is not getattr(PD, var):
+            return None
+        return P.query(v, i0, i1)
 
     # --------------------------------------------------------------------------------}
     # --- Stats functions that should only becalled once, could maybe use @attributes..
@@ -385,6 +541,9 @@ class PlotData():
             return PD.y[0],PD.y[0].strip()
         elif PD.yIsDate:
             return PD.y[0],'{}'.format(PD.y[0])
+        elif PD._pyramidStats('y') is not None:
+            v=PD._pyramidStats('y')['min']
+            s=pretty_num(v)
         else:
             try:
                 v=np.nanmin(PD.y)
@@ -398,6 +557,9 @@ class PlotData():
             return PD.y[-1],PD.y[-1].strip()
         elif PD.yIsDate:
             return PD.y[-1],'{}'.format(PD.y[-1])
+        elif PD._pyramidStats('y') is not None:
+            v=PD._pyramidStats('y')['max']
+            s=pretty_num(v)
         else:
             try:
                 v=np.nanmax(PD.y)
@@ -412,10 +574,14 @@ class PlotData():
         elif PD.xIsDate:
             return PD.x[0],'{}'.format(PD.x[0])
         else:
-            try:
-                v = PD.x[np.where(PD.y == yMin)[0][0]]   # Might fail if all nan
-            except:
-                v = PD.x[0]
+            stats = PD._pyramidStats('y')
+            if stats is not None and stats['iMin']>=0 and stats['min']==yMin:
+                v = PD.x[stats['iMin']]
+            else:
+                try:
+                    v = PD.x[np.where(PD.y == yMin)[0][0]]   # Might fail if all nan
+                except:
+                    v = PD.x[0]
             s=pretty_num(v)
         return (v,s)
 
@@ -425,10 +591,14 @@ class PlotData():
         elif PD.xIsDate:
             return PD.x[-1],'{}'.format(PD.x[-1])
         else:
-            try:
-                v = PD.x[np.where(PD.y == yMax)[0][0]] # Might fail if all nan
-            except:
-                v = PD.x[0]
+            stats = PD._pyramidStats('y')
+            if stats is not None and stats['iMax']>=0 and stats['max']==yMax:
+                v = PD.x[stats['iMax']]
+            else:
+                try:
+                    v = PD.x[np.where(PD.y == yMax)[0][0]] # Might fail if all nan
+                except:
+                    v = PD.x[0]
             s=pretty_num(v)
         return (v,s)
 
@@ -437,6 +607,9 @@ class PlotData():
             return PD.x[0],PD.x[0].strip()
         elif PD.xIsDate:
             return PD.x[0],'{}'.format(PD.x[0])
+        elif PD._pyramidStats('x') is not None:
+            v=PD._pyramidStats('x')['min']
+            s=pretty_num(v)
         else:
             try:
                 v=np.nanmin(PD.x)
@@ -450,6 +623,9 @@ class PlotData():
             return PD.x[-1],PD.x[-1].strip()
         elif PD.xIsDate:
             return PD.x[-1],'{}'.format(PD.x[-1])
+        elif PD._pyramidStats('x') is not None:
+            v=PD._pyramidStats('x')['max']
+            s=pretty_num(v)
         else:
             try:
                 v=np.nanmax(PD.x)
@@ -497,6 +673,9 @@ class PlotData():
     def yMean(PD):
         if PD.yIsString or  PD.yIsDate:
             return None,'NA'
+        elif PD._pyramidStats('y') is not None:
+            v=PD._pyramidStats('y')['mean']
+            s=pretty_num(v)
         else:
             try:
                 v=np.nanmean(PD.y)
@@ -519,6 +698,9 @@ class PlotData():
     def yStd(PD):
         if PD.yIsString or  PD.yIsDate:
             return None,'NA'
+        elif PD._pyramidStats('y') is not None:
+            v=PD._pyramidStats('y')['std']
+            s=pretty_num(v)
         else:
             try:
                 v=np.nanstd(PD.y)
@@ -728,6 +910,10 @@ class PlotData():
         except (IndexError, TypeError):
             return np.nan, 'NA'
 
+        stats = PD._pyramidStats('y', left_index, right_index)
+        if stats is not None and mode in ['mean','min','max'] and stats['n']>0:
+            v = stats[mode]
+            return v, pretty_num(v)
         try:
             yValues = PD.y[left_index:right_index]
             if mode == 'mean':
@@ -811,10 +997,19 @@ class PlotData():
                 except ModuleNotFoundError:
                     print('[INFO] module fatpack not installed, default to windap method for equivalent load')
                     method='rainflow_windap'
-            try:
-                v = equivalent_load(PD.x, PD.y, m=m, Teq=1, bins=100, method=method)
-            except:
-                v = np.nan
+            # The rain flow counting is done once for all the exponents of the info panel
+            x, y, leqs = PD._leqs.get(method, (None, None, {}))
+            if x is not PD.x or y is not PD.y:
+                leqs = {}
+            if m not in leqs:
+                ms = sorted(set(PlotData.leqExponents+[m]))
+                try:
+                    v = equivalent_load(PD.x, PD.y, m=ms, Teq=1, bins=100, method=method)
+                except:
+                    v = [np.nan]*len(ms)
+                leqs.update(zip(ms, v))
+                PD._leqs[method] = (PD.x, PD.y, leqs)
+            v = leqs[m]
             return v,pretty_num(v)
 
     def Info(PD,var):
@@ -837,6 +1032,48 @@ class PlotData():
 # --------------------------------------------------------------------------------}
 # ---  
 # --------------------------------------------------------------------------------{
+def toFFTBatch(PDs, yType='Amplitude', xType='1/x', avgMethod='Welch', avgWindow='Hamming', bDetrend=True, nExp=8, nPerDecade=10):
+    """ 
+    Same as PlotData.toFFT for a list of PlotData. 
+    PlotData sharing the same x values (typically channels of a same table) are stacked, 
+    and their spectra are computed together (see spectral.fft_wrap_batch).
+    NOTE: inplace, returns the list of Info (one per PlotData)
+    """
+    from pydatview.tools.spectral import fft_wrap_batch
+    # --- Reuse raw spectra computed before, group the other plot data with same x
+    raws   = [None]*len(PDs)
+    keys   = [None]*len(PDs)
+    groups = {}
+    dts    = {}
+    for i, PD in enumerate(PDs):
+        dt, keys[i] = PD._fftPrepare(yType, xType, avgMethod, avgWindow, bDetrend, nExp, nPerDecade)
+        raws[i] = spectrumCache.get(keys[i])
+        if raws[i] is not None:
+            continue
+        x = PD.x
+        key = (len(x), x.dtype.str, dt) + ((x[0], x[-1]) if len(x)>0 else ())
+        if key in groups and not _sameX(PDs[groups[key][0]].x, x):
+            key = key + (i,)
+        groups.setdefault(key, []).append(i)
+        dts[key] = dt
+    # --- Compute spectra per group
+    for key, I in groups.items():
+        PD0 = PDs[I[0]]
+        Y = np.vstack([PDs[i].y for i in I]) if len(I)>1 else PD0.y[np.newaxis,:]
+        frqs, PSDs, Infos = fft_wrap_batch(PD0.x, Y, dt=dts[key], output_type=None, averaging=avgMethod, averaging_window=avgWindow, detrend=bDetrend, nExp=nExp, nPerDecade=nPerDecade)
+        for j, i in enumerate(I):
+            raws[i] = (frqs[j], np.array(PSDs[j]), Infos[j]) # NOTE: copy, to free the rows independently
+            spectrumCache.set(keys[i], raws[i])
+    return [PD._fftSet(raw, yType, xType, bDetrend) for PD, raw in zip(PDs, raws)]
+
+def _sameX(x1, x2):
+    if x1 is x2:
+        return True
+    try:
+        return np.array_equal(x1, x2, equal_nan=True)
+    except TypeError:
+        return np.array_equal(x1, x2)
+
 def compareMultiplePD(PD, mode, sComp):
     """ 
     PD: list of PlotData
@@ -2,7 +2,7 @@ import numpy as np
 import pandas as pd
 from pydatview.plugins.base_plugin import ActionEditor, TOOL_BORDER
 from pydatview.common import CHAR, Error, Info, pretty_num_short
-from pydatview.common import DummyMainFrame
+from pydatview.common import DummyMainFrame, PyDatViewException
 from pydatview.pipeline import ReversibleTableAction
 _HELP="""Mask
 
@@ -67,6 +67,8 @@ def maskAction(label='mask', mainframe=None, data=None):
             tableFunctionAdd   = addTabMask,
             tableFunctionApply = applyMask,
             tableFunctionCancel = removeMask,
+            tableFunctionPrepare = prepareMasks,
+            chunkFunction = maskChunk,
             guiEditorClass = MaskToolPanel,
             guiCallback = guiCallback,
             data = data,
@@ -85,10 +87,33 @@ _code="""df = df[eval(maskData['formattedMaskString'])]"""
 
 def applyMask(tab, data):
     #    dfs, names, errors = tabList.applyCommonMaskString(maskString, bAdd=False)
-    formattedMaskString = formatMaskString(tab.data, data['maskString'])
+    formattedMaskString = formatTabMaskString(tab, data['maskString'])
     dfs, name = tab.applyMaskString(formattedMaskString, bAdd=False) # Might raise an Exception
     data['formattedMaskString'] = formattedMaskString # We only store the "succesful" masks
 
+def prepareMasks(tabList, data):
+    """ Evaluate the masks of all tables concurrently, they are then applied by applyMask """
+    if not hasattr(tabList, 'evalMasks'):
+        return
+    maskStrings = []
+    for tab in tabList:
+        try:
+            maskStrings.append(formatTabMaskString(tab, data['maskString']))
+        except Exception:
+            maskStrings.append('') # The error will be reported by applyMask
+    tabList.evalMasks(maskStrings)
+
+def maskChunk(df, data, state):
+    """ Apply the mask on a chunk of rows of a table """
+    from pydatview.formulae import compileMask
+    if 'mask' not in state:
+        sMask = data['maskString'] if len(data.get('maskString','').strip())>0 else data['formattedMaskString']
+        state['mask'] = compileMask(sMask, df.columns)
+        if not state['mask'].rowwise:
+            raise PyDatViewException('The mask "{}" uses values of several rows, it cannot be applied by chunks'.format(sMask))
+    mask = state['mask'].evaluate(lambda i: df.iloc[:, i], len(df), getData=lambda: df)
+    return df[mask].copy()
+
 def removeMask(tab, data):
     tab.clearMask()
     #    tabList.clearCommonMask()
@@ -104,14 +129,24 @@ def addTabMask(tab, opts):
 
 def formatMaskString(df, sMask):
     """ """
+    # NOTE: using iloc to avoid duplicates column issue
+    isDate = [isinstance(df.iloc[0,i], pd._libs.tslibs.timestamps.Timestamp) for i in range(len(df.columns))]
+    return _formatMaskString(df.columns, isDate, sMask)
+
+def formatTabMaskString(tab, sMask):
+    """ Mask string formatted for a table. The columns of lazy tables (numerical) are not read """
+    if tab.lazy:
+        return _formatMaskString(tab.columns, [False]*len(tab.columns), sMask)
+    return formatMaskString(tab.data, sMask)
+
+def _formatMaskString(columns, isDate, sMask):
     from pydatview.common import no_unit
     # TODO Loop on {VAR} instead..
-    for i, c_in_df in enumerate(df.columns):
+    for c_in_df, bDate in zip(columns, isDate):
         c_no_unit = no_unit(c_in_df).strip()
         # TODO sort out the mess with asarray (introduced to have and/or
         # as array won't work with date comparison
-        # NOTE: using iloc to avoid duplicates column issue
-        if isinstance(df.iloc[0,i], pd._libs.tslibs.timestamps.Timestamp):
+        if bDate:
             sMask=sMask.replace('{'+c_no_unit+'}','df[\''+c_in_df+'\']')
         else:
             sMask=sMask.replace('{'+c_no_unit+'}','np.asarray(df[\''+c_in_df+'\'])')
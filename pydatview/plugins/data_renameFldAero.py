@@ -1,6 +1,7 @@
 import unittest
 import numpy as np
 from pydatview.pipeline import ReversibleTableAction
+from pydatview.streaming import columnsChunkFunction
 
 # --------------------------------------------------------------------------------}
 # --- Action
@@ -27,6 +28,7 @@ def renameFldAeroAction(label, mainframe=None):
             name=label, 
             tableFunctionApply = renameFldAero,
             tableFunctionCancel= renameAeroFld,
+            chunkFunction      = columnsChunkFunction(renameFldAero),
             guiCallback=guiCallback,
             mainframe=mainframe, # shouldnt be needed
             data = data,
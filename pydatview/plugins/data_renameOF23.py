@@ -1,6 +1,7 @@
 import unittest
 import numpy as np
 from pydatview.pipeline import ReversibleTableAction
+from pydatview.streaming import columnsChunkFunction
 
 # --------------------------------------------------------------------------------}
 # --- Action
@@ -27,6 +28,7 @@ def renameOFChannelsAction(label, mainframe=None):
             name=label, 
             tableFunctionApply = renameToNew,
             tableFunctionCancel= renameToOld,
+            chunkFunction      = columnsChunkFunction(renameToNew),
             guiCallback=guiCallback,
             mainframe=mainframe, # shouldnt be needed
             data = data,
@@ -27,6 +27,7 @@ def standardizeUnitsAction(label='stdUnits', mainframe=None, flavor='SI'):
     action = IrreversibleTableAction(
             name=label, 
             tableFunctionApply=changeUnitsTab, 
+            chunkFunction=changeUnitsChunk,
             guiCallback=guiCallback,
             mainframe=mainframe, # shouldnt be needed
             data = data ,
@@ -48,6 +49,11 @@ def changeUnitsTab(tab, data):
     from pydatview.tools.pandalib import changeUnits
     changeUnits(tab.data, flavor=data['flavor'])
 
+def changeUnitsChunk(df, data, state):
+    from pydatview.tools.pandalib import changeUnits
+    changeUnits(df, flavor=data['flavor'])
+    return df
+
 
 if __name__ == '__main__':
     pass
@@ -1,6 +1,6 @@
 import numpy as np
 from pydatview.plugins.base_plugin import PlotDataActionEditor, TOOL_BORDER
-from pydatview.common import Error, Info
+from pydatview.common import Error, Info, PyDatViewException
 from pydatview.pipeline import PlotDataAction
 import platform
 
@@ -61,6 +61,7 @@ def filterAction(label='filter', mainframe=None, data=None):
             name             = label,
             tableFunctionAdd = filterTabAdd,
             plotDataFunction = filterXY,
+            chunkFunction    = filterChunk,
             guiEditorClass   = FilterToolPanel,
             guiCallback      = guiCallback,
             data             = data,
@@ -83,6 +84,20 @@ def filterXY(x, y, opts):
     y_new = applyFilter(x, y, opts)
     return x, y_new
 
+def filterChunk(df, opts, state):
+    """ Apply the filter on a chunk of rows of a table, on all columns but x (causal filters only) """
+    from pydatview.tools.signal_analysis import applyFilterChunk
+    if opts['name'] not in ['Moving average', 'Low pass 1st order']:
+        # NOTE: the high pass filter uses the mean of the full signal
+        raise PyDatViewException('The filter "{}" cannot be applied by chunks of rows'.format(opts['name']))
+    if 'xcol' not in state:
+        icol = opts.get('icol', None)
+        state['xcol'] = df.columns[icol] if icol is not None and icol<len(df.columns) else df.columns[1 if df.columns[0]=='Index' else 0]
+        state['ycols'] = [c for c in df.columns if c not in [state['xcol'], 'Index'] and np.issubdtype(df[c].dtype, np.number)]
+    x = df[state['xcol']].values
+    df[state['ycols']] = applyFilterChunk(x, df[state['ycols']].values, opts, state)
+    return df
+
 def filterTabAdd(tab, opts):
     """ Apply action on a a table and return a new one with a new name 
     df_new, name_new = f(t, opts)
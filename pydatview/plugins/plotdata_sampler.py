@@ -1,6 +1,6 @@
 import numpy as np
 from pydatview.plugins.base_plugin import PlotDataActionEditor, TOOL_BORDER
-from pydatview.common import Error, Info
+from pydatview.common import Error, Info, PyDatViewException
 from pydatview.pipeline import PlotDataAction
 _HELP = """Resampling.
 
@@ -60,6 +60,7 @@ def samplerAction(label='sampler', mainframe=None, data=None):
             name             = label,
             tableFunctionAdd = samplerTabAdd,
             plotDataFunction = samplerXY,
+            chunkFunction    = samplerChunk,
             guiEditorClass   = SamplerToolPanel,
             guiCallback      = guiCallback,
             data             = data,
@@ -81,6 +82,17 @@ def samplerXY(x, y, opts):
     x_new, y_new = applySampler(x, y, opts)
     return x_new, y_new
 
+def samplerChunk(df, opts, state):
+    """ Apply the sampler on a chunk of rows of a table (only "Every n") """
+    if opts['name']!='Every n':
+        raise PyDatViewException('The sampler "{}" cannot be applied by chunks of rows'.format(opts['name']))
+    n = int(np.asarray(opts['param']).ravel()[0])
+    if n<1:
+        raise Exception('Error: n should be at least 1')
+    i0 = state.get('i0', 0) # Index of the first row of the chunk
+    state['i0'] = i0 + len(df)
+    return df.iloc[(-i0)%n::n]
+
 def samplerTabAdd(tab, opts):
     """ Apply action on a a table and return a new one with a new name 
     df_new, name_new = f(t, opts)
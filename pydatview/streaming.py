@@ -0,0 +1,194 @@
+"""
+Streaming execution of a pipeline: a table is read and processed by chunks of rows, and the
+results are written to a Parquet file. Files larger than the memory can be processed with
+a memory usage bounded by the size of a chunk.
+
+The actions of the pipeline are fused: each chunk goes through all the actions (in the order of
+`Pipeline.actions`) before the next chunk is read. Only the actions providing a `chunkFunction`
+can be streamed:
+
+    df_new = chunkFunction(df, data, state)
+
+where `state` is a dictionary kept between the chunks of a table (e.g. for causal filters).
+
+Main content:
+ - def readChunks(source, chunkSize)
+ - def applyChunked(actions, source, output, chunkSize)
+ - def columnsChunkFunction(tableFunction)
+"""
+import os
+import numpy as np
+import pandas as pd
+from pydatview.common import PyDatViewException
+
+CHUNK_SIZE = 2**16 # Default number of rows per chunk
+
+
+# --------------------------------------------------------------------------------}
+# --- Readers
+# --------------------------------------------------------------------------------{
+def readChunks(source, chunkSize=CHUNK_SIZE):
+    """
+    Generator of DataFrames of (at most) chunkSize rows.
+    source: DataFrame, or filename. Files read by chunks: OpenFAST outputs (.outb, .out), CSV files,
+            Parquet files. Other files are fully read, and returned by chunks.
+    """
+    if isinstance(source, pd.DataFrame):
+        for i0 in range(0, len(source), chunkSize):
+            yield source.iloc[i0:i0+chunkSize].copy()
+        return
+    filename = source
+    ext = os.path.splitext(filename.lower())[1]
+    if ext=='.outb':
+        from pydatview.io.fast_output_file import FASTOutputFile
+        lazyData = FASTOutputFile(filename, lazy=True).lazyData
+        if lazyData is not None:
+            for i0 in range(0, lazyData.NT, chunkSize):
+                yield pd.DataFrame(data=lazyData.rows(i0, min(i0+chunkSize, lazyData.NT)), columns=lazyData.columns)
+            return
+    elif ext in ['.out', '.elev', '.dbg']:
+        reader = _readASCIIOutput(filename, chunkSize)
+        if reader is not None:
+            for df in reader:
+                yield df
+            return
+    elif ext=='.parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(filename).iter_batches(batch_size=chunkSize):
+            yield batch.to_pandas()
+        return
+    elif ext in ['.csv', '.txt']:
+        for df in _readCSV(filename, chunkSize):
+            yield df
+        return
+    # Other formats: the file is fully read
+    import pydatview.io as weio
+    dfs = weio.read(filename).toDataFrame()
+    if isinstance(dfs, dict):
+        if len(dfs)!=1:
+            raise PyDatViewException('Streaming is not supported for files with several tables: {}'.format(filename))
+        dfs = list(dfs.values())[0]
+    for df in readChunks(dfs, chunkSize):
+        yield df
+
+
+def _readASCIIOutput(filename, chunkSize):
+    """ Reader of an ASCII OpenFAST output, by chunks. None if the header is not recognized """
+    from pydatview.io.follow import _asciiOutHeaderLines
+    nHeader = _asciiOutHeaderLines(filename)
+    if nHeader is None:
+        return None
+    with open(filename, 'r', errors='ignore') as f:
+        lines = [f.readline() for i in range(nHeader)]
+    names = lines[-2].split()
+    units = [u.replace('(','').replace(')','') for u in lines[-1].split()]
+    columns = ['{}_[{}]'.format(n, u) for n, u in zip(names, units)]
+    return pd.read_csv(filename, skiprows=nHeader, header=None, names=columns, delim_whitespace=True,
+            comment='T', chunksize=chunkSize) # NOTE: "This output file was closed..."
+
+
+def _readCSV(filename, chunkSize):
+    """ Reader of a CSV file with a line of column names, by chunks """
+    import csv
+    with open(filename, 'r', errors='ignore') as f:
+        sample = f.read(2**16)
+    try:
+        sep = csv.Sniffer().sniff(sample, delimiters=',;\t ').delimiter
+    except csv.Error:
+        sep = ','
+    if sep==' ':
+        return pd.read_csv(filename, delim_whitespace=True, comment='#', chunksize=chunkSize)
+    return pd.read_csv(filename, sep=sep, comment='#', chunksize=chunkSize, skipinitialspace=True)
+
+
+# --------------------------------------------------------------------------------}
+# --- Execution
+# --------------------------------------------------------------------------------{
+def chunkActions(actions):
+    """ Return the actions that are applied by chunks, raise an exception if an action cannot be streamed """
+    for ac in actions:
+        if ac.chunkFunction is None:
+            raise PyDatViewException('The action "{}" cannot be applied by chunks of rows'.format(ac.name))
+    return actions
+
+
+def applyChunked(actions, source, output=None, chunkSize=CHUNK_SIZE, statusFunction=None):
+    """
+    Apply a list of actions to a table, chunk by chunk.
+    INPUTS:
+      - actions: list of Action, e.g. Pipeline.actions
+      - source: filename or DataFrame, see readChunks
+      - output: Parquet filename. If None, the processed chunks are concatenated and returned.
+      - statusFunction: called with the number of rows read after each chunk
+    OUTPUTS:
+      - number of rows written, or DataFrame if output is None
+    """
+    actions = chunkActions(actions)
+    states  = [{} for ac in actions]
+    writer, schema, dfs, df = None, None, [], None
+    nRead, nOut = 0, 0
+    try:
+        for df in readChunks(source, chunkSize):
+            df = df.reset_index(drop=True)
+            df.columns = df.columns.astype(str)
+            # Index as in Table, i.e. the global row number, not written to file
+            indexAdded = df.columns[0].lower().find('index')<0
+            if indexAdded:
+                df.insert(0, 'Index', np.arange(nRead, nRead+len(df)))
+            nRead += len(df)
+            for ac, state in zip(actions, states):
+                if len(df)==0:
+                    break
+                df = ac.chunkFunction(df, ac.data, state)
+            if indexAdded and 'Index' in df.columns:
+                df = df.drop(columns=['Index'])
+            nOut += len(df)
+            if output is None:
+                dfs.append(df)
+            elif len(df)>0:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                if writer is None:
+                    table  = pa.Table.from_pandas(df, preserve_index=False)
+                    schema = table.schema
+                    writer = pq.ParquetWriter(output, schema)
+                else:
+                    table  = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+                writer.write_table(table)
+            if statusFunction is not None:
+                statusFunction(nRead)
+        if output is not None and writer is None and df is not None:
+            # No rows selected, the file is written with the columns only
+            df.iloc[:0].to_parquet(output, index=False)
+    finally:
+        if writer is not None:
+            writer.close()
+    if output is None:
+        if len(dfs)==0:
+            return pd.DataFrame()
+        return pd.concat(dfs, ignore_index=True)
+    return nOut
+
+
+# --------------------------------------------------------------------------------}
+# --- Helpers for chunk functions
+# --------------------------------------------------------------------------------{
+def columnsChunkFunction(tableFunction):
+    """
+    Return a chunk function for an action that only renames columns, given its table function
+    (e.g. renaming of channels). The table function is applied once, on the first rows.
+    """
+    def chunkFunction(df, data, state):
+        if 'columns' not in state:
+            from pydatview.Tables import Table
+            tab = Table(data=df.iloc[:2].copy())
+            tableFunction(tab, data=data)
+            columns = list(tab.columns)
+            if tab._indexAdded:
+                columns = columns[1:]
+            if len(columns)!=len(df.columns):
+                raise PyDatViewException('The number of columns was changed, the action cannot be applied by chunks')
+            state['columns'] = columns
+        df.columns = state['columns']
+        return df
+    return chunkFunction
@@ -0,0 +1,337 @@
+"""
+Level-of-detail decimation of signals for plotting.
+
+For a signal with a monotonic x vector, the x-range is split into buckets (typically one per
+pixel), and for each bucket the first, last, min and max points are kept ("M4" decimation).
+A line drawn with the decimated points looks identical to the full line at screen resolution,
+since all the vertical extent of each pixel column is preserved.
+
+The Pyramid class stores min/max/mean aggregates of a signal at power-of-two block sizes,
+such that statistics over any index window are obtained in O(log n).
+
+Main content:
+ - def minmax_decimate(x, y, nBuckets, xmin, xmax, log)
+ - class DecimatedLine: matplotlib line recomputed for the visible range on zoom/pan
+ - class Pyramid: multi-resolution aggregates of a signal
+"""
+import numpy as np
+
+
+def _firstPerBucket(I, bucket):
+    """ Return the first index of `I` for each bucket present in bucket[I]"""
+    if len(I)==0:
+        return I
+    _, k = np.unique(bucket[I], return_index=True)
+    return I[k]
+
+
+def minmax_decimate(x, y, nBuckets, xmin=None, xmax=None, log=False):
+    """
+    Min/max (M4) decimation of a signal within the range [xmin, xmax].
+
+    INPUTS:
+     - x: array, monotonically increasing
+     - y: array, same length as x
+     - nBuckets: number of buckets in the range [xmin, xmax] (typically, the number of pixels)
+     - xmin, xmax: visible range. One point outside the range is kept on each side,
+                   so that the line continues to the edges.
+     - log: if True, the buckets are spaced logarithmically (for log x-axes)
+    OUTPUTS:
+     - xd, yd: decimated arrays (views of x and y if no decimation is needed)
+    """
+    n = len(x)
+    if n==0:
+        return x, y
+    if xmin is None:
+        xmin = x[0]
+    if xmax is None:
+        xmax = x[-1]
+    if xmin>xmax:
+        xmin, xmax = xmax, xmin
+    # --- Visible range, extended by one point on each side
+    i0 = max(np.searchsorted(x, xmin, side='left')-1, 0)
+    i1 = min(np.searchsorted(x, xmax, side='right')+1, n)
+    xs, ys = x[i0:i1], y[i0:i1]
+    nBuckets = max(int(nBuckets), 1)
+    if len(xs)<=4*nBuckets:
+        return xs, ys
+    # --- Bucket edges
+    lo = max(xmin, xs[0])
+    hi = min(xmax, xs[-1])
+    if log and lo>0:
+        edges = np.geomspace(lo, hi, nBuckets+1)
+    else:
+        edges = np.linspace(lo, hi, nBuckets+1)
+    IStart = np.searchsorted(xs, edges[:-1], side='left')
+    IStart = np.unique(np.concatenate(([0], IStart))) # removes empty buckets
+    IStart = IStart[IStart<len(xs)]
+    IEnd   = np.append(IStart[1:], len(xs))-1
+    bucket = np.repeat(np.arange(len(IStart)), IEnd-IStart+1)
+    # --- Min and max per bucket (NaN are ignored by fmin/fmax)
+    yMin = np.fmin.reduceat(ys, IStart)
+    yMax = np.fmax.reduceat(ys, IStart)
+    IMin = _firstPerBucket(np.flatnonzero(ys==yMin[bucket]), bucket)
+    IMax = _firstPerBucket(np.flatnonzero(ys==yMax[bucket]), bucket)
+    I = [IStart, IEnd, IMin, IMax]
+    if ys.dtype.kind=='f':
+        # Keep one NaN per bucket, so that gaps in the signal remain visible
+        I.append(_firstPerBucket(np.flatnonzero(np.isnan(ys)), bucket))
+    I = np.unique(np.concatenate(I))
+    return xs[I], ys[I]
+
+
+class DecimatedLine(object):
+    """
+    Matplotlib line displaying a decimated version of (x,y).
+    The decimation is recomputed for the visible range when the limits of the axis change.
+
+    NOTE: matplotlib stores weak references to callbacks, the object needs to be stored by the caller.
+
+    Example:
+        lod = DecimatedLine(None, x, y)
+        line, = ax.plot(*lod.decimate(ax, xlim=(x[0], x[-1])))
+        lod.line = line
+        lod.connect()
+    """
+    nMinBuckets = 2000 # Minimum number of buckets, the axis might not have its final size yet
+
+    def __init__(self, line, x, y, swap=False, nBuckets=None):
+        self.line     = line
+        self.x        = x
+        self.y        = y
+        self.swap     = swap # If true, x is plotted along the vertical axis
+        self._nBuckets = nBuckets
+        self._key     = None
+        self._cid     = None
+
+    @staticmethod
+    def canDecimate(x, y, nMin=4*nMinBuckets):
+        """ Returns True if the signal is numeric, large enough, and has a monotonic x"""
+        try:
+            if len(x)<=nMin or len(x)!=len(y):
+                return False
+            if x.dtype.kind not in 'iuf' or y.dtype.kind not in 'iuf':
+                return False
+            return bool(np.all(x[1:]>=x[:-1]))
+        except:
+            return False
+
+    @property
+    def axes(self):
+        return self.line.axes
+
+    def getNBuckets(self, ax):
+        if self._nBuckets is not None:
+            return self._nBuckets
+        try:
+            nPix = ax.bbox.height if self.swap else ax.bbox.width
+        except:
+            nPix = 0
+        return max(int(nPix), self.nMinBuckets)
+
+    def decimate(self, ax, xlim=None):
+        """ Returns the decimated signal within xlim (default: the axis limits), or (None, None) if unchanged"""
+        if self.swap:
+            xlim = ax.get_ylim() if xlim is None else xlim
+            log  = ax.get_yscale()=='log'
+        else:
+            xlim = ax.get_xlim() if xlim is None else xlim
+            log  = ax.get_xscale()=='log'
+        # NOTE: limits are clipped to the data range, so that margins do not trigger a new decimation
+        xmin = max(min(xlim), self.x[0])
+        xmax = min(max(xlim), self.x[-1])
+        key = (xmin, xmax, self.getNBuckets(ax), log)
+        if key==self._key:
+            return None, None
+        self._key = key
+        return minmax_decimate(self.x, self.y, key[2], key[0], key[1], log=log)
+
+    def connect(self):
+        self._cid = self.axes.callbacks.connect('ylim_changed' if self.swap else 'xlim_changed', self.onLimChange)
+
+    def disconnect(self):
+        if self._cid is not None:
+            self.axes.callbacks.disconnect(self._cid)
+            self._cid = None
+
+    def onLimChange(self, ax=None):
+        self.update()
+
+    def update(self, xlim=None):
+        """ Set the line data to the decimated signal within xlim (default: the axis limits) """
+        ax = self.axes
+        if ax is None:
+            return
+        xd, yd = self.decimate(ax, xlim)
+        if xd is None:
+            return # No change
+        if self.swap:
+            self.line.set_data(yd, xd)
+        else:
+            self.line.set_data(xd, yd)
+
+
+# --------------------------------------------------------------------------------}
+# --- Pyramid 
+# --------------------------------------------------------------------------------{
+class Pyramid(object):
+    """
+    Multi-resolution aggregates of a signal y, at power-of-two block sizes.
+
+    Level k stores, for each block of blockSize*2**k samples: the min, the max and their
+    indices, the sum and sum of squares (relative to a reference value), and the number
+    of non-NaN values. Statistics over any index window [i0, i1) are obtained by combining
+    O(log n) blocks, and at most 2*blockSize raw values at the edges of the window.
+
+    NOTE: the signal is not stored, it needs to be provided to `query`, in order not to keep
+    a reference to large arrays.
+
+    Example:
+        P = Pyramid(y)
+        s = P.query(y, i0, i1)  # dict with keys: min, max, iMin, iMax, mean, std, n
+    """
+    nMin = 2**16 # Below this size, numpy on the full signal is fast enough
+
+    def __init__(self, y, blockSize=64, chunkSize=2**20):
+        y = np.asarray(y)
+        self.n         = len(y)
+        self.blockSize = blockSize
+        self.levels    = []
+        self._full     = None
+        # Reference value, reduces round-off errors on the sum of squares
+        iFinite  = np.flatnonzero(np.isfinite(y[:blockSize*16]))
+        self.ref = float(y[iFinite[0]]) if len(iFinite)>0 else 0.0
+        # --- Level 0, computed by chunks to limit memory usage
+        nb     = self.n//blockSize
+        chunkB = max(chunkSize//blockSize, 1)
+        L0 = self._emptyLevel(nb)
+        for b0 in range(0, nb, chunkB):
+            b1 = min(b0+chunkB, nb)
+            Y  = np.asarray(y[b0*blockSize:b1*blockSize], dtype=float).reshape(b1-b0, blockSize)
+            isnan = np.isnan(Y)
+            r     = np.arange(b1-b0)
+            Yw = np.where(isnan, np.inf, Y)
+            j  = Yw.argmin(axis=1)
+            L0['min'] [b0:b1] = Yw[r,j]
+            L0['iMin'][b0:b1] = j + (r+b0)*blockSize
+            Yw = np.where(isnan, -np.inf, Y)
+            j  = Yw.argmax(axis=1)
+            L0['max'] [b0:b1] = Yw[r,j]
+            L0['iMax'][b0:b1] = j + (r+b0)*blockSize
+            Yw = np.where(isnan, 0, Y-self.ref)
+            L0['sum'] [b0:b1] = Yw.sum(axis=1)
+            L0['sum2'][b0:b1] = (Yw**2).sum(axis=1)
+            L0['n']   [b0:b1] = blockSize - isnan.sum(axis=1)
+        self.levels.append(L0)
+        # --- Higher levels, combining pairs of blocks. An odd last block is left out.
+        L = L0
+        while len(L['n'])>=2:
+            m = len(L['n'])//2
+            a = slice(0, 2*m, 2)
+            b = slice(1, 2*m, 2)
+            Ln = self._emptyLevel(m)
+            bLower = L['min'][b] < L['min'][a] # NOTE: first index kept for ties
+            Ln['min']  = np.where(bLower, L['min'][b] , L['min'][a])
+            Ln['iMin'] = np.where(bLower, L['iMin'][b], L['iMin'][a])
+            bHigher = L['max'][b] > L['max'][a]
+            Ln['max']  = np.where(bHigher, L['max'][b] , L['max'][a])
+            Ln['iMax'] = np.where(bHigher, L['iMax'][b], L['iMax'][a])
+            for k in ['sum','sum2','n']:
+                Ln[k] = L[k][a] + L[k][b]
+            self.levels.append(Ln)
+            L = Ln
+
+    @staticmethod
+    def _emptyLevel(nb):
+        return {'min':np.empty(nb), 'iMin':np.empty(nb, dtype=np.int64),
+                'max':np.empty(nb), 'iMax':np.empty(nb, dtype=np.int64),
+                'sum':np.empty(nb), 'sum2':np.empty(nb), 'n':np.empty(nb, dtype=np.int64)}
+
+    @classmethod
+    def canBuild(cls, y):
+        """ Returns True if the signal is numeric and large enough for a pyramid to be useful"""
+        try:
+            return len(y)>=cls.nMin and y.dtype.kind in 'iuf'
+        except:
+            return False
+
+    @property
+    def nBytes(self):
+        return sum([sum([v.nbytes for v in L.values()]) for L in self.levels])
+
+    def query(self, y, i0=0, i1=None):
+        """ Statistics of y[i0:i1], equivalent to nanmin, nanmax, nanargmin, nanargmax, nanmean, nanstd """
+        if len(y)!=self.n:
+            raise Exception('Pyramid: signal length ({}) differs from pyramid length ({})'.format(len(y), self.n))
+        i1 = self.n if i1 is None else min(i1, self.n)
+        i0 = max(i0, 0)
+        full = i0==0 and i1==self.n
+        if full and self._full is not None:
+            return self._full
+        acc = {'min':np.inf, 'iMin':-1, 'max':-np.inf, 'iMax':-1, 'sum':0.0, 'sum2':0.0, 'n':0}
+        bs = self.blockSize
+        b0 = -(-i0//bs) # ceil
+        b1 = i1//bs
+        if b0>=b1:
+            self._addRaw(acc, y, i0, i1)
+        else:
+            self._addRaw(acc, y, i0, b0*bs)
+            self._addRaw(acc, y, b1*bs, i1)
+            lev = 0
+            while b0<b1:
+                L = self.levels[lev]
+                if b0 & 1:
+                    self._addBlock(acc, L, b0)
+                    b0 += 1
+                if b1 & 1:
+                    b1 -= 1
+                    self._addBlock(acc, L, b1)
+                b0 //= 2
+                b1 //= 2
+                lev += 1
+        n = acc['n']
+        if n==0:
+            stats = {'min':np.nan, 'max':np.nan, 'iMin':-1, 'iMax':-1, 'mean':np.nan, 'std':np.nan, 'n':0}
+        else:
+            mean = acc['sum']/n
+            var  = max(acc['sum2']/n - mean**2, 0)
+            stats = {'min':acc['min'], 'max':acc['max'], 'iMin':int(acc['iMin']), 'iMax':int(acc['iMax']),
+                     'mean':mean+self.ref, 'std':np.sqrt(var), 'n':n}
+        if full:
+            self._full = stats
+        return stats
+
+    def _addRaw(self, acc, y, i0, i1):
+        if i1<=i0:
+            return
+        Y = np.asarray(y[i0:i1], dtype=float)
+        isnan = np.isnan(Y)
+        if np.all(isnan):
+            return
+        j = np.nanargmin(Y)
+        self._addMin(acc, Y[j], i0+j)
+        j = np.nanargmax(Y)
+        self._addMax(acc, Y[j], i0+j)
+        Yw = Y[~isnan]-self.ref
+        acc['sum']  += Yw.sum()
+        acc['sum2'] += (Yw**2).sum()
+        acc['n']    += len(Yw)
+
+    def _addBlock(self, acc, L, j):
+        if L['n'][j]==0:
+            return
+        self._addMin(acc, L['min'][j], L['iMin'][j])
+        self._addMax(acc, L['max'][j], L['iMax'][j])
+        acc['sum']  += L['sum'][j]
+        acc['sum2'] += L['sum2'][j]
+        acc['n']    += L['n'][j]
+
+    @staticmethod
+    def _addMin(acc, v, i):
+        if v<acc['min'] or (v==acc['min'] and (i<acc['iMin'] or acc['iMin']<0)):
+            acc['min'], acc['iMin'] = v, i
+
+    @staticmethod
+    def _addMax(acc, v, i):
+        if v>acc['max'] or (v==acc['max'] and (i<acc['iMax'] or acc['iMax']<0)):
+            acc['max'], acc['iMax'] = v, i
@@ -4,6 +4,7 @@ Tools for fatigue analysis
 
 Main functions:
 - equivalent_load: calculate damage equivalent load for a given signal
+- equivalent_loads: calculate damage equivalent loads for many channels, files and Wohler exponents
 - find_range_count: returns range and number of cycles for a given signal
 
 Subfunctions:
@@ -33,7 +34,7 @@ import warnings
 import numpy as np
 
 
-__all__  = ['equivalent_load', 'find_range_count']
+__all__  = ['equivalent_load', 'equivalent_loads', 'find_range_count']
 __all__  += ['rainflow_astm', 'rainflow_windap','eq_load','eq_load_and_cycles','cycle_matrix','cycle_matrix2']
 
 
@@ -51,7 +52,8 @@ def equivalent_load(time, signal, m=3, Teq=1, bins=100, method='rainflow_windap'
     INPUTS
      - time : array-like, the time values corresponding to the signal (s)
      - signals : array-like, the load signal
-     - m :    Wohler exponent (default is 3)
+     - m :    Wohler exponent (default is 3), or list of Wohler exponents.
+              For a list, the rain flow counting is done only once and an array is returned.
      - Teq : The equivalent period (Default 1, for 1Hz)
      - bins : Number of bins in rainflow count histogram
      - method: rain flow counting algorithm: 'rainflow_windap', 'rainflow_astm' or 'fatpack'
@@ -61,7 +63,7 @@ def equivalent_load(time, signal, m=3, Teq=1, bins=100, method='rainflow_windap'
      - outputMore: if True, returns range, cycles and bins as well
 
     OUTPUTS
-     - Leq : the equivalent load for given m and Teq
+     - Leq : the equivalent load for given m and Teq (array if m is a list)
 
         or (if outputMore is True )
 
@@ -95,18 +97,23 @@ def equivalent_load(time, signal, m=3, Teq=1, bins=100, method='rainflow_windap'
         N, S, bins = find_range_count(signal, bins=bins, method=method, meanBin=meanBin, binStartAt0=binStartAt0)
 
         # --- get DEL 
-        DELi = S**m * N / neq
-        Leq = DELi.sum() ** (1/m)     # See e.g. eq. (30) of [1]
+        if np.ndim(m)==0:
+            DELi = S**m * N / neq
+            Leq = DELi.sum() ** (1/m)     # See e.g. eq. (30) of [1]
+        else:
+            DELi = [S**mi * N / neq for mi in m]
+            Leq = np.array([D.sum() ** (1/mi) for D, mi in zip(DELi, m)])
 
     except ImportError:
         raise
     except:
+        nan = np.nan if np.ndim(m)==0 else np.full(len(m), np.nan)
         if outputMore:
-            return np.nan, np.nan, np.nan, np.nan, np.nan
+            return nan, np.nan, np.nan, np.nan, np.nan
         else:
-            return np.nan
+            return nan
 
-    if debug:
+    if debug and np.ndim(m)==0:
         for i,(b,n,s,DEL) in enumerate(zip(bins, N, S, DELi)):
             if n>0:
                 print('Bin {:3d}: [{:6.1f}-{:6.1f}] Mid:{:6.1f} - Mean:{:6.1f} Counts:{:4.1f} DEL:{:8.1f} Fraction:{:3.0f}%'.format(i,b,bins[i+1],(b+bins[i+1])/2,s,n,DEL,DEL/Leq**m*100))
@@ -115,6 +122,91 @@ def equivalent_load(time, signal, m=3, Teq=1, bins=100, method='rainflow_windap'
     else:
         return Leq
 
+
+def equivalent_loads(df_or_files, columns=None, m=[3, 4, 5, 8, 10, 12], Teq=1, bins=100, method='rainflow_windap',
+        meanBin=True, binStartAt0=False, timeCol=None, nWorkers=1):
+    """Equivalent loads of several channels, for several files and several Wohler exponents
+
+    The rain flow counting is done once per channel, and reused for all Wohler exponents.
+    The channels (or the files) are spread over a pool of `nWorkers` processes.
+
+    INPUTS
+     - df_or_files: a dataframe, a filename, or a list of dataframes and filenames
+     - columns: list of channels to process. Default: all columns except the time column
+     - m :    list of Wohler exponents
+     - timeCol: name of the time column. Default: first column starting with 'time' (case insensitive)
+     - nWorkers: number of processes used. Default: 1, no parallel processing
+     - Teq, bins, method, meanBin, binStartAt0: see `equivalent_load`
+
+    OUTPUTS
+     - dfLeq: a dataframe with columns ['File', 'Channel', 'm', 'Leq'] (one row per file, channel and m)
+         'File' is the filename, or the index of the dataframe in the input list.
+    """
+    import pandas as pd
+    if isinstance(df_or_files, (pd.DataFrame, str)):
+        df_or_files = [df_or_files]
+    m = np.atleast_1d(m)
+    opts = dict(m=m, Teq=Teq, bins=bins, method=method, meanBin=meanBin, binStartAt0=binStartAt0, timeCol=timeCol)
+    # --- Jobs: all the channels of a file, or chunks of channels of a dataframe
+    jobs = []
+    for i, f in enumerate(df_or_files):
+        if isinstance(f, pd.DataFrame):
+            cols = _leqColumns(f, columns, timeCol)
+            nChunks = max(min(nWorkers, len(cols)), 1)
+            for chunk in np.array_split(np.arange(len(cols)), nChunks):
+                if len(chunk)>0 or len(cols)==0:
+                    colsChunk = [cols[j] for j in chunk]
+                    jobs.append((i, f[[_timeColumn(f, timeCol)]+colsChunk], colsChunk))
+        else:
+            jobs.append((f, f, columns))
+    if nWorkers>1 and len(jobs)>1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(nWorkers, len(jobs))) as executor:
+            futures = [executor.submit(_equivalent_loads_job, src, cols, **opts) for _, src, cols in jobs]
+            results = [fut.result() for fut in futures]
+    else:
+        results = [_equivalent_loads_job(src, cols, **opts) for _, src, cols in jobs]
+    # --- Tidy dataframe
+    rows = []
+    for (key, _, _), (cols, Leqs) in zip(jobs, results):
+        for c, Leq in zip(cols, Leqs):
+            rows += [(key, c, mi, Li) for mi, Li in zip(m, Leq)]
+    return pd.DataFrame(rows, columns=['File', 'Channel', 'm', 'Leq'])
+
+
+def _timeColumn(df, timeCol=None):
+    if timeCol is not None:
+        return timeCol
+    for c in df.columns:
+        if str(c).lower().startswith('time'):
+            return c
+    raise Exception('No time column found in dataframe, specify `timeCol`. Columns: {}'.format(list(df.columns)))
+
+def _leqColumns(df, columns, timeCol=None):
+    sT = _timeColumn(df, timeCol)
+    if columns is None:
+        columns = [c for c in df.columns if c!=sT and np.issubdtype(df[c].dtype, np.number)]
+    return list(columns)
+
+def _equivalent_loads_job(df_or_file, columns, m, timeCol=None, **kwargs):
+    """ Equivalent loads for all the channels of one dataframe or file, returns columns and Leq (ncol x nm)"""
+    if isinstance(df_or_file, str):
+        import pydatview.io as weio
+        df_or_file = weio.read(df_or_file).toDataFrame()
+        if isinstance(df_or_file, dict):
+            df_or_file = list(df_or_file.values())[0]
+    df = df_or_file
+    columns = _leqColumns(df, columns, timeCol)
+    time = df[_timeColumn(df, timeCol)].values
+    Leqs = []
+    for c in columns:
+        if c not in df.columns:
+            print('[WARN] equivalent_loads: column `{}` not found, skipped.'.format(c))
+            Leqs.append(np.full(len(m), np.nan))
+            continue
+        Leqs.append(equivalent_load(time, df[c].values, m=m, **kwargs))
+    return columns, Leqs
+
  
 def find_range_count(signal, bins, method='rainflow_windap', meanBin=True, binStartAt0=True):
     """
@@ -543,6 +635,200 @@ def cycle_matrix2(signal, nrb_amp, nrb_mean, rainflow_func=rainflow_windap):
 
     return cycles, ampl_edges, mean_edges
 
+# --------------------------------------------------------------------------------}
+# --- Fast kernels 
+# --------------------------------------------------------------------------------{
+# The counting algorithms below are sequential (stack based), they are written as "kernels"
+# using only indexing and scalar operations, such that:
+#  - they are compiled with numba (on numpy arrays) if numba is installed
+#  - they run as pure python (on lists, which are much faster to index than numpy arrays) otherwise
+# The signals are first reduced to their turning points using numpy, which gives the same
+# results since the intermediate points of monotonic sections and plateaus do not affect the counting.
+try:
+    from numba import njit as _njit
+except ImportError:
+    _njit = None
+_JIT_KERNELS = {}
+
+def _kernel(func):
+    """ Return the compiled version of a kernel if numba is available, None otherwise"""
+    if _njit is None:
+        return None
+    if func not in _JIT_KERNELS:
+        _JIT_KERNELS[func] = _njit(func)
+    return _JIT_KERNELS[func]
+
+
+def turning_points(signal):
+    """ 
+    Return the indices of the turning points (local minima and maxima) of a signal,
+    including the first and last element. For plateaus, the last index of the plateau is returned.
+    Vectorized version of the algorithm used by `find_extremes`.
+    """
+    sign_grad = np.int8(np.sign(np.diff(signal)))
+    if len(sign_grad)==0:
+        return np.array([0])
+    nonzero = sign_grad!=0
+    if not np.any(nonzero):
+        return None # Constant signal
+    # Remove plateaus (sign_grad==0) by propagating the previous non-zero sign
+    # Leading plateaus take the sign of the first non-zero gradient
+    if sign_grad[0]==0:
+        sign_grad[0] = sign_grad[np.argmax(nonzero)]
+        nonzero[0] = True
+    I = np.where(nonzero, np.arange(len(sign_grad)), 0)
+    np.maximum.accumulate(I, out=I)
+    sign_grad = sign_grad[I]
+    extremes, = np.where(np.r_[1, (sign_grad[1:] * sign_grad[:-1] < 0), 1])
+    return extremes
+
+
+def _peak_trough_kernel(x, R, S):
+    """ See peak_trough. S has length len(x)+1, returns n, the number of values in S[1:n+1] """
+    BEGIN = 0
+    MINZO = 1
+    MAXZO = 2
+    ENDZO = 3
+    L = len(x)
+    goto = BEGIN
+    trough = x[0]
+    peak = x[0]
+    i = 0
+    p = 1
+    f = 0
+    while goto != ENDZO:
+        if goto == BEGIN:
+            i += 1
+            if i == L:
+                goto = ENDZO
+            elif x[i] > peak:
+                peak = x[i]
+                if peak - trough >= R:
+                    S[p] = trough
+                    goto = MAXZO
+            elif x[i] < trough:
+                trough = x[i]
+                if peak - trough >= R:
+                    S[p] = peak
+                    goto = MINZO
+        elif goto == MINZO:
+            f = -1
+            i += 1
+            if i == L:
+                goto = ENDZO
+            elif x[i] < trough:
+                trough = x[i]
+            elif x[i] - trough >= R:
+                p += 1
+                S[p] = trough
+                peak = x[i]
+                goto = MAXZO
+        else: # MAXZO
+            f = 1
+            i += 1
+            if i == L:
+                goto = ENDZO
+            elif x[i] > peak:
+                peak = x[i]
+            elif peak - x[i] >= R:
+                p += 1
+                S[p] = peak
+                trough = x[i]
+                goto = MINZO
+    n = p + 1
+    if f == 1:
+        S[n] = peak
+    elif f == -1:
+        S[n] = trough
+    else:
+        S[n] = int((trough + peak) / 2)
+    return n
+
+
+def _pair_range_amplitude_mean_kernel(x, S, ampl, mean):
+    """ See pair_range_amplitude_mean. S has length len(x)+1, returns the number of half cycles"""
+    n = len(x)
+    k = 0
+    S[1] = x[0]
+    ptr = 1
+    p = 1
+    q = 1
+    # phase 1
+    while True:
+        p += 1
+        q += 1
+        # read
+        S[p] = x[ptr]
+        ptr += 1
+        while p >= 4:
+            if (S[p - 2] > S[p - 3] and S[p - 1] >= S[p - 3] and S[p] >= S[p - 2]) or \
+               (S[p - 2] < S[p - 3] and S[p - 1] <= S[p - 3] and S[p] <= S[p - 2]):
+                # Extract two intermediate half cycles
+                a = abs(S[p - 2] - S[p - 1])
+                m = (S[p - 2] + S[p - 1]) / 2
+                ampl[k] = a;  mean[k] = m; k += 1
+                ampl[k] = a;  mean[k] = m; k += 1
+                S[p - 2] = S[p]
+                p -= 2
+            else:
+                break
+        if q == n:
+            break
+    # phase 2
+    for q in range(1, p):
+        ampl[k] = abs(S[q + 1] - S[q])
+        mean[k] = (S[q + 1] + S[q]) / 2
+        k += 1
+    return k
+
+
+def _rainflowcount_kernel(sig, a, ampl, mean):
+    """ See rainflowcount. `a` is a stack of length len(sig), returns the number of half cycles"""
+    k  = 0
+    na = 0
+    for i in range(len(sig)):
+        a[na] = sig[i]
+        na += 1
+        while na > 2 and abs(a[na-3] - a[na-2]) <= abs(a[na-2] - a[na-1]):
+            am = abs(a[na-3] - a[na-2])
+            m  = (a[na-3] + a[na-2]) / 2
+            if na == 3:
+                # Remove first element
+                a[0] = a[1]
+                a[1] = a[2]
+                na = 2
+                if am > 0:
+                    ampl[k] = am; mean[k] = m; k += 1
+            else:
+                # Remove the two elements before the last one
+                a[na-3] = a[na-1]
+                na -= 2
+                if am > 0:
+                    ampl[k] = am; mean[k] = m; k += 1
+                    ampl[k] = am; mean[k] = m; k += 1
+    for i in range(na - 1):
+        am = abs(a[i] - a[i + 1])
+        if am > 0:
+            ampl[k] = am
+            mean[k] = (a[i] + a[i + 1]) / 2
+            k += 1
+    return k
+
+def _run_kernel(func, x, nOut, nWork, dtype=float):
+    """ Run a counting kernel on x, with a work array of length nWork and two output arrays of length nOut"""
+    jitted = _kernel(func)
+    if jitted is not None:
+        W = np.zeros(nWork, dtype=x.dtype)
+        O1, O2 = np.zeros(nOut), np.zeros(nOut)
+        k = jitted(x, W, O1, O2)
+        return O1[:k], O2[:k]
+    else:
+        W = [dtype(0)]*nWork
+        O1, O2 = [0.0]*nOut, [0.0]*nOut
+        k = func(x.tolist(), W, O1, O2)
+        return np.array(O1[:k]), np.array(O2[:k])
+
+
 # --------------------------------------------------------------------------------}
 # --- Rainflowcount_astm.py
 # --------------------------------------------------------------------------------{
@@ -561,32 +847,10 @@ print rainflow(ext)
 '''
 def find_extremes(signal):  #cpdef find_extremes(np.ndarray[double,ndim=1] signal):
     """return indexes of local minima and maxima plus first and last element of signal"""
-
-    #cdef int pi, i
-    # sign of gradient
-    sign_grad = np.int8(np.sign(np.diff(signal)))
-
-    # remove plateaus(sign_grad==0) by sign_grad[plateau_index]=sign_grad[plateau_index-1]
-    plateau_indexes, = np.where(sign_grad == 0)
-    if len(plateau_indexes) > 0 and plateau_indexes[0] == 0:
-        # first element is a plateau
-        if len(plateau_indexes) == len(sign_grad):
-                # All values are equal to crossing level!
-                return np.array([0])
-
-        # set first element = first element which is not a plateau and delete plateau index
-        i = 0
-        while sign_grad[i] == 0:
-            i += 1
-        sign_grad[0] = sign_grad[i]
-
-        plateau_indexes = np.delete(plateau_indexes, 0)
-
-    for pi in plateau_indexes.tolist():
-        sign_grad[pi] = sign_grad[pi - 1]
-
-    extremes, = np.where(np.r_[1, (sign_grad[1:] * sign_grad[:-1] < 0), 1])
-
+    extremes = turning_points(signal)
+    if extremes is None:
+        # All values are equal to crossing level!
+        return np.array([0])
     return signal[extremes]
 
 
@@ -613,41 +877,17 @@ def rainflowcount(sig):  #cpdef rainflowcount(np.ndarray[double,ndim=1] sig):
     Ported to Cython compilable Python by Mads M Pedersen
     In addition peak amplitude is changed to peak to peak amplitude
 
-
+    Returns an array (n x 2) of the amplitudes and means of the half cycles.
+    The counting is done by a kernel compiled with numba when available.
     """
-
-    #cdef int sig_ptr, index
-    #cdef double ampl
-    a = []
-    sig_ptr = 0
-    ampl_mean = []
-    for _ in range(len(sig)):
-        a.append(sig[sig_ptr])
-        sig_ptr += 1
-        while len(a) > 2 and abs(a[-3] - a[-2]) <= abs(a[-2] - a[-1]):
-            ampl = abs(a[-3] - a[-2])
-            mean = (a[-3] + a[-2]) / 2;
-            if len(a) == 3:
-                del a[0]
-                if ampl > 0:
-                    ampl_mean.append((ampl, mean))
-            elif len(a) > 3:
-                del a[-3:-1]
-                if ampl > 0:
-                    ampl_mean.append((ampl, mean))
-                    ampl_mean.append((ampl, mean))
-    for index in range(len(a) - 1):
-        ampl = abs(a[index] - a[index + 1])
-        mean = (a[index] + a[index + 1]) / 2;
-        if ampl > 0:
-            ampl_mean.append((ampl, mean))
-    return ampl_mean
+    sig = np.asarray(sig, dtype=np.double)
+    n = len(sig)
+    ampl, mean = _run_kernel(_rainflowcount_kernel, sig, nOut=2*n+1, nWork=n+1)
+    return np.column_stack((ampl, mean))
 
 # --------------------------------------------------------------------------------}
 # --- Peak_trough.py
 # --------------------------------------------------------------------------------{
-# @cython.locals(BEGIN=cython.int, MINZO=cython.int, MAXZO=cython.int, ENDZO=cython.int, \
-#                R=cython.int, L=cython.int, i=cython.int, p=cython.int, f=cython.int)
 def peak_trough(x, R):  #cpdef np.ndarray[long,ndim=1] peak_trough(np.ndarray[long,ndim=1] x, int R):
     """
     Returns list of local maxima/minima.
@@ -657,91 +897,25 @@ def peak_trough(x, R):  #cpdef np.ndarray[long,ndim=1] peak_trough(np.ndarray[lo
 
     This routine is implemented directly as described in
     "Recommended Practices for Wind Turbine Testing - 3. Fatigue Loads", 2. edition 1990, Appendix A
-    """
-
-    BEGIN = 0
-    MINZO = 1
-    MAXZO = 2
-    ENDZO = 3
-    S = np.zeros(x.shape[0] + 1, dtype=int)
 
-    L = x.shape[0]
-    goto = BEGIN
-
-    while 1:
-        if goto == BEGIN:
-            trough = x[0]
-            peak = x[0]
-
-            i = 0
-            p = 1
-            f = 0
-            while goto == BEGIN:
-                i += 1
-                if i == L:
-                    goto = ENDZO
-                    continue
-                else:
-                    if x[i] > peak:
-                        peak = x[i]
-                        if peak - trough >= R:
-                            S[p] = trough
-                            goto = MAXZO
-                            continue
-                    elif x[i] < trough:
-                        trough = x[i]
-                        if peak - trough >= R:
-                            S[p] = peak
-                            goto = MINZO
-                            continue
-
-        elif goto == MINZO:
-            f = -1
-
-            while goto == MINZO:
-                i += 1
-                if i == L:
-                    goto = ENDZO
-                    continue
-                else:
-                    if x[i] < trough:
-                        trough = x[i]
-                    else:
-                        if x[i] - trough >= R:
-                            p += 1
-                            S[p] = trough
-                            peak = x[i]
-                            goto = MAXZO
-                            continue
-        elif goto == MAXZO:
-            f = 1
-            while goto == MAXZO:
-                i += 1
-                if i == L:
-                    goto = ENDZO
-                    continue
-                else:
-                    if x[i] > peak:
-                        peak = x[i]
-                    else:
-                        if peak - x[i] >= R:
-                            p += 1
-                            S[p] = peak
-                            trough = x[i]
-                            goto = MINZO
-                            continue
-        elif goto == ENDZO:
-
-            n = p + 1
-            if abs(f) == 1:
-                if f == 1:
-                    S[n] = peak
-                else:
-                    S[n] = trough
-            else:
-                S[n] = (trough + peak) / 2
-            S = S[1:n + 1]
-            return S
+    NOTE: for R>0, the signal is first reduced to its turning points (vectorized), which does not 
+          affect the result. The remaining sequential part is compiled with numba when available.
+    """
+    x = np.asarray(x)
+    if R>0:
+        I = turning_points(x)
+        if I is not None:
+            x = x[I]
+    n = x.shape[0]
+    jitted = _kernel(_peak_trough_kernel)
+    if jitted is not None:
+        S = np.zeros(n + 1, dtype=int)
+        n = jitted(x, R, S)
+    else:
+        S = [0]*(n + 1)
+        n = _peak_trough_kernel(x.tolist(), R, S)
+        S = np.array(S, dtype=int)
+    return S[1:n + 1]
 
 
 # --------------------------------------------------------------------------------}
@@ -875,70 +1049,24 @@ def pair_range_from_to(x):  # cpdef pair_range(np.ndarray[long,ndim=1]  x):
             A[S[q], S[q + 1]] += 1
     return A
 
-# @cython.locals(p=cython.int, q=cython.int, f=cython.int, flow=list, k=cython.int, n=cython.int, ptr=cython.int)
 def pair_range_amplitude_mean(x):  # cpdef pair_range(np.ndarray[long,ndim=1]  x):
     """
-    Returns a list of half-cycle-amplitudes
+    Returns an array (n x 2) of half-cycle-amplitudes and means
     x: Peak-Trough sequence (integer list of local minima and maxima)
 
     This routine is implemented according to
     "Recommended Practices for Wind Turbine Testing - 3. Fatigue Loads", 2. edition 1990, Appendix A
     except that a list of half-cycle-amplitudes are returned instead of a from_level-to_level-matrix
-    """
 
-    x = x - np.min(x)
-    k = np.max(x)
+    NOTE: the counting is done by a kernel compiled with numba when available.
+    """
+    x = np.asarray(x)
+    x = (x - np.min(x)).astype(np.double)
     n = x.shape[0]
-    S = np.zeros(n + 1)
-    ampl_mean = []
-    A = np.zeros((k + 1, k + 1))
-    S[1] = x[0]
-    ptr = 1
-    p = 1
-    q = 1
-    f = 0
-    # phase 1
-    while True:
-        p += 1
-        q += 1
-
-                # read
-        S[p] = x[ptr]
-        ptr += 1
-
-        if q == n:
-            f = 1
-        while p >= 4:
-            if (S[p - 2] > S[p - 3] and S[p - 1] >= S[p - 3] and S[p] >= S[p - 2]) \
-                or\
-                    (S[p - 2] < S[p - 3] and S[p - 1] <= S[p - 3] and S[p] <= S[p - 2]):
-                # Extract two intermediate half cycles
-                ampl = abs(S[p - 2] - S[p - 1])
-                mean = (S[p - 2] + S[p - 1]) / 2
-                ampl_mean.append((ampl, mean))
-                ampl_mean.append((ampl, mean))
-
-                S[p - 2] = S[p]
-
-                p -= 2
-            else:
-                break
-
-        if f == 0:
-            pass
-        else:
-            break
-    # phase 2
-    q = 0
-    while True:
-        q += 1
-        if p == q:
-            break
-        else:
-            ampl = abs(S[q + 1] - S[q])
-            mean = (S[q + 1] + S[q]) / 2
-            ampl_mean.append((ampl, mean))
-    return ampl_mean
+    if n<2:
+        raise IndexError('Peak-Trough sequence needs at least two values')
+    ampl, mean = _run_kernel(_pair_range_amplitude_mean_kernel, x, nOut=n+1, nWork=n+1)
+    return np.column_stack((ampl, mean))
 
 
 rainflow_func_dict = {'rainflow_windap':rainflow_windap, 'rainflow_astm':rainflow_astm}
@@ -1024,6 +1152,25 @@ class TestFatigue(unittest.TestCase):
                                                                                        [ 0., 0., 0., 0.],
                                                                                        [ 0., 0., 2., 1.]]))
 
+    def test_rainflow_kernels(self):
+        # Reducing the signal to its turning points does not change the counting
+        np.random.seed(2)
+        x = np.round(np.cumsum(np.random.normal(0, 3, 2000))).astype(int)
+        for R in [1, 4]:
+            S = [0]*(len(x)+1)
+            n = _peak_trough_kernel(x.tolist(), R, S)
+            np.testing.assert_array_equal(peak_trough(x, R), S[1:n+1])
+        # Compiled and python kernels give the same results
+        if _njit is not None:
+            sig = np.random.normal(0, 1, 2000)
+            for func in [_rainflowcount_kernel, _pair_range_amplitude_mean_kernel]:
+                n = len(sig)
+                W, O1, O2 = [0.0]*(n+1), [0.0]*(2*n+1), [0.0]*(2*n+1)
+                k = func(sig.tolist(), W, O1, O2)
+                ampl, mean = _run_kernel(func, sig, nOut=2*n+1, nWork=n+1)
+                np.testing.assert_array_equal(ampl, O1[:k])
+                np.testing.assert_array_equal(mean, O2[:k])
+
     def test_eq_load_basic(self):
         import numpy.testing
         signal1 = np.array([-2.0, 0.0, 1.0, 0.0, -3.0, 0.0, 5.0, 0.0, -1.0, 0.0, 3.0, 0.0, -4.0, 0.0, 4.0, 0.0, -2.0])
@@ -1079,6 +1226,24 @@ class TestFatigue(unittest.TestCase):
 
 
 
+    def test_equivalent_loads(self):
+        # Batch computation over channels, dataframes and Wohler exponents
+        import pandas as pd
+        np.random.seed(3)
+        time = np.linspace(0, 100, 1001)
+        df = pd.DataFrame({'Time_[s]':time, 'A':np.random.normal(0,1,1001), 'B':3*np.sin(time)})
+        ms = [3, 5, 10]
+        Leq = equivalent_load(time, df['A'], m=ms)
+        for m, L in zip(ms, Leq):
+            np.testing.assert_almost_equal(L, equivalent_load(time, df['A'], m=m))
+        dfLeq  = equivalent_loads([df, df[['Time_[s]','B']]], m=ms)
+        np.testing.assert_equal(dfLeq.columns.values, ['File', 'Channel', 'm', 'Leq'])
+        self.assertEqual(len(dfLeq), 9)
+        np.testing.assert_almost_equal(dfLeq['Leq'].values[:3], Leq)
+        np.testing.assert_almost_equal(dfLeq['Leq'].values[3:6], dfLeq['Leq'].values[6:])
+        dfLeq2 = equivalent_loads([df, df[['Time_[s]','B']]], m=ms, nWorkers=2)
+        np.testing.assert_almost_equal(dfLeq2['Leq'].values, dfLeq['Leq'].values)
+
     def test_equivalent_load_sines(self):
         # Check analytical formulae for sine of various frequencies
         # See welib.tools.examples.Example_Fatigue.py
@@ -353,6 +353,44 @@ def applyFilter(x, y, filtDict):
     else:
         raise NotImplementedError('{}'.format(filtDict))
 
+def applyFilterChunk(x, y, filtDict, state):
+    """ 
+    Apply a causal filter on a chunk of a signal, the filter state is stored in the dictionary `state`,
+    such that calling the function on successive chunks gives the same result as `applyFilter` on the 
+    full signal.
+    y: array of shape n or (n x nSignals)
+    """
+    from scipy.signal import lfilter
+    y = np.asarray(y, dtype=float)
+    if filtDict['name']=='Moving average':
+        n = int(np.round(filtDict['param']))
+        if 'tail' not in state:
+            state['tail'] = np.repeat(y[:1], n-1, axis=0) # repeating first values, as moving_average
+        yaug = np.concatenate((state['tail'], y), axis=0)
+        ret  = np.concatenate((np.zeros((1,)+y.shape[1:]), np.cumsum(yaug, axis=0)), axis=0)
+        state['tail'] = yaug[len(yaug)-(n-1):]
+        return (ret[n:] - ret[:-n]) / n
+    elif filtDict['name']=='Low pass 1st order':
+        if 'zi' not in state:
+            if 'x0' in state:
+                # First row of the signal given by the previous chunk
+                dt, y0 = x[0]-state['x0'], state['y0']
+            elif len(x)<2:
+                # Time step not known yet, the first value is unchanged by the filter
+                state['x0'], state['y0'] = x[0], y[:1]
+                return y.copy()
+            else:
+                dt, y0 = x[1]-x[0], y[:1]
+            tau = 1/(2*np.pi*filtDict['param'])
+            state['alpha'] = dt/(tau+dt)
+            state['zi'] = (1-state['alpha'])*y0 # such that y_filt[0]=y[0]
+        alpha = state['alpha']
+        y_filt, state['zi'] = lfilter([alpha], [1, alpha-1], y, axis=0, zi=state['zi'])
+        return y_filt
+    else:
+        # NOTE: the high pass filter uses the mean of the full signal
+        raise NotImplementedError('Filter cannot be applied by chunks: {}'.format(filtDict['name']))
+
 def applyFilterDF(df_old, x_col, options):
     """ apply filter on a dataframe """
     # Brute force loop
@@ -529,7 +567,7 @@ def amplitude(x, t=None, T = None, mask=None, debug=False):
             t = t[mask]
     #
     if T is not None and t is not None:
-        t -= t[0]
+        t = t - t[0]
         if t[-1]<=T:
             return (np.max(x)-np.min(x))/2
         n = int(t[-1]/T)
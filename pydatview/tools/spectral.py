@@ -21,8 +21,8 @@ import numpy as np
 import pandas as pd
 from six import string_types
 
-__all__  = ['fft_wrap','welch', 'psd', 'fft_amplitude']
-__all__ += ['pwelch', 'csd', 'coherence']
+__all__  = ['fft_wrap','fft_wrap_batch','fft_scale','welch', 'psd', 'fft_amplitude']
+__all__ += ['pwelch', 'pwelch_batch', 'csd', 'coherence']
 __all__ += ['fnextpow2']
 __all__ += ['hann','hamming','boxcar','general_hamming','get_window']
 __all__ += ['TestSpectral']
@@ -35,7 +35,7 @@ def fft_wrap(t,y,dt=None, output_type='amplitude',averaging='None',averaging_win
     """ 
     Wrapper to compute FFT amplitude or power spectra, with averaging.
     INPUTS:
-       output_type      : amplitude, PSD, f x PSD
+       output_type      : amplitude, PSD, f x PSD, or None for the one-sided PSD before scaling (see fft_scale)
        averaging : None, Welch, Binning
        averaging_window : Hamming, Hann, Rectangular
     OUTPUTS:
@@ -45,33 +45,83 @@ def fft_wrap(t,y,dt=None, output_type='amplitude',averaging='None',averaging_win
     """
 
     # Formatting inputs
-    output_type      = output_type.lower()
-    averaging        = averaging.lower()
-    averaging_window = averaging_window.lower()
     t = np.asarray(t)
     y = np.asarray(y)
-    n0 = len(y) 
     if len(t)!=len(y):
         raise Exception('t and y should have the same length')
     # Removing times that are NaN
     t_NaN = np.isnan(t)
     t = t[~t_NaN]
     y = y[~t_NaN]
-    nt = len(t) 
     # Removing signal that is NaN
     y = y[~np.isnan(y)]
-    n = len(y) 
+    if dt is None:
+        dt = _signalDt(t)
+    return _fft_core(y, 1/dt, output_type=output_type, averaging=averaging, averaging_window=averaging_window, detrend=detrend, nExp=nExp, nPerDecade=nPerDecade, verbose=verbose)
 
+
+def fft_wrap_batch(t, Y, dt=None, output_type='amplitude',averaging='None',averaging_window='hamming',detrend=False,nExp=None, nPerDecade=None, verbose=False):
+    """ 
+    Same as fft_wrap for multiple signals sharing the same time vector.
+    Signals without NaN are stacked and processed together (the window, the segments and 
+    the FFT are shared), signals with NaN are processed individually, as done by fft_wrap.
+    INPUTS:
+       t: time vector, array of length n
+       Y: signals, 2d array of shape nSignals x n, or list of arrays of length n
+    OUTPUTS:
+       frqs : list of vector of frequencies (one per signal)
+       Ys   : list of Amplitude spectrum, PSD, or f * PSD (one per signal)
+       Infos: list of dictionary of info values (one per signal)
+    """
+    t = np.asarray(t)
+    Y = np.atleast_2d(np.asarray(Y))
+    if len(t)!=Y.shape[1]:
+        raise Exception('t and y should have the same length')
+    # Removing times that are NaN
+    t_NaN = np.isnan(t)
+    if np.any(t_NaN):
+        t = t[~t_NaN]
+        Y = Y[:,~t_NaN]
     if dt is None:
-        dtDelta0 = t[1]-t[0]
-        # Hack to use a constant dt
-        #dt = (np.max(t)-np.min(t))/(n0-1)
-        dt = (t[-1]-t[0])/(nt-1)
-        relDiff = abs(dtDelta0-dt)/dt*100
-        if relDiff>0.01:
-            #if verbose:
-            print('[WARN] dt from tmax-tmin different from dt from t2-t1 {} {}'.format(dt, dtDelta0) )
-    Fs = 1/dt
+        dt = _signalDt(t)
+    nSig = Y.shape[0]
+    frqs  = [None]*nSig
+    Ys    = [None]*nSig
+    Infos = [None]*nSig
+    bNaN = np.isnan(Y).any(axis=1)
+    IBatch = np.where(~bNaN)[0]
+    if len(IBatch)>0:
+        frq, YY, Info = _fft_core(Y[IBatch,:], 1/dt, output_type=output_type, averaging=averaging, averaging_window=averaging_window, detrend=detrend, nExp=nExp, nPerDecade=nPerDecade, verbose=verbose)
+        for j,i in enumerate(IBatch):
+            frqs[i], Ys[i], Infos[i] = frq, YY[j], Info
+    for i in np.where(bNaN)[0]:
+        y = Y[i][~np.isnan(Y[i])]
+        frqs[i], Ys[i], Infos[i] = _fft_core(y, 1/dt, output_type=output_type, averaging=averaging, averaging_window=averaging_window, detrend=detrend, nExp=nExp, nPerDecade=nPerDecade, verbose=verbose)
+    return frqs, Ys, Infos
+
+
+def _signalDt(t):
+    """ Constant time step of a time vector """
+    nt = len(t)
+    dtDelta0 = t[1]-t[0]
+    # Hack to use a constant dt
+    #dt = (np.max(t)-np.min(t))/(n0-1)
+    dt = (t[-1]-t[0])/(nt-1)
+    relDiff = abs(dtDelta0-dt)/dt*100
+    if relDiff>0.01:
+        #if verbose:
+        print('[WARN] dt from tmax-tmin different from dt from t2-t1 {} {}'.format(dt, dtDelta0) )
+    return dt
+
+
+def _fft_core(y, Fs, output_type='amplitude',averaging='None',averaging_window='hamming',detrend=False,nExp=None, nPerDecade=None, verbose=False):
+    """ 
+    Spectrum of one signal (1d array) or of several signals of same length (2d array, one signal per row)
+    See fft_wrap
+    """
+    averaging        = averaging.lower()
+    averaging_window = averaging_window.lower()
+    n = y.shape[-1]
     if averaging =='none':
         frq, PSD, Info = psd(y, fs=Fs, detrend=detrend, return_onesided=True)
     elif averaging =='binning':
@@ -97,12 +147,28 @@ def fft_wrap(t,y,dt=None, output_type='amplitude',averaging='None',averaging_win
            window = boxcar(nPerSeg)
         else:
             raise Exception('Averaging window unknown {}'.format(averaging_window))
-        frq, PSD, Info = pwelch(y, fs=Fs, window=window, detrend=detrend)
+        if y.ndim==2:
+            frq, PSD, Info = pwelch_batch(y, fs=Fs, window=window, detrend=detrend)
+        else:
+            frq, PSD, Info = pwelch(y, fs=Fs, window=window, detrend=detrend)
         Info.nExp = nExp
     else:
         raise Exception('Averaging method unknown {}'.format(averaging))
 
-    # --- Formatting output
+    if output_type is None:
+        return frq, PSD, Info
+    frq, Y = fft_scale(frq, PSD, output_type, detrend=detrend)
+    return frq, Y, Info
+
+
+def fft_scale(frq, PSD, output_type='amplitude', detrend=False):
+    """ 
+    Convert a one-sided PSD, as returned by fft_wrap with output_type=None, to the requested output.
+    INPUTS:
+       output_type : amplitude, PSD, f x PSD
+       detrend     : if True, the first frequency is removed
+    """
+    output_type = output_type.lower()
     if output_type=='amplitude':
         deltaf = frq[1]-frq[0]
         Y = np.sqrt(PSD*2*deltaf)
@@ -115,8 +181,8 @@ def fft_wrap(t,y,dt=None, output_type='amplitude',averaging='None',averaging_win
         raise NotImplementedError('Contact developer')
     if detrend:
         frq= frq[1:]
-        Y  = Y[1:]
-    return frq, Y, Info
+        Y  = Y[...,1:]
+    return frq, Y
 
 
 
@@ -144,31 +210,34 @@ def psd_binned(y, fs=1.0, nPerDecade=10, detrend ='constant', return_onesided=Tr
     if frq[0]==0:
         add0=True
         f0   = 0
-        PSD0 = PSD[0]
+        PSD0 = PSD[...,0]
         frq=frq[1:]
-        PSD=PSD[1:]
+        PSD=PSD[...,1:]
 
     # -- Then bin per decase
     log_f = np.log10(frq)
     ndecades = np.ceil(log_f[-1] -log_f[0])
     xbins = np.linspace(log_f[0], log_f[-1], int(ndecades*nPerDecade))
 
-    # Using Pandas to bin..
-    df = pd.DataFrame(data=np.column_stack((log_f,PSD)), columns=['x','y'])
+    # Using Pandas to bin.. (one column per signal)
+    PSD2d = np.atleast_2d(PSD)
+    df = pd.DataFrame(data=np.column_stack((log_f,PSD2d.T)), columns=['x']+list(range(PSD2d.shape[0])))
     xmid  = (xbins[:-1]+xbins[1:])/2
     df['Bin'] = pd.cut(df['x'], bins=xbins, labels=xmid ) # Adding a column that has bin attribute
     df2  = df.groupby('Bin', observed=False).mean()                     # Average by bin
     df2  = df2.reindex(xmid)
     log_f_bin = df2['x'].values
-    PSD_bin = df2['y'].values
+    PSD_bin = df2.drop(columns='x').values.T
     frq2= 10**log_f_bin
     PSD2= PSD_bin
     if add0:
         frq2=np.concatenate(  ([f0  ], frq2)  )
-        PSD2=np.concatenate(  ([PSD0], PSD2)  )
+        PSD2=np.column_stack( (np.atleast_1d(PSD0), PSD2) )
     b = ~np.isnan(frq2)
     frq2 = frq2[b]
-    PSD2 = PSD2[b]
+    PSD2 = PSD2[:,b]
+    if PSD.ndim==1:
+        PSD2 = PSD2[0]
 
     #import matplotlib.pyplot as plt
     #fig,ax = plt.subplots(1, 1, sharey=False, figsize=(6.4,4.8)) # (6.4,4.8)
@@ -205,30 +274,30 @@ def psd(y, fs=1.0, detrend ='constant', return_onesided=True):
         detrend=False
 
     if detrend=='constant' or detrend==True:
-        m=np.mean(y);
+        m=np.mean(y, axis=-1, keepdims=True);
     else:
         m=0;
 
-    n = len(y) 
+    n = y.shape[-1] # NOTE: y can be 2d, one signal per row
     if n%2==0:
         nhalf = int(n/2+1)
     else:
         nhalf = int((n+1)/2)
 
     frq = np.arange(nhalf)*fs/n;
-    Y   = np.fft.rfft(y-m) #Y = np.fft.fft(y) 
-    PSD = abs(Y[range(nhalf)])**2 /(n*fs) # PSD
-    PSD[1:-1] = PSD[1:-1]*2;
+    Y   = np.fft.rfft(y-m, axis=-1) #Y = np.fft.fft(y) 
+    PSD = abs(Y[...,:nhalf])**2 /(n*fs) # PSD
+    PSD[...,1:-1] = PSD[...,1:-1]*2;
     class InfoClass():
         pass
     Info = InfoClass();
     Info.df    = frq[1]-frq[0]
     Info.fMax  = frq[-1]
     Info.LFreq = len(frq)
-    Info.LSeg  = len(Y)
-    Info.LWin  = len(Y)
+    Info.LSeg  = Y.shape[-1]
+    Info.LWin  = Y.shape[-1]
     Info.LOvlp = 0
-    Info.nFFT  = len(Y)
+    Info.nFFT  = Y.shape[-1]
     Info.nseg  = 1
     return frq, PSD, Info
 
@@ -685,6 +754,57 @@ def pwelch(x, window='hamming', noverlap=None, nfft=None, fs=1.0, nperseg=None,
     return freqs, Pxx.real, Info
 
 
+def pwelch_batch(Y, window, fs=1.0, detrend=False, chunkSize=2**21):
+    """
+    Welch PSD of several signals of same length (one signal per row of Y), same as pwelch with
+    a window array, 50% overlap, and nfft=len(window).
+    The window and the segments are shared between signals, the FFTs of all segments of a chunk
+    of signals are computed at once. Chunks are limited to `chunkSize` values to remain in cache.
+    """
+    Y = np.asarray(Y, dtype=float)
+    win = np.asarray(window, dtype=float)
+    nperseg  = len(win)
+    noverlap = nperseg//2
+    nstep    = nperseg-noverlap
+    nSig, n  = Y.shape
+    nseg     = (n-noverlap)//nstep
+    if nseg<1:
+        raise ValueError('nperseg is larger than the signal length')
+    # Segments are views on the signals: shape nSig x nseg x nperseg
+    segments = np.lib.stride_tricks.sliding_window_view(Y, nperseg, axis=-1)[:, ::nstep, :][:, :nseg, :]
+    scale = 1.0 / (fs * (win*win).sum())
+    freqs = np.fft.rfftfreq(nperseg, 1/fs)
+    PSD   = np.empty((nSig, len(freqs)))
+    nChunk = max(1, chunkSize//max(1,nseg*nperseg))
+    for i0 in range(0, nSig, nChunk):
+        seg = segments[i0:i0+nChunk]
+        if detrend=='constant' or detrend is True:
+            seg = seg - seg.mean(axis=-1, keepdims=True)
+        elif detrend:
+            seg = signaltools_detrend(seg, type=detrend, axis=-1)
+        F = np.fft.rfft(seg*win, axis=-1)
+        P = F.real**2 + F.imag**2
+        PSD[i0:i0+nChunk] = P.mean(axis=1)
+    PSD *= scale
+    if nperseg % 2:
+        PSD[:, 1:] *= 2
+    else:
+        # Last point is unpaired Nyquist freq point, don't double
+        PSD[:, 1:-1] *= 2
+    class InfoClass():
+        pass
+    Info = InfoClass();
+    Info.df=freqs[1]-freqs[0]
+    Info.fMax=freqs[-1]
+    Info.LFreq=len(freqs)
+    Info.LSeg=nperseg
+    Info.LWin=len(win)
+    Info.LOvlp=noverlap
+    Info.nFFT=nperseg
+    Info.nseg=nseg
+    return freqs, PSD, Info
+
+
 def csd(x, y, fs=1.0, window='hann', nperseg=None, noverlap=None, nfft=None,
         detrend='constant', return_onesided=True, scaling='density', axis=-1,
         returnInfo=False
@@ -1440,6 +1560,20 @@ class TestSpectral(unittest.TestCase):
         #ax.set_ylabel('')
         #ax.legend()
         #plt.show()
+
+    def test_fft_batch(self):
+        # Batched spectra should be the same as the individual ones
+        dt=0.1
+        t=np.arange(0,100,dt);
+        Y=np.array([A*np.sin(2*np.pi*f0*t)+ i for i,(A,f0) in enumerate([(1,1),(5,0.5),(2,2)])])
+        Y[2,10]=np.nan
+        for averaging in ['None', 'Welch', 'Binning']:
+            for detrend in [False, True]:
+                frqs, Ys, Infos = fft_wrap_batch(t, Y, output_type='PSD', averaging=averaging, detrend=detrend, nExp=8, nPerDecade=10)
+                for i in range(Y.shape[0]):
+                    f, y, Info = fft_wrap(t, Y[i], output_type='PSD', averaging=averaging, detrend=detrend, nExp=8, nPerDecade=10)
+                    np.testing.assert_allclose(frqs[i], f)
+                    np.testing.assert_allclose(Ys[i], y, rtol=1e-10, atol=1e-12)
     
 if __name__ == '__main__':
     #TestSpectral().test_fft_binning()
@@ -3,8 +3,11 @@ Set of tools for statistics
   - measures (R^2, RMSE)
   - pdf distributions
   - Binning 
+  - Multi-statistics of signals (one pass)
 
 """
+import warnings
+from contextlib import contextmanager
 import numpy as np
 import pandas as pd
 
@@ -399,5 +402,144 @@ def azimuthal_std_DF(df, psiBin=np.arange(0,360+1,10), colPsi='Azimuth_[deg]', t
     return dfPsi
 
 
+# --------------------------------------------------------------------------------}
+# --- Multi-statistics of signals
+# --------------------------------------------------------------------------------{
+_BLOCK_BYTES = 2**21 # Size of the blocks of rows reduced at once (fits in cache)
 
+def _statName(stat):
+    return stat if isinstance(stat, str) else stat.__name__
+
+def multiStats(M, stats=['mean'], time=None, m=[3,4,5,8,10,12]):
+    """ 
+    Statistics of all the columns of a 2D array, computed together.
+    The moments and extrema are obtained in one traversal of M, by blocks of rows. 
+    The percentiles are computed together, in one call. NaN values are ignored.
 
+    INPUTS:
+     - M: array (nt x nc), e.g. values of a dataframe within a time window
+     - stats: list of statistics among:
+         'mean', 'std', 'min', 'max', 'absmax', 'ti' (std/mean), 'pXX' (percentile XX, e.g. 'p90'), 
+         'leq' (equivalent loads for the Wohler exponents `m`, requires `time`), 
+         or functions f(time, M) returning an array of nc values (e.g. user defined damage equivalent loads)
+     - time: array (nt), time vector, needed for 'leq' and passed to the functions
+    OUTPUTS:
+     - list of (name, values) where values is an array of nc values.
+       For 'leq', there is one item per Wohler exponent, named 'Leq(m=XX)'.
+    """
+    M = np.asarray(M)
+    if M.ndim==1:
+        M = M.reshape(-1,1)
+    nt, nc = M.shape
+    sl = [s.lower() if isinstance(s, str) else s for s in stats]
+    for s in sl:
+        if isinstance(s, str) and s not in ['mean', 'std', 'min', 'max', 'absmax', 'ti', 'leq'] and not _isPercentile(s):
+            raise ValueError('Statistic `{}` not implemented, use: mean, std, min, max, absmax, ti, leq, or pXX (percentile)'.format(s))
+
+    # --- One pass for moments and extrema
+    moments = any([s in ['mean', 'std', 'ti'] for s in sl])
+    extrema = any([s in ['min', 'max', 'absmax'] for s in sl])
+    if moments or extrema:
+        n    = np.zeros(nc)
+        S1   = np.zeros(nc)
+        S2   = np.zeros(nc)
+        vMin = np.full(nc, np.inf)
+        vMax = np.full(nc, -np.inf)
+        K    = _shift(M) # Shift, for a numerically stable variance
+        nBlock = max(_BLOCK_BYTES//max(nc*M.itemsize, 1), 1)
+        for i0 in range(0, nt, nBlock):
+            B = M[i0:i0+nBlock]
+            if moments:
+                D  = B - K
+                s1 = D.sum(axis=0)
+                if np.isnan(s1).any():
+                    # NaN values in the block, slow path
+                    n   += (~np.isnan(B)).sum(axis=0)
+                    S1  += np.nansum(D, axis=0)
+                    S2  += np.nansum(D*D, axis=0)
+                else:
+                    n   += len(B)
+                    S1  += s1
+                    S2  += np.einsum('ij,ij->j', D, D)
+            if extrema:
+                with np.errstate(invalid='ignore'):
+                    bMin = B.min(axis=0)
+                    bMax = B.max(axis=0)
+                if np.isnan(bMin).any():
+                    with np.errstate(invalid='ignore'), _ignoreNaNWarnings():
+                        bMin = np.nanmin(B, axis=0)
+                        bMax = np.nanmax(B, axis=0)
+                vMin = np.fmin(vMin, bMin)
+                vMax = np.fmax(vMax, bMax)
+        if extrema:
+            vMin[np.isinf(vMin)] = np.nan
+            vMax[np.isinf(vMax)] = np.nan
+        if moments:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = K + S1/n
+                var  = (S2 - S1*S1/n)/(n-1) # NOTE: ddof=1, as pandas
+                std  = np.sqrt(np.maximum(var, 0))
+            std[n<2] = np.nan
+
+    # --- Percentiles, computed together
+    pct = {}
+    qs = [float(s[1:]) for s in sl if _isPercentile(s)]
+    if len(qs)>0:
+        with _ignoreNaNWarnings():
+            P = np.nanpercentile(M, qs, axis=0) if np.isnan(M).any() else np.percentile(M, qs, axis=0)
+        pct = {q:P[i] for i,q in enumerate(qs)}
+
+    # --- Results, in the order of stats
+    values = []
+    for stat, s in zip(stats, sl):
+        if not isinstance(s, str):
+            values.append((_statName(stat), np.asarray(s(time, M)).ravel()))
+        elif s=='mean':
+            values.append((stat, mean))
+        elif s=='std':
+            values.append((stat, std))
+        elif s=='ti':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                values.append((stat, std/mean))
+        elif s=='min':
+            values.append((stat, vMin))
+        elif s=='max':
+            values.append((stat, vMax))
+        elif s=='absmax':
+            values.append((stat, np.fmax(np.abs(vMin), np.abs(vMax))))
+        elif s=='leq':
+            from pydatview.tools.fatigue import equivalent_load
+            if time is None:
+                raise Exception('The time vector is needed to compute equivalent loads')
+            m = np.atleast_1d(m)
+            Leq = np.full((len(m), nc), np.nan)
+            for j in range(nc):
+                Leq[:,j] = equivalent_load(time, M[:,j], m=m)
+            for mi, Li in zip(m, Leq):
+                values.append(('Leq(m={:g})'.format(mi), Li))
+        else:
+            values.append((stat, pct[float(s[1:])]))
+    return values
+
+def _isPercentile(s):
+    import re
+    return isinstance(s, str) and re.match(r'^p\d+(\.\d*)?$', s) is not None
+
+def _shift(M):
+    """ First non-NaN value of each column (0 if none) """
+    if len(M)==0:
+        return np.zeros(M.shape[1])
+    K = np.array(M[0], dtype=float)
+    bNaN = np.isnan(K)
+    if bNaN.any():
+        with _ignoreNaNWarnings():
+            K[bNaN] = np.nanmedian(M[:, bNaN], axis=0)
+        K[np.isnan(K)] = 0
+    return K
+
+@contextmanager
+def _ignoreNaNWarnings():
+    """ Ignore the warnings of numpy for columns full of NaN """
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        yield
@@ -0,0 +1,58 @@
+"""
+Benchmark of the rainflow counting algorithms used for fatigue equivalent loads.
+Reports the throughput (samples per second) of `equivalent_load` for typical 10-min signals at 50Hz,
+and the time of the batch function `equivalent_loads` for all channels and Wohler exponents at once.
+The counting kernels are compiled with numba if it is installed, and run as pure python otherwise.
+
+Usage:
+    python tests/prof_fatigue.py [nSignals]
+"""
+import sys
+import time
+import numpy as np
+import pydatview.tools.fatigue as fatigue
+from pydatview.tools.fatigue import equivalent_load, equivalent_loads
+
+def signals(nSignals=3, T=600, dt=0.02):
+    np.random.seed(0)
+    t = np.arange(0, T, dt)
+    sigs = []
+    for i in range(nSignals):
+        # Rotor-like harmonics + turbulence + noise
+        y = np.sin(2*np.pi*0.2*t) + 0.5*np.sin(2*np.pi*0.6*t+i) + np.cumsum(np.random.normal(0, 0.01, len(t))) + 0.2*np.random.normal(0, 1, len(t))
+        sigs.append(y)
+    return t, sigs
+
+def benchmark(nSignals=3):
+    print('Kernels: {}'.format('numba' if fatigue._njit is not None else 'python'))
+    t, sigs = signals(nSignals)
+    if fatigue._njit is not None:
+        equivalent_load(t, sigs[0], m=3) # Compilation
+        equivalent_load(t, sigs[0], m=3, method='rainflow_astm')
+    print('{:16s} {:>10s} {:>12s} {:>14s}'.format('method', 'nSamples', 'time [s]', 'samples/s'))
+    for method in ['rainflow_windap', 'rainflow_astm']:
+        t0 = time.time()
+        for y in sigs:
+            equivalent_load(t, y, m=3, method=method)
+        T = time.time()-t0
+        n = len(t)*len(sigs)
+        print('{:16s} {:10d} {:12.4f} {:14.3e}'.format(method, n, T, n/T))
+
+def benchmark_batch(nSignals=3, m=[3, 4, 5, 8, 10, 12], nWorkers=1):
+    import pandas as pd
+    t, sigs = signals(nSignals)
+    df = pd.DataFrame(np.column_stack([t]+sigs), columns=['Time_[s]']+['S{}'.format(i) for i in range(nSignals)])
+    t0 = time.time()
+    for c in df.columns[1:]:
+        for mi in m:
+            equivalent_load(t, df[c].values, m=mi)
+    T1 = time.time()-t0
+    t0 = time.time()
+    equivalent_loads(df, m=m, nWorkers=nWorkers)
+    T2 = time.time()-t0
+    print('{} channels x {} exponents: loop {:.3f}s, batch {:.3f}s (nWorkers={})'.format(nSignals, len(m), T1, T2, nWorkers))
+
+if __name__ == '__main__':
+    nSignals = int(sys.argv[1]) if len(sys.argv)>1 else 3
+    benchmark(nSignals)
+    benchmark_batch(nSignals)
@@ -0,0 +1,42 @@
+"""
+Benchmark of the FFT plot type for many channels of a same table.
+Compares the per-channel loop (`PlotData.toFFT`) with the batched version (`toFFTBatch`),
+where channels sharing the same time vector are stacked and processed together.
+
+Usage:
+    python tests/prof_fft.py [nChannels]
+"""
+import sys
+import time
+import numpy as np
+from pydatview.plotdata import PlotData, toFFTBatch
+
+def plotDatas(nChannels=40, T=600, dt=0.02):
+    np.random.seed(0)
+    t = np.arange(0, T, dt)
+    PDs = []
+    for i in range(nChannels):
+        y = np.sin(2*np.pi*0.2*t+i) + 0.2*np.random.normal(0, 1, len(t))
+        PDs.append(PlotData(t, y, 'Time_[s]', 'Node{}_[N]'.format(i)))
+    return PDs
+
+def benchmark(nChannels=40, nRepeat=3):
+    print('{:10s} {:>10s} {:>10s} {:>10s}'.format('avgMethod', 'loop [s]', 'batch [s]', 'speedup'))
+    for avgMethod in ['Welch', 'None', 'Binning']:
+        opts = dict(yType='PSD', avgMethod=avgMethod, nExp=11)
+        T1, T2 = np.inf, np.inf
+        for i in range(nRepeat):
+            PDs = plotDatas(nChannels)
+            t0 = time.time()
+            for PD in PDs:
+                PD.toFFT(**opts)
+            T1 = min(T1, time.time()-t0)
+            PDs = plotDatas(nChannels)
+            t0 = time.time()
+            toFFTBatch(PDs, **opts)
+            T2 = min(T2, time.time()-t0)
+        print('{:10s} {:10.4f} {:10.4f} {:10.1f}'.format(avgMethod, T1, T2, T1/T2))
+
+if __name__ == '__main__':
+    nChannels = int(sys.argv[1]) if len(sys.argv)>1 else 40
+    benchmark(nChannels)
@@ -0,0 +1,56 @@
+"""
+Benchmark of TableList.load_tables_from_files, serial vs parallel.
+Creates a set of OpenFAST ASCII output files, and reads them with an increasing number of workers.
+
+Usage:
+    python tests/prof_load.py [nFiles] [nRows] [nCols]
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+from pydatview.Tables import TableList
+
+def createFiles(folder, nFiles=40, nRows=20000, nCols=30):
+    filenames = []
+    cols = ['Time'] + ['Chan{}'.format(i) for i in range(nCols-1)]
+    units= ['(s)']  + ['(-)']*(nCols-1)
+    for iFile in range(nFiles):
+        filename = os.path.join(folder, 'sim{:04d}.out'.format(iFile))
+        M = np.random.normal(0, 1, (nRows, nCols))
+        M[:,0] = np.arange(nRows)*0.01
+        with open(filename, 'w') as f:
+            f.write('Generated by prof_load.py\n\n')
+            f.write('\t'.join(cols)+'\n')
+            f.write('\t'.join(units)+'\n')
+            np.savetxt(f, M, fmt='%.5e', delimiter='\t')
+        filenames.append(filename)
+    return filenames
+
+def benchmark(filenames, nWorkersList, pool='process'):
+    print('{:10s} {:>8s} {:>10s} {:>8s}'.format('pool','nWorkers','time [s]','speedup'))
+    tRef = None
+    for nWorkers in nWorkersList:
+        tablist = TableList()
+        t0 = time.time()
+        tabs, warn = tablist.load_tables_from_files(filenames=filenames, nWorkers=nWorkers, pool=pool)
+        t = time.time()-t0
+        assert(len(tabs)==len(filenames))
+        if tRef is None:
+            tRef = t
+        print('{:10s} {:8d} {:10.3f} {:8.2f}'.format(pool, nWorkers, t, tRef/t))
+
+if __name__ == '__main__':
+    nFiles = int(sys.argv[1]) if len(sys.argv)>1 else 40
+    nRows  = int(sys.argv[2]) if len(sys.argv)>2 else 20000
+    nCols  = int(sys.argv[3]) if len(sys.argv)>3 else 30
+    nCores = os.cpu_count()
+    nWorkersList = sorted(set([1, 2, 4, 8, nCores]))
+    nWorkersList = [n for n in nWorkersList if n<=nCores]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        print('Creating {} files of {}x{} in {}'.format(nFiles, nRows, nCols, tmpdir))
+        filenames = createFiles(tmpdir, nFiles, nRows, nCols)
+        benchmark(filenames, nWorkersList, pool='process')
+        benchmark(filenames, nWorkersList, pool='thread')
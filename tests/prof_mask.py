@@ -0,0 +1,50 @@
+"""
+Benchmark of the evaluation of masks on several tables.
+Compares python `eval` of the formatted mask string (previous implementation) with the compiled
+masks (`TableList.evalMasks`), evaluated with numexpr if installed, numpy otherwise.
+
+Usage:
+    python tests/prof_mask.py [nRows]
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+from pydatview.Tables import Table, TableList
+from pydatview.plugins.data_mask import formatMaskString
+
+def tables(nTabs=4, nRows=2*10**6):
+    np.random.seed(0)
+    tabs = []
+    for i in range(nTabs):
+        df = pd.DataFrame(data={'Time_[s]':np.arange(nRows)*0.01, 'WS_[m/s]':np.random.uniform(3,25,nRows), 'Pitch_[deg]':np.random.uniform(0,20,nRows)})
+        tabs.append(Table(data=df))
+    return TableList(tabs)
+
+def benchmark(nRows=2*10**6, nRepeat=3):
+    tabList = tables(nRows=nRows)
+    masks = ['({Time}>100) && ({WS}>8)', '(abs({WS}-12)<2) && ({Pitch}>1) || ({Pitch}>15) && ({WS}>10)']
+    print('{:62s} {:>9s} {:>9s} {:>9s} {:>10s}'.format('mask', 'eval [s]', 'new [s]', 'speedup', 'cached [s]'))
+    for sMask in masks:
+        T1, T2, T3 = np.inf, np.inf, np.inf
+        for i in range(nRepeat):
+            sMasks = [formatMaskString(t.data, sMask).replace('&&','&').replace('||','|') for t in tabList]
+            t0 = time.time()
+            for t, s in zip(tabList, sMasks):
+                df = t.data
+                M1 = np.asarray(eval(s))
+            T1 = min(T1, time.time()-t0)
+            for t in tabList:
+                t._maskCache = {}
+            t0 = time.time()
+            tabList.evalMasks([sMask]*len(tabList))
+            T2 = min(T2, time.time()-t0)
+            # Mask applied again on the same data
+            t0 = time.time()
+            tabList.evalMasks([sMask]*len(tabList))
+            T3 = min(T3, time.time()-t0)
+        print('{:62s} {:9.4f} {:9.4f} {:9.1f} {:10.6f}'.format(sMask, T1, T2, T1/T2, T3))
+
+if __name__ == '__main__':
+    nRows = int(float(sys.argv[1])) if len(sys.argv)>1 else 2*10**6
+    benchmark(nRows)
@@ -0,0 +1,59 @@
+"""
+Benchmark of the methods to read ASCII OpenFAST output files (load_ascii_output).
+Creates a large ASCII output file, and reads it with each method, and with the streaming method
+reading only a subset of channels and a time window.
+
+Usage:
+    python tests/prof_out.py [nRows] [nCols]
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+from pydatview.io.fast_output_file import load_ascii_output
+
+def createFile(filename, nRows=200000, nCols=50):
+    cols = ['Time'] + ['Chan{}'.format(i) for i in range(nCols-1)]
+    units= ['(s)']  + ['(-)']*(nCols-1)
+    M = np.random.normal(0, 1, (nRows, nCols))
+    M[:,0] = np.arange(nRows)*0.01
+    with open(filename, 'w') as f:
+        f.write('Generated by prof_out.py\n\n')
+        f.write('\t'.join(cols)+'\n')
+        f.write('\t'.join(units)+'\n')
+        np.savetxt(f, M, fmt='%10.4e', delimiter='\t')
+    return M
+
+def benchmark(nRows=200000, nCols=50):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, 'prof.out')
+        M = createFile(filename, nRows, nCols)
+        size = os.path.getsize(filename)/1024**2
+        T = M[-1,0]
+        print('File: {} rows x {} channels, {:.1f}MB'.format(nRows, nCols, size))
+        cases = [
+            ('numpy'           , dict(method='numpy')),
+            ('pandas'          , dict(method='pandas')),
+            ('forLoop'         , dict(method='forLoop')),
+            ('listCompr'       , dict(method='listCompr')),
+            ('stream'          , dict(method='stream')),
+            ('stream 3 chan'   , dict(method='stream', channels=[0,1,2])),
+            ('stream last 10%' , dict(method='stream', tRange=(0.9*T, T))),
+            ('stream first 10%', dict(method='stream', tRange=(0, 0.1*T))),
+            ]
+        print('{:18s} {:>10s} {:>10s}'.format('method', 'time [s]', 'MB/s'))
+        for name, kwargs in cases:
+            t0 = time.time()
+            try:
+                data, info = load_ascii_output(filename, **kwargs)
+            except Exception as e:
+                print('{:18s} failed: {}'.format(name, e))
+                continue
+            dt = time.time()-t0
+            print('{:18s} {:10.3f} {:10.1f}'.format(name, dt, size/dt))
+
+if __name__ == '__main__':
+    nRows = int(sys.argv[1]) if len(sys.argv)>1 else 200000
+    nCols = int(sys.argv[2]) if len(sys.argv)>2 else 50
+    benchmark(nRows, nCols)
@@ -0,0 +1,54 @@
+"""
+Benchmark of the redraw latency of a line plot, with and without min/max decimation
+(as done by PlotPanel.plotSignals when "Decimate" is checked in the esthetics panel).
+Measures the first draw, and a redraw after zooming on 10% of the signal (pan/zoom).
+
+Usage:
+    python tests/prof_plot.py [nMax]
+"""
+import sys
+import time
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from pydatview.figure import SwappyFigure as Figure
+from pydatview.tools.decimation import DecimatedLine
+
+def plotAndDraw(x, y, decimate):
+    fig = Figure(figsize=(12,6), dpi=100)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    t0 = time.time()
+    if decimate:
+        lod = DecimatedLine(None, x, y)
+        lines = ax.plot(*lod.decimate(ax, xlim=(x[0], x[-1])))
+        lod.line = lines[0]
+        lod.connect()
+    else:
+        lod = None
+        lines = ax.plot(x, y)
+    canvas.draw()
+    tDraw = time.time()-t0
+    # Zoom on 10% of the signal, the decimation is recomputed for the visible range
+    t0 = time.time()
+    ax.set_xlim(x[len(x)//2], x[len(x)//2+len(x)//10])
+    canvas.draw()
+    tZoom = time.time()-t0
+    nPlotted = len(lines[0].get_xdata())
+    return tDraw, tZoom, nPlotted
+
+def benchmark(nMax=10**7):
+    print('{:>10s} {:>9s} {:>12s} {:>12s} {:>10s}'.format('n','decimate','draw [s]','zoom [s]','nPlotted'))
+    n = 10**4
+    while n<=nMax:
+        x = np.linspace(0, 1, n)
+        y = np.random.normal(0, 1, n)
+        for decimate in [False, True]:
+            tDraw, tZoom, nPlotted = plotAndDraw(x, y, decimate)
+            print('{:10d} {:>9s} {:12.4f} {:12.4f} {:10d}'.format(n, str(decimate), tDraw, tZoom, nPlotted))
+        n *= 10
+
+if __name__ == '__main__':
+    nMax = int(float(sys.argv[1])) if len(sys.argv)>1 else 10**7
+    benchmark(nMax)
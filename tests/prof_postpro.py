@@ -0,0 +1,51 @@
+"""
+Benchmark of the post-processing of a simulation campaign with `averagePostPro`.
+Binary OpenFAST outputs are generated, and averaged:
+  - reading the full files (as done by weio.read), serially
+  - reading only the columns of `ColKeep` and the rows of the window, serially and in parallel
+
+Usage:
+    python tests/prof_postpro.py [nFiles] [nChan]
+"""
+import os
+import sys
+import time
+import tempfile
+import warnings
+import numpy as np
+import pandas as pd
+import pydatview.io as weio
+from pydatview.io.fast_output_file import writeDataFrame
+from pydatview.fast.postpro import averageDF, averagePostPro
+
+def campaign(dirname, nFiles=50, nChan=300, T=600, dt=0.05):
+    t = np.arange(0, T, dt)
+    files = []
+    for k in range(nFiles):
+        d = {'Time_[s]':t, 'Wind1VelX_[m/s]':4+k*0.5+np.sin(t), 'RotSpeed_[rpm]':8+0*t}
+        for c in range(nChan):
+            d['C{}_[-]'.format(c)] = np.cos(t*(c+1)*0.1)+k
+        files.append(os.path.join(dirname, 'sim{:04d}.outb'.format(k)))
+        writeDataFrame(pd.DataFrame(d), files[-1])
+    return files
+
+def benchmark(nFiles=50, nChan=300):
+    warnings.filterwarnings('ignore')
+    kw = dict(avgMethod='constantwindow', avgParam=100, ColMap={'WS':'Wind1VelX_[m/s]'}, 
+              ColKeep=['WS', 'RotSpeed_[rpm]', 'C0_[-]', 'C1_[-]', 'C2_[-]'], stats=['mean', 'std', 'max', 'p90'])
+    with tempfile.TemporaryDirectory() as tmpdir:
+        files = campaign(tmpdir, nFiles, nChan)
+        print('{} files, {} channels, {} CPUs'.format(nFiles, nChan+3, os.cpu_count()))
+        print('{:32s} {:>10s}'.format('case', 'time [s]'))
+        t0 = time.time()
+        for f in files:
+            averageDF(weio.read(f).toDataFrame(), **kw)
+        print('{:32s} {:10.3f}'.format('full read, serial', time.time()-t0))
+        for nWorkers in [1, None]:
+            t0 = time.time()
+            averagePostPro(files, nWorkers=nWorkers, **kw)
+            print('{:32s} {:10.3f}'.format('pushdown, nWorkers={}'.format(nWorkers), time.time()-t0))
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:]]
+    benchmark(*args)
@@ -0,0 +1,66 @@
+"""
+Benchmark of the cold start time: import of the io package, reading of a binary OpenFAST
+output file, and import of the GUI (if wxPython is installed).
+Each case runs in a new python process, the best of `nRepeat` runs is reported.
+
+Usage:
+    python tests/prof_startup.py [file.outb]
+"""
+import os
+import sys
+import time
+import tempfile
+import subprocess
+import numpy as np
+
+MyDir = os.path.dirname(__file__)
+RootDir = os.path.abspath(os.path.join(MyDir, '..'))
+
+def coldTime(code, nRepeat=5):
+    """ Best wall time of a new python process running `code`, and its last line of output """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = RootDir + os.pathsep + env.get('PYTHONPATH', '')
+    T = np.inf
+    for i in range(nRepeat):
+        t0 = time.time()
+        p = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True)
+        T = min(T, time.time()-t0)
+        if p.returncode!=0:
+            return None, p.stderr.strip().split('\n')[-1]
+    return T, p.stdout.strip()
+
+def writeOutb(filename, nT=10000, nChan=50):
+    import pandas as pd
+    from pydatview.io.fast_output_file import writeDataFrame
+    t = np.arange(nT)*0.01
+    M = np.column_stack([t]+[np.sin(t*(i+1)) for i in range(nChan)])
+    df = pd.DataFrame(data=M, columns=['Time_[s]']+['C{}_[-]'.format(i) for i in range(nChan)])
+    writeDataFrame(df, filename)
+
+def benchmark(filename):
+    f = filename.replace('\\', '/')
+    cases = [
+        ('python'                  , 'pass'),
+        ('import numpy, pandas'    , 'import numpy, pandas'),
+        ('import pydatview.io'     , 'import pydatview.io as weio'),
+        ('weio.fileFormats()'      , 'import pydatview.io as weio; weio.fileFormats()'),
+        ('weio.read(outb)'         , 'import pydatview.io as weio; weio.read("{}")'.format(f)),
+        ('weio.read(outb), modules', 'import sys; import pydatview.io as weio; weio.read("{}"); print("{{}} io modules imported".format(sum([m.startswith("pydatview.io.") for m in sys.modules])))'.format(f)),
+        ('import pydatview.main'   , 'import pydatview.main'),
+    ]
+    print('{:26s} {:>10s}'.format('case', 'time [s]'))
+    for name, code in cases:
+        T, out = coldTime(code)
+        if T is None:
+            print('{:26s} {:>10s}  ({})'.format(name, 'failed', out))
+        else:
+            print('{:26s} {:10.3f}  {}'.format(name, T, out))
+
+if __name__ == '__main__':
+    if len(sys.argv)>1:
+        benchmark(sys.argv[1])
+    else:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, 'startup.outb')
+            writeOutb(filename)
+            benchmark(filename)
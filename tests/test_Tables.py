@@ -98,6 +98,274 @@ class TestTable(unittest.TestCase):
         self.assertEqual(ffname1, ffname2)
 
 
+    def test_load_lazy_outb(self):
+        # Lazy tables decode columns on demand, and give the same data as regular tables
+        import tempfile
+        from pydatview.io.fast_output_file import writeDataFrame
+        df = pd.DataFrame(data={'Time_[s]':np.linspace(0,10,101), 'A_[m]':np.sin(np.arange(101)), 'B_[N]':np.arange(101)*2.})
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, 'lazy.outb')
+            writeDataFrame(df, filename)
+            tablist = TableList()
+            tablist.load_tables_from_files(filenames=[filename])
+            tablistLazy = TableList()
+            tablistLazy.options['lazy'] = True
+            tablistLazy.load_tables_from_files(filenames=[filename])
+            tab, tabLazy = tablist[0], tablistLazy[0]
+            self.assertTrue(tabLazy.lazy)
+            np.testing.assert_equal(tabLazy.columns, tab.columns)
+            self.assertEqual(tabLazy.nRows, tab.nRows)
+            for i in range(tab.nCols):
+                np.testing.assert_array_equal(tabLazy.getColumn(i)[0], tab.getColumn(i)[0])
+            self.assertTrue(tabLazy.lazy)
+            # Accessing the data creates the full DataFrame
+            np.testing.assert_array_equal(tabLazy.data.values, tab.data.values)
+            self.assertFalse(tabLazy.lazy)
+            del tabLazy, tablistLazy
+
+    def test_load_files_parallel(self):
+        # Parallel loading keeps the order of the files and the warnings
+        files =[
+                os.path.join(self.scriptdir,'../example_files/CSVComma.csv'),
+                os.path.join(self.scriptdir,'../example_files/DoesNotExist.csv'),
+                os.path.join(self.scriptdir,'../example_files/HAWCStab2.pwr')
+                ]
+        tablist = TableList()
+        _, warn1 = tablist.load_tables_from_files(filenames=files, nWorkers=1)
+        for pool in ['thread', 'process']:
+            tablist2 = TableList()
+            _, warn2 = tablist2.load_tables_from_files(filenames=files, nWorkers=2, pool=pool)
+            self.assertEqual(warn1, warn2)
+            self.assertEqual(tablist.filenames, tablist2.filenames)
+            self.assertEqual([ff.name for ff in tablist.fileformats], [ff.name for ff in tablist2.fileformats])
+            for t1, t2 in zip(tablist, tablist2):
+                np.testing.assert_array_equal(t1.data.values, t2.data.values)
+
+    def test_load_files_cache(self):
+        # Second load is done from the cache, and gives the same tables
+        import tempfile
+        from pydatview.filecache import FileCache
+        files =[
+                os.path.join(self.scriptdir,'../example_files/CSVComma.csv'),
+                os.path.join(self.scriptdir,'../example_files/HAWCStab2.pwr')
+                ]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tablist = TableList()
+            tablist.options['cache'] = True
+            tablist._fileCache = FileCache(cacheDir=tmpdir)
+            tablist.load_tables_from_files(filenames=files)
+            self.assertEqual(len(tablist.fileCache), 2)
+            tablist2 = TableList()
+            tablist2.options['cache'] = True
+            tablist2._fileCache = FileCache(cacheDir=tmpdir)
+            tablist2.load_tables_from_files(filenames=files)
+            self.assertEqual([ff.name for ff in tablist.fileformats], [ff.name for ff in tablist2.fileformats])
+            for t1, t2 in zip(tablist, tablist2):
+                self.assertIsNone(t2.fileobject) # loaded from cache
+                self.assertEqual(t1.name, t2.name)
+                np.testing.assert_equal(t1.columns, t2.columns)
+                np.testing.assert_array_equal(t1.data.values, t2.data.values)
+            # Eviction
+            tablist2.fileCache.evict(maxBytes=0)
+            self.assertEqual(len(tablist2.fileCache), 0)
+
+    def test_follow(self):
+        # Rows appended to growing files are added to the tables
+        import tempfile
+        from pydatview.io.fast_output_file import writeDataFrame
+        M = np.random.normal(0, 1, (100, 3))
+        M[:,0] = np.arange(100)*0.1
+        def writeOut(filename, M, mode='w'):
+            with open(filename, mode) as f:
+                if mode=='w':
+                    f.write('Header\n\nTime\tA\tB\n(s)\t(m)\t(N)\n')
+                np.savetxt(f, M, fmt='%.6e', delimiter='\t')
+        def writeCSV(filename, M, mode='w'):
+            with open(filename, mode) as f:
+                if mode=='w':
+                    f.write('Time,A,B\n')
+                np.savetxt(f, M, fmt='%.6e', delimiter=',')
+        def writeOutb(filename, M):
+            df = pd.DataFrame(data=M, columns=['Time_[s]','A_[m]','B_[N]'])
+            writeDataFrame(df, filename)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for ext, write in [('.out', writeOut), ('.csv', writeCSV), ('.outb', None)]:
+                filename = os.path.join(tmpdir, 'follow'+ext)
+                if write is None:
+                    # NOTE: binary files are rewritten, the scaling is unchanged if the range is unchanged
+                    M2 = M.copy()
+                    M2[:,1:] = np.clip(M2[:,1:], -1, 1)
+                    M2[0,1:] = -2; M2[1,1:] = 2
+                    writeOutb(filename, M2[:60])
+                else:
+                    M2 = M
+                    write(filename, M2[:60])
+                tablist = TableList()
+                tablist.load_tables_from_files(filenames=[filename])
+                tab = tablist[0]
+                self.assertEqual(tab.nRows, 60)
+                IUpdated, IReloaded = tablist.follow()
+                self.assertEqual(IUpdated, [])
+                if write is None:
+                    writeOutb(filename, M2)
+                else:
+                    write(filename, M2[60:], mode='a')
+                IUpdated, IReloaded = tablist.follow()
+                self.assertEqual(IUpdated, [0])
+                self.assertEqual(IReloaded, [])
+                tab = tablist[0]
+                self.assertEqual(tab.nRows, 100)
+                np.testing.assert_array_equal(tab.data['Index'], np.arange(100))
+                np.testing.assert_allclose(tab.data.values[:,1:], M2, rtol=1e-4, atol=1e-4)
+                # Rewritten file is reloaded
+                if write is not None:
+                    write(filename, M2[:10])
+                    IUpdated, IReloaded = tablist.follow()
+                    self.assertEqual(IReloaded, [0])
+                    self.assertEqual(tablist[0].nRows, 10)
+                    # Rewritten file, longer than the part read
+                    M3 = M2[::-1].copy()
+                    write(filename, M3)
+                    IUpdated, IReloaded = tablist.follow()
+                    self.assertEqual(IReloaded, [0])
+                    np.testing.assert_allclose(tablist[0].data.values[:,1:], M3, rtol=1e-4, atol=1e-4)
+
+    def test_date_columns(self):
+        # String dates are converted to datetime64, columns converted to seconds are reused
+        t = pd.date_range('2020-01-30', periods=50, freq='10s')
+        df = pd.DataFrame(data={'Date':t.strftime('%d/%m/%Y %H:%M:%S'), 'y':np.arange(50.)})
+        tab = Table(data=df, dayfirst=True)
+        self.assertTrue(np.issubdtype(tab.data['Date'].dtype, np.datetime64))
+        np.testing.assert_array_equal(tab.data['Date'].values, t.values)
+        self.assertEqual(tab._dateFormats['Date'], '%d/%m/%Y %H:%M:%S')
+        x, isString, isDate, c = tab.getColumn(1)
+        self.assertTrue(isDate)
+        self.assertEqual(x.dtype, np.dtype('datetime64[s]'))
+        self.assertIs(tab.getColumn(1)[0], x)
+        tab.applyMaskString("df['y']>=10", bAdd=False)
+        x2 = tab.getColumn(1)[0]
+        np.testing.assert_array_equal(x2, t.values[10:].astype('datetime64[s]'))
+
+    def test_getColumn_views(self):
+        # Without mask, columns are read-only views on the table data
+        from pydatview.pipeline import Pipeline
+        df = pd.DataFrame(data={'Time':np.arange(10.), 'A':np.arange(10.)**2})
+        tab = Table(data=df)
+        x, isString, isDate, c = tab.getColumn(2)
+        self.assertTrue(np.shares_memory(x, tab.data['A'].values))
+        self.assertFalse(x.flags.writeable)
+        # No plot filters: the data is not copied
+        x2, y2 = Pipeline().applyOnPlotData(x, x, 0)
+        self.assertTrue(x2 is x)
+        # With a mask, the mask index is computed once
+        tab.applyMaskString('df["Time"]>4', bAdd=False)
+        x, isString, isDate, c = tab.getColumn(2)
+        np.testing.assert_array_equal(x, np.arange(5.,10.)**2)
+        np.testing.assert_array_equal(c.values, x)
+        self.assertTrue(tab.maskIndex is tab.maskIndex)
+        tab.clearMask()
+        self.assertEqual(len(tab.getColumn(2)[0]), 10)
+
+    def test_mask(self):
+        # Masks are compiled, checked against the columns, and cached
+        df = pd.DataFrame(data={'Time_[s]':np.arange(10.), 'WS_[m/s]':np.arange(10.)%3, 'Name':list('abcabcabca')})
+        tab = Table(data=df)
+        np.testing.assert_array_equal(np.flatnonzero(tab.evalMask('({Time}>2) && ({WS}==1)')), [4, 7])
+        np.testing.assert_array_equal(np.flatnonzero(tab.evalMask('{Time}>2 && {WS}==1 || {Time}==0')), [0, 4, 7])
+        np.testing.assert_array_equal(np.flatnonzero(tab.evalMask('2<{Time}<=5')), [3, 4, 5])
+        np.testing.assert_array_equal(np.flatnonzero(tab.evalMask("np.asarray(df['WS_[m/s]'])==2")), [2, 5, 8])
+        np.testing.assert_array_equal(np.flatnonzero(tab.evalMask("['b' in str(x) for x in {Name}]")), [1, 4, 7])
+        self.assertTrue(tab.evalMask('{Time}>4') is tab.evalMask('{Time}>4'))
+        # Errors
+        for sMask in ['{Foo}>1', "df['Foo']>1", '{Time}>', '{Time}+1', '{Time}>20']:
+            with self.assertRaises(Exception):
+                tab.applyMaskString(sMask, bAdd=False)
+        # Masks of several tables
+        tabList = TableList([tab, Table(data=df.iloc[:5].copy())])
+        errors = tabList.evalMasks(['{Time}>3', '{Foo}>3'])
+        self.assertTrue(errors[0] is None)
+        self.assertTrue(isinstance(errors[1], Exception))
+        tab.applyMaskString('{Time}>3', bAdd=False)
+        self.assertEqual(tab.nRows, 10)
+        np.testing.assert_array_equal(tab.getColumn(1)[0], np.arange(4.,10.))
+        df_new, name_new = tab.applyMaskString('{Time}>7', bAdd=True)
+        self.assertEqual(len(df_new), 2)
+
+    def test_mask_lazy(self):
+        # Masks of the mask action are formatted without converting lazy tables to DataFrame
+        from pydatview.io.tools.lazy_table import LazyTable
+        from pydatview.plugins.data_mask import prepareMasks, applyMask
+        df = pd.DataFrame(data={'Time_[s]':np.arange(10.), 'WS_[m/s]':np.arange(10.)%3})
+        tab = Table(data=LazyTable(lambda: df, df.columns, len(df)))
+        data = {'maskString':'({Time}>2) && ({WS}==1)'}
+        prepareMasks(TableList([tab]), data)
+        applyMask(tab, data)
+        self.assertTrue(tab.lazy)
+        np.testing.assert_array_equal(tab.getColumn(1)[0], [4., 7.])
+
+    def test_mask_numexpr(self):
+        # Element-wise masks are evaluated with numexpr if installed, with numpy otherwise
+        import pydatview.formulae as formulae
+        df = pd.DataFrame(data={'Time_[s]':np.arange(10.), 'WS_[m/s]':np.arange(10.)%3})
+        expr = formulae.compileMask('({Time}>2) && (np.sqrt({WS})==1)', ['Time_[s]', 'WS_[m/s]'])
+        self.assertTrue(expr.program is not None)
+        self.assertTrue(expr.neString is not None)
+        numexpr = formulae._getNumexpr()
+        try:
+            formulae._numexpr = None # numpy fallback
+            mask = expr.evaluate(lambda i: df.iloc[:, i], len(df))
+        finally:
+            formulae._numexpr = numexpr
+        np.testing.assert_array_equal(np.flatnonzero(mask), [4, 7])
+        if numexpr is None:
+            self.skipTest('numexpr not installed')
+        np.testing.assert_array_equal(expr.evaluate(lambda i: df.iloc[:, i], len(df)), mask)
+
+    def test_mask_extension_dtypes(self):
+        # Columns with pandas extension types are evaluated with pandas, missing values are not selected
+        df = pd.DataFrame(data={'Time_[s]':np.arange(5.), 'N':pd.array([1, 2, None, 4, 5], dtype='Int64'),
+            'B':pd.array([True, False, None, True, False], dtype='boolean'), 'C':pd.Categorical(list('abcab'))})
+        tab = Table(data=df)
+        np.testing.assert_array_equal(np.flatnonzero(tab.evalMask('{N}>2')), [3, 4])
+        np.testing.assert_array_equal(np.flatnonzero(tab.evalMask('{B} && ({Time}>0)')), [3])
+        np.testing.assert_array_equal(np.flatnonzero(tab.evalMask("{C}=='a'")), [0, 3])
+        tab.applyMaskString('{N}>=2', bAdd=False)
+        np.testing.assert_array_equal(tab.getColumn(1)[0], [1., 3., 4.])
+
+    def test_formulas(self):
+        newDF = lambda: pd.DataFrame(data={'Time_[s]':np.arange(5.), 'A_[m]':np.arange(5.)**2})
+        tab = Table(data=newDF(), name='tab')
+        self.assertTrue(tab.addColumnByFormula('B', '{A}+1', 2))
+        self.assertTrue(tab.addColumnByFormula('C', '{B}*2', 3))
+        self.assertTrue(tab.addColumnByFormula('dA', '{A}.diff()', 4))
+        self.assertFalse(tab.addColumnByFormula('D', '{Foo}*2', 5))
+        np.testing.assert_array_equal(tab.data['C'], (np.arange(5.)**2+1)*2)
+        np.testing.assert_array_equal(tab.data['dA'].values[1:], np.diff(np.arange(5.)**2))
+        # Formulas using a modified formula column are updated
+        tab.setColumnByFormula('B', '{A}+10', 3)
+        np.testing.assert_array_equal(tab.data['C'], (np.arange(5.)**2+10)*2)
+        # Formulas restored in the order of their dependencies
+        formulas = TableList([tab]).storeFormulas()
+        formulas['tab'][0]['formula'] = '{C}-1' # B now depends on C, which is after it
+        formulas['tab'][1]['formula'] = '{A}*3'
+        tabList = TableList([Table(data=newDF(), name='tab')])
+        tabList.applyFormulas(formulas)
+        np.testing.assert_array_equal(tabList[0].columns, tab.columns)
+        np.testing.assert_array_equal(tabList[0].data['B'], 3*np.arange(5.)**2-1)
+        # Formulas failing to evaluate are rejected
+        tab = Table(data=pd.DataFrame(data={'Time_[s]':np.arange(5.), 'I':np.arange(5)}))
+        for f in ['{I}**-1', '~{Time}', '{Time}&1', 'np.arctan2({Time})']:
+            self.assertFalse(tab.addColumnByFormula('E', f, 3), f)
+        np.testing.assert_array_equal(tab.columns, ['Index', 'Time_[s]', 'I'])
+
+    def test_formulas_extension_dtypes(self):
+        # Formulas on columns with pandas extension types are evaluated with pandas
+        df = pd.DataFrame(data={'Time_[s]':np.arange(5.), 'N':pd.array([1, 2, None, 4, 5], dtype='Int64')})
+        tab = Table(data=df)
+        self.assertTrue(tab.addColumnByFormula('M', '{N}*2', 2))
+        self.assertEqual(list(tab.data['M']), [2, 4, pd.NA, 8, 10])
+        self.assertFalse(tab.addColumnByFormula('P', '{N}.foo()', 3))
+
     def test_change_units(self):
         data = np.ones((1,3)) 
         data[:,0] *= 2*np.pi/60    # rad/s
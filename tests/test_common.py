@@ -6,6 +6,7 @@ from pydatview.common import ellude_common, getDt, find_leftstop
 from pydatview.common import has_chinese_char
 from pydatview.common import filter_list
 from pydatview.common import rectangleOverlap
+from pydatview.common import guessDateFormat, toDatetime64
 import datetime
 
 class TestCommon(unittest.TestCase):
@@ -69,7 +70,22 @@ class TestCommon(unittest.TestCase):
         self.assertEqual(getDt(np.array([0.0,0.1])),0.1)
         self.assertEqual(getDt([0,1]),1)
         self.assertEqual(getDt(np.array([0,1])),1)
-    
+
+    def test_toDatetime64(self):
+        # Format detected on a sample, vectorized conversion
+        t = pd.date_range('2020-01-30', periods=100, freq='1333ms')
+        for fmt, dayfirst in [('%d/%m/%Y %H:%M:%S', True), ('%Y-%m-%d %H:%M:%S.%f', False), ('%m-%d-%Y %H:%M', False)]:
+            values = np.asarray(t.strftime(fmt), dtype=object)
+            self.assertEqual(guessDateFormat(values, dayfirst=dayfirst), fmt)
+            x = toDatetime64(values, guessDateFormat(values, dayfirst=dayfirst))
+            np.testing.assert_array_equal(np.asarray(x), pd.to_datetime(values, format=fmt).values)
+        # Values not of fixed width, NaT and strings that are not dates
+        values = np.array(['2020-01-01 10:00', 'NaT', '2020-01-02 10:00'], dtype=object)
+        fmt = guessDateFormat(values)
+        x = np.asarray(toDatetime64(values, fmt))
+        self.assertTrue(np.isnat(x[1]))
+        self.assertEqual(x[2], np.datetime64('2020-01-02T10:00'))
+        self.assertIsNone(guessDateFormat(np.array(['Monday', 'Tuesday'], dtype=object)))
 
     def test_leftstop(self):
         self.assertEqual(find_leftstop('A'   ),'A'  )
@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+from pydatview.tools.decimation import *
+
+# --------------------------------------------------------------------------------}
+# ---  
+# --------------------------------------------------------------------------------{
+class TestDecimation(unittest.TestCase):
+
+    def test_minmax_envelope(self):
+        # The min/max of each bucket, and the end points, are preserved
+        np.random.seed(3)
+        x = np.linspace(0, 10, 100001)
+        y = np.random.normal(0, 1, len(x))
+        nB = 100
+        xd, yd = minmax_decimate(x, y, nB)
+        self.assertTrue(len(xd)<=4*nB+1)
+        self.assertTrue(np.all(np.diff(xd)>0))
+        self.assertEqual((xd[0], xd[-1]), (x[0], x[-1]))
+        edges = np.linspace(0, 10, nB+1)
+        for a, b in zip(edges[:-1], edges[1:]):
+            I  = (x>=a) & (x<b)
+            Id = (xd>=a) & (xd<b)
+            self.assertEqual(np.max(y[I]), np.max(yd[Id]))
+            self.assertEqual(np.min(y[I]), np.min(yd[Id]))
+
+    def test_minmax_range(self):
+        x = np.arange(1000.)
+        y = np.sin(x)
+        # Small signals are not decimated
+        xd, yd = minmax_decimate(x, y, 500)
+        np.testing.assert_array_equal(xd, x)
+        # Visible range, with one point outside on each side
+        xd, yd = minmax_decimate(x, y, 10, xmin=100.5, xmax=200.5)
+        self.assertEqual((xd[0], xd[-1]), (100, 201))
+        self.assertTrue(len(xd)<=41)
+        # NaN gaps are kept
+        y[500] = np.nan
+        xd, yd = minmax_decimate(x, y, 10)
+        self.assertEqual(np.sum(np.isnan(yd)), 1)
+
+    def test_canDecimate(self):
+        x = np.arange(10**5)
+        self.assertTrue (DecimatedLine.canDecimate(x, x*1.0))
+        self.assertFalse(DecimatedLine.canDecimate(x[::-1], x))
+        self.assertFalse(DecimatedLine.canDecimate(x[:10], x[:10]))
+        self.assertFalse(DecimatedLine.canDecimate(x.astype('datetime64[s]'), x))
+
+    def test_pyramid(self):
+        np.random.seed(1)
+        y = np.random.normal(3, 1, 200003)
+        y[[7, 1000, 150000]] = np.nan
+        y[1100:1400] = np.nan
+        P = Pyramid(y, blockSize=64)
+        for i0, i1 in [(0, None), (1, 200002), (1100, 1400), (5, 70), (64, 128), (12345, 198765)]:
+            s = P.query(y, i0, i1)
+            Y = y[i0:i1]
+            if np.all(np.isnan(Y)):
+                self.assertEqual(s['n'], 0)
+                continue
+            self.assertEqual(s['min'] , np.nanmin(Y))
+            self.assertEqual(s['max'] , np.nanmax(Y))
+            self.assertEqual(s['iMin'], i0+np.nanargmin(Y))
+            self.assertEqual(s['iMax'], i0+np.nanargmax(Y))
+            self.assertEqual(s['n']   , np.sum(~np.isnan(Y)))
+            np.testing.assert_almost_equal(s['mean'], np.nanmean(Y), 10)
+            np.testing.assert_almost_equal(s['std'] , np.nanstd(Y), 10)
+        self.assertFalse(Pyramid.canBuild(y[:100]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,259 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+from pydatview.io.fast_output_file import FASTOutputFile, load_ascii_output
+
+def writeAsciiOut(filename, M, cols, units, footer=None):
+    with open(filename, 'w') as f:
+        f.write('Generated by test_io.py\n\n')
+        f.write('\t'.join(cols)+'\n')
+        f.write('\t'.join(units)+'\n')
+        np.savetxt(f, M, fmt='%.6e', delimiter='\t')
+        if footer is not None:
+            f.write(footer+'\n')
+
+def writeLin(filename, mats, WS=8.0, star=False):
+    """ Minimal OpenFAST linearization file with matrices A, B, C, D """
+    nx, nu, ny = mats['A'].shape[0], mats['B'].shape[1], mats['C'].shape[0]
+    with open(filename, 'w') as f:
+        f.write('\nLinearized model: generated by test_io.py\n\nSimulation information:\n')
+        f.write('Simulation time:                    0.0000 s\nRotor Speed:                        1.2671 rad/s\n')
+        f.write('Azimuth:                            0.0000 rad\nWind Speed:                        {:7.4f} m/s\n'.format(WS))
+        f.write('Number of continuous states:        {}\nNumber of discrete states:          0\n'.format(nx))
+        f.write('Number of constraint states:        0\nNumber of inputs:                   {}\n'.format(nu))
+        f.write('Number of outputs:                  {}\nJacobians included in this file?    No\n\n'.format(ny))
+        for title, n, deriv in [('continuous states', nx, ' 2 '), ('continuous state derivatives', nx, ' 2 '), ('inputs', nu, ' '), ('outputs', ny, ' ')]:
+            f.write('Order of {}:\n'.format(title))
+            f.write('   Row/Column  Operating Point  Rotating Frame?{}  Description\n'.format('  Derivative Order' if deriv==' 2 ' else ''))
+            f.write('   ----------  ---------------  ---------------  -----------\n')
+            for i in range(n):
+                f.write('   {:d}  {:.6E}  F{}ED {} {}, m\n'.format(i+1, i*0.1, deriv, title, i+1))
+            f.write('\n')
+        f.write('\nLinearized state matrices:\n\n')
+        for k in ['A', 'B', 'C', 'D']:
+            f.write('{}: {} x {}\n'.format(k, *mats[k].shape))
+            lines = [' '.join(['{:14.7E}'.format(v) for v in row]) for row in mats[k]]
+            if star and k=='A':
+                lines[0] = lines[0].replace(lines[0].split()[1], '**************')
+            f.write('\n'.join(lines)+'\n\n')
+
+class TestIO(unittest.TestCase):
+
+    def test_ascii_out_stream(self):
+        # Streaming reader gives the same data as numpy, with selection of channels and time window
+        M = np.random.normal(0, 1, (1000, 4))
+        M[:,0] = np.arange(1000)*0.1
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, 'test.out')
+            writeAsciiOut(filename, M, ['Time','A','B','C'], ['(s)','(m)','(N)','(-)'], footer='This output file was closed')
+            data1, info1 = load_ascii_output(filename, method='numpy')
+            data2, info2 = load_ascii_output(filename, method='stream', blockSize=1000)
+            np.testing.assert_array_equal(data1, data2)
+            self.assertEqual(info1, info2)
+            # Selection
+            data3, info3 = load_ascii_output(filename, method='stream', blockSize=1000, channels=['Time','C_[-]',1], tRange=(10, 20.05))
+            b = (M[:,0]>=10) & (M[:,0]<=20.05)
+            np.testing.assert_array_equal(data3, data1[b][:, [0,3,1]])
+            self.assertEqual(info3['attribute_names'], ['Time','C','A'])
+            self.assertEqual(info3['attribute_units'], ['s','-','m'])
+            data4, _ = load_ascii_output(filename, method='numpy', channels=['Time','C_[-]',1], tRange=(10, 20.05))
+            np.testing.assert_array_equal(data3, data4)
+            # Through the file class
+            df = FASTOutputFile(filename, channels=['Time','B']).toDataFrame()
+            np.testing.assert_equal(df.columns.values, ['Time_[s]','B_[N]'])
+            np.testing.assert_array_equal(df.values, data1[:,[0,2]])
+            # File without end of line after the last row
+            writeAsciiOut(filename, M[:20], ['Time','A','B','C'], ['(s)','(m)','(N)','(-)'])
+            with open(filename, 'r') as f:
+                content = f.read()
+            with open(filename, 'w') as f:
+                f.write(content.rstrip('\n'))
+            for method in ['stream', 'numpy', 'pandas', 'forLoop', 'listCompr']:
+                data, _ = load_ascii_output(filename, method=method)
+                np.testing.assert_allclose(data, M[:20], rtol=1e-6, err_msg=method)
+
+    def test_formats_registry(self):
+        # Formats are registered without importing their modules, metadata match the file classes
+        import pydatview.io as weio
+        from pydatview.io import LIBRARY_FORMATS, FileFormat
+        for priority, module, className, name, extensions in LIBRARY_FORMATS:
+            ff = FileFormat(module='.'+module, className=className, name=name, extensions=extensions, package='pydatview.io')
+            self.assertFalse(ff.isLoaded)
+            try:
+                cls = ff.constructor
+            except ImportError:
+                continue
+            self.assertEqual(cls.__name__, className)
+            self.assertEqual(name, cls.formatName())
+            self.assertEqual(extensions, cls.defaultExtensions())
+        # Detection imports the module of the format
+        M = np.column_stack((np.arange(10)*0.1, np.arange(10)))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, 'test.out')
+            writeAsciiOut(filename, M, ['Time','A'], ['(s)','(m)'])
+            fileformat, F = weio.detectFormat(filename)
+            self.assertEqual(fileformat.name, 'FAST output file')
+            self.assertTrue(fileformat.isLoaded)
+            self.assertTrue(isinstance(F, FASTOutputFile))
+    def test_format_candidates(self):
+        # Probes on the first bytes of files rank the candidate formats
+        import pydatview.io as weio
+        M = np.column_stack((np.arange(10)*0.1, np.arange(10)))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            # ASCII OpenFAST output
+            filename = os.path.join(tmpdir, 'test.out')
+            writeAsciiOut(filename, M, ['Time','A'], ['(s)','(m)'])
+            candidates = weio.formatCandidates(filename)
+            self.assertEqual(candidates[0][0].name, 'FAST output file')
+            self.assertEqual(candidates[0][1], True)
+            self.assertEqual(dict((ff.name, r) for ff,r in candidates)['BModes output file'], False)
+            # BModes output
+            filename = os.path.join(tmpdir, 'bmodes.out')
+            with open(filename, 'w') as f:
+                f.write('Results generated by BModes\n\n-------- Mode No.   1  (freq = 0.10000E+01 Hz)\n')
+            candidates = weio.formatCandidates(filename)
+            self.assertEqual(candidates[0][0].name, 'BModes output file')
+            self.assertEqual(candidates[-1], (candidates[-1][0], False))
+            # Binary file with wrong identifier
+            filename = os.path.join(tmpdir, 'test.outb')
+            with open(filename, 'wb') as f:
+                f.write(np.array([99, 1, 2], dtype=np.int16).tobytes())
+            candidates = weio.formatCandidates(filename)
+            self.assertEqual(candidates, [(candidates[0][0], False)])
+            # Tecplot
+            filename = os.path.join(tmpdir, 'test.dat')
+            with open(filename, 'w') as f:
+                f.write('VARIABLES = "x" "y"\n1 2\n3 4\n')
+            candidates = weio.formatCandidates(filename)
+            self.assertEqual(candidates[0][0].name, 'Tecplot ASCII file')
+            self.assertEqual(candidates[0][1], True)
+            self.assertEqual(weio.detectFormat(filename)[0].name, 'Tecplot ASCII file')
+
+    def test_turbsim_compact(self):
+        # Compact storage (packed int16, memory-mapped) gives the same values as the decoded field
+        from pydatview.io.turbsim_file import TurbSimFile
+        from pydatview.io.mannbox_file import MannBoxFile
+        nt, ny, nz, nTwr = 50, 6, 5, 3
+        ts = TurbSimFile()
+        ts['u']    = np.random.normal(0, 1, (3, nt, ny, nz)) + np.array([8, 0, 0])[:,None,None,None]
+        ts['uTwr'] = np.random.normal(0, 1, (3, nt, nTwr))
+        ts['t'] = np.arange(nt)*0.1
+        ts['y'] = np.arange(ny)*2.-5
+        ts['z'] = np.arange(nz)*2.+50
+        ts['zRef'], ts['uRef'], ts['ID'] = 54, 8, 7
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, 'test.bts')
+            ts.write(filename)
+            ts1 = TurbSimFile(filename)
+            ts2 = TurbSimFile(filename, compact=True)
+            self.assertFalse(ts1.compact)
+            self.assertTrue(ts2.compact)
+            self.assertEqual(ts2['u'].nbytes, ts1['u'].nbytes//4)
+            np.testing.assert_allclose(ts1['u'], ts['u'], atol=1e-3)
+            np.testing.assert_array_equal(np.asarray(ts2['u']), ts1['u'])
+            np.testing.assert_array_equal(np.asarray(ts2['uTwr']), ts1['uTwr'])
+            np.testing.assert_array_equal(ts2.valuesAt(y=1, z=52), ts1.valuesAt(y=1, z=52))
+            np.testing.assert_array_equal(ts2.horizontalPlane(z=52), ts1.horizontalPlane(z=52))
+            for y_span in ['full', 'mid']:
+                z1, m1, s1 = ts1.vertProfile(y_span)
+                z2, m2, s2 = ts2.vertProfile(y_span)
+                np.testing.assert_allclose(m2, m1)
+                np.testing.assert_allclose(s2, s1)
+            del ts2 # release the memory map
+            # Mann box
+            filename = os.path.join(tmpdir, 'test_16x4x3.u')
+            mb = MannBoxFile()
+            mb['field'] = np.random.normal(0, 1, (16, 4, 3)).astype(np.float32)
+            mb.write(filename)
+            mb1 = MannBoxFile(filename)
+            mb2 = MannBoxFile(filename, compact=True)
+            np.testing.assert_array_equal(mb1['field'], mb['field'])
+            np.testing.assert_array_equal(mb2['field'], mb['field'])
+            np.testing.assert_array_equal(mb2.valuesAt(y=0, z=1), mb1.valuesAt(y=0, z=1))
+            del mb2
+
+    def test_turbsim_lazy_tables(self):
+        # Tables of a TurbSim box are listed without computation, and computed when selected
+        from pydatview.io.turbsim_file import TurbSimFile
+        from pydatview.Tables import TableList
+        nt, ny, nz = 300, 4, 3
+        ts = TurbSimFile()
+        ts['u']    = np.random.normal(0, 1, (3, nt, ny, nz)) + np.array([8, 0, 0])[:,None,None,None]
+        ts['uTwr'] = np.random.normal(0, 1, (3, nt, 2))
+        ts['t'] = np.arange(nt)*0.1
+        ts['y'] = np.arange(ny)*2.-3
+        ts['z'] = np.arange(nz)*2.+50
+        ts['zRef'], ts['uRef'], ts['ID'] = 52, 8, 7
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, 'test.bts')
+            ts.write(filename)
+            dfs = TurbSimFile(filename).toDataFrame()
+            tabs = TableList()
+            tabs.options['lazy'] = True
+            tabs.load_tables_from_files([filename])
+            self.assertEqual(len(tabs), len(dfs))
+            for tab, (k, df) in zip(tabs, dfs.items()):
+                self.assertTrue(tab.name.endswith(k))
+                self.assertFalse(tab._lazyData.computed)
+                self.assertEqual(tab.nRows, len(df))
+                self.assertEqual(list(tab.columns[1:]), list(df.columns))
+            np.testing.assert_allclose(tabs[1].getColumn(2)[0], dfs['ZMidLine']['u_[m/s]'].values)
+            self.assertTrue(tabs[1]._lazyData.computed)
+            self.assertFalse(tabs[0]._lazyData.computed)
+            np.testing.assert_allclose(tabs[6].data.values[:,1:], dfs['Mid_csd_longi'].values)
+            self.assertFalse(tabs[6].lazy)
+            del tabs # release the memory map
+            # Without lazy reading, the tables are computed when the file is read
+            tabs = TableList()
+            tabs.load_tables_from_files([filename])
+            self.assertEqual(len(tabs), len(dfs))
+            self.assertTrue(all([not tab.lazy for tab in tabs]))
+            del tabs
+
+    def test_linearization_bulk(self):
+        # Block reader of matrices, selection of matrices, and reader of multiple files
+        from pydatview.io.fast_linearization_file import FASTLinearizationFile, readLinFiles
+        nx, nu, ny = 5, 2, 3
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filenames, As = [], []
+            for i in range(3):
+                mats = {'A':np.random.normal(size=(nx,nx)), 'B':np.random.normal(size=(nx,nu)), 
+                        'C':np.random.normal(size=(ny,nx)), 'D':np.random.normal(size=(ny,nu))}
+                filenames.append(os.path.join(tmpdir, 'lin{}.1.lin'.format(i)))
+                writeLin(filenames[-1], mats, WS=4+i)
+                As.append(mats['A'])
+            lin = FASTLinearizationFile(filenames[0])
+            np.testing.assert_allclose(lin['A'], As[0], rtol=1e-6)
+            self.assertEqual(lin['D'].shape, (ny, nu))
+            self.assertEqual(len(lin.x_descr), nx)
+            lin = FASTLinearizationFile(filenames[0], matrices=['A'])
+            self.assertTrue('A' in lin.keys() and 'B' not in lin.keys())
+            # Stacked matrices
+            lins = readLinFiles(filenames, matrices=['A', 'C'], nWorkers=1)
+            self.assertEqual(lins['A'].shape, (3, nx, nx))
+            self.assertEqual(lins['C'].shape, (3, ny, nx))
+            self.assertFalse('B' in lins.keys())
+            np.testing.assert_allclose(lins['A'], np.stack(As), rtol=1e-6)
+            np.testing.assert_array_equal(lins['WindSpeed'], [4, 5, 6])
+            # Star values
+            writeLin(filenames[0], mats, star=True)
+            with self.assertRaises(Exception):
+                FASTLinearizationFile(filenames[0])
+            lin = FASTLinearizationFile(filenames[0], starSub=0)
+            self.assertEqual(lin['A'][0,1], 0)
+            np.testing.assert_allclose(lin['B'], mats['B'], rtol=1e-6)
+            # Rows of wrong lengths, with the right number of values
+            with open(filenames[1], 'r') as f:
+                lines = f.readlines()
+            iA = [i for i,l in enumerate(lines) if l.startswith('A:')][0]
+            v = lines[iA+2].split()
+            lines[iA+1] = lines[iA+1].rstrip('\n') + ' ' + v[0] + '\n'
+            lines[iA+2] = ' '.join(v[1:]) + '\n'
+            with open(filenames[1], 'w') as f:
+                f.writelines(lines)
+            with self.assertRaises(Exception):
+                FASTLinearizationFile(filenames[1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -110,6 +110,107 @@ class TestPipeline(unittest.TestCase):
         self.assertTrue(s.find('ColB_[rad/s]')>10) # Make sure units have been changed in script
         pipeline.scripter.run(pltshow=False)
 
+    def test_pipeline_plot_cache(self):
+        # Results of the chains of plot filters are cached, only the filters after a change are re-applied
+        from pydatview.pipeline import PlotDataAction, dataHash
+        calls = {'a':0, 'b':0}
+        def fa(x, y, data):
+            calls['a'] += 1
+            return x, y*data['scale']
+        def fb(x, y, data):
+            calls['b'] += 1
+            return x[::data['n']], y[::data['n']]
+        aa = PlotDataAction('a', plotDataFunction=fa, data={'scale':2.0, 'active':True})
+        ab = PlotDataAction('b', plotDataFunction=fb, data={'n':2})
+        pipeline = Pipeline()
+        pipeline.append(aa, apply=False)
+        pipeline.append(ab, apply=False)
+        x = np.arange(10.)
+        y = np.arange(10.)
+        x1, y1 = pipeline.applyOnPlotData(x, y, 0, dataKey=('tab', 0))
+        x2, y2 = pipeline.applyOnPlotData(x, y, 0, dataKey=('tab', 0))
+        np.testing.assert_equal(y1, np.arange(0, 20, 4))
+        np.testing.assert_equal(y2, y1)
+        self.assertEqual(calls, {'a':1, 'b':1})
+        # Cached results are read-only, the input arrays are not
+        self.assertFalse(x1.flags.writeable)
+        self.assertTrue(x.flags.writeable)
+        # Change of the last filter only
+        ab.data['n'] = 5
+        x3, y3 = pipeline.applyOnPlotData(x, y, 0, dataKey=('tab', 0))
+        np.testing.assert_equal(y3, [0, 10])
+        self.assertEqual(calls, {'a':1, 'b':2})
+        # Change of the first filter, or of the input data
+        aa.data['scale'] = 3.0
+        pipeline.applyOnPlotData(x, y, 0, dataKey=('tab', 0))
+        pipeline.applyOnPlotData(x, y, 0, dataKey=('tab', 1))
+        self.assertEqual(calls, {'a':3, 'b':4})
+        # No key, no cache
+        pipeline.applyOnPlotData(x, y, 0)
+        self.assertEqual(calls, {'a':4, 'b':5})
+        # Hash is independent of the order of the keys, and sensitive to the values
+        self.assertEqual(dataHash({'a':1, 'b':[1,2]}), dataHash({'b':[1,2], 'a':1}))
+        self.assertNotEqual(dataHash({'a':1}), dataHash({'a':1.0}))
+        self.assertNotEqual(dataHash({'a':np.arange(3)}), dataHash({'a':np.arange(4)}))
+
+    def test_pipeline_plot_cache_duplicate_columns(self):
+        # Columns with the same name do not share their cached plot data
+        import pandas as pd
+        from pydatview.pipeline import PlotDataAction
+        df = pd.DataFrame(data=[[0,0,100],[1,1,101],[2,2,102]], columns=['t','A','A'])
+        tab = Table(data=df)
+        pipeline = Pipeline()
+        pipeline.append(PlotDataAction('a', plotDataFunction=lambda x,y,data: (x, y), data={'active':True}), apply=False)
+        for iy, yExpected in [(2, [0,1,2]), (3, [100,101,102])]:
+            PD = PlotData()
+            PD.fromIDs([tab], 0, [0, 1, iy, 't', 'A', ''], SameCol=False, pipeline=pipeline)
+            np.testing.assert_equal(PD.y, yExpected)
+
+    def test_pipeline_chunked(self):
+        # Actions applied by chunks give the same result as on the full table
+        import tempfile
+        import pandas as pd
+        from pydatview.plugins.data_mask import maskAction
+        from pydatview.plugins.plotdata_filter import filterAction
+        from pydatview.plugins.plotdata_sampler import samplerAction
+        from pydatview.plugins.plotdata_binning import binningAction
+        from pydatview.tools.signal_analysis import applyFilter
+        t = np.arange(0, 100, 0.1)
+        df = pd.DataFrame(data={'Time_[s]':t, 'A_[m]':np.sin(t), 'B_[N]':np.cos(t)})
+        pipeline = Pipeline()
+        pipeline.append(maskAction(data={'maskString':'{Time}>=20'}), apply=False) 
+        pipeline.append(filterAction(data={'name':'Low pass 1st order', 'param':0.5}), apply=False) 
+        pipeline.append(samplerAction(data={'name':'Every n', 'param':3}), apply=False) 
+        df2 = pipeline.applyChunked(df, chunkSize=97)
+        # Reference
+        dfRef = df[t>=20]
+        A = applyFilter(dfRef['Time_[s]'].values, dfRef['A_[m]'].values, {'name':'Low pass 1st order', 'param':0.5})
+        np.testing.assert_array_equal(df2.columns, df.columns)
+        np.testing.assert_allclose(df2['Time_[s]'], dfRef['Time_[s]'].values[::3])
+        np.testing.assert_allclose(df2['A_[m]'], A[::3])
+        # Parquet output
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, 'out.parquet')
+            n = pipeline.applyChunked(df, output=filename, chunkSize=97)
+            self.assertEqual(n, len(df2))
+            pd.testing.assert_frame_equal(pd.read_parquet(filename), df2)
+        # First chunk with one row
+        pipeline.actions[0].data['maskString'] = '{Time}>=9.6'
+        df3 = pipeline.applyChunked(df, chunkSize=97)
+        dfRef = df[t>=9.6]
+        A = applyFilter(dfRef['Time_[s]'].values, dfRef['A_[m]'].values, {'name':'Low pass 1st order', 'param':0.5})
+        np.testing.assert_allclose(df3['A_[m]'], A[::3])
+        # Actions that cannot be applied by chunks
+        from pydatview.common import PyDatViewException
+        for ac in [filterAction(data={'name':'High pass 1st order', 'param':0.5}), samplerAction(data={'name':'Replace', 'param':[1]})]:
+            p = Pipeline()
+            p.append(ac, apply=False)
+            with self.assertRaises(PyDatViewException):
+                p.applyChunked(df)
+        pipeline.append(binningAction(data={'nBins':10}), apply=False)
+        with self.assertRaises(Exception):
+            pipeline.applyChunked(df)
+
 if __name__ == '__main__':
     unittest.main()
 #     TestPipeline().test_pipeline_script_squareIt()
@@ -26,6 +26,26 @@ class TestPlotData(unittest.TestCase):
         self.assertAlmostEqual(Y[i],A)
         self.assertAlmostEqual(f[i],f0)
 
+    def test_FFTBatch(self):
+        # --- Batched FFT of several plot data should match individual FFTs
+        from pydatview.plotdata import toFFTBatch
+        t  = np.arange(0,100,0.1)
+        t2 = np.arange(0,50,0.05)
+        Y  = [np.sin(2*np.pi*f*t)+i for i,f in enumerate([0.5,1,2])]
+        def PDs():
+            return [PlotData(t,y,'Time_[s]','y_[m]') for y in Y] + [PlotData(t2, np.cos(t2), 'Time_[s]', 'y_[m]')]
+        for avgMethod in ['None', 'Welch', 'Binning']:
+            PDs1 = PDs()
+            PDs2 = PDs()
+            Infos = toFFTBatch(PDs2, yType='PSD', avgMethod=avgMethod, nExp=7)
+            self.assertEqual(len(Infos), len(PDs1))
+            for PD1, PD2 in zip(PDs1, PDs2):
+                PD1.toFFT(yType='PSD', avgMethod=avgMethod, nExp=7)
+                np.testing.assert_allclose(PD1.x, PD2.x)
+                np.testing.assert_allclose(PD1.y, PD2.y, rtol=1e-10, atol=1e-14)
+                self.assertEqual(PD1.sy, PD2.sy)
+                self.assertEqual(PD1.sx, PD2.sx)
+
     def test_MinMax(self):
         # Test Min Max scaling (between 0 and 1)
         x = np.linspace(-2,2,100)
@@ -114,6 +134,133 @@ class TestPlotData(unittest.TestCase):
         v, s = PD.leq(m=10, method='rainflow_windap')
         np.testing.assert_almost_equal(v, 9.4714702, 3)
 
+    def test_pyramid(self):
+        # Stats from the table pyramid are the same as the ones computed on the full data
+        import pandas as pd
+        from pydatview.Tables import Table
+        n = 100000
+        df = pd.DataFrame(data={'t':np.linspace(0,100,n), 'y':np.sin(np.linspace(0,100,n))+np.random.normal(0,0.1,n)})
+        df['y'].values[[10,5000]] = np.nan
+        tab = Table(data=df)
+        idx = [0, 1, 2, 't', 'y', '']
+        PD  = PlotData()
+        PD.fromIDs([tab], 0, idx, SameCol=False)
+        self.assertIsNotNone(PD._pyramidStats('y'))
+        y = df['y'].values
+        self.assertEqual(PD._yMin[0], np.nanmin(y))
+        self.assertEqual(PD._yMax[0], np.nanmax(y))
+        self.assertEqual(PD._xAtYMax[0], df['t'].values[np.nanargmax(y)])
+        np.testing.assert_almost_equal(PD._y0Mean[0], np.nanmean(y), 10)
+        np.testing.assert_almost_equal(PD._y0Std[0] , np.nanstd(y), 10)
+        # Measures within a window
+        PD.xyMeas = [(10.3, None), (42.1, None)]
+        i0, i1 = np.argmin(np.abs(PD.x-10.3)), np.argmin(np.abs(PD.x-42.1))
+        np.testing.assert_almost_equal(PD.yMeanMeas()[0], np.nanmean(y[i0:i1]), 10)
+        self.assertEqual(PD.yMaxMeas()[0], np.nanmax(y[i0:i1]))
+        # The pyramid is reused, and cleared when a mask is applied
+        self.assertTrue(tab.getPyramid(2) is PD._pyramids['y'][1])
+        tab.applyMaskString("df['t']>50", bAdd=False)
+        self.assertEqual(len(tab._pyramids), 0)
+        # Modified data does not use the pyramid
+        PD.toMinMax(yScale=True)
+        self.assertIsNone(PD._pyramidStats('y'))
+
+    def test_statsCache(self):
+        # Statistics are reused for the same table, columns, mask and transformations
+        import pandas as pd
+        from pydatview.Tables import Table
+        from pydatview.plotdata import statsCache
+        df = pd.DataFrame(data={'t':np.linspace(0,10,101), 'y':np.sin(np.linspace(0,10,101))})
+        tab = Table(data=df)
+        idx = [0, 1, 2, 't', 'y', '']
+        PD1 = PlotData()
+        PD1.fromIDs([tab], 0, idx, SameCol=False)
+        v1 = PD1.cachedStat('inty')
+        self.assertIn('inty', statsCache.get(PD1._statsKey))
+        PD2 = PlotData()
+        PD2.fromIDs([tab], 0, idx, SameCol=False)
+        self.assertEqual(PD1._statsKey, PD2._statsKey)
+        self.assertEqual(PD2.cachedStat('inty', lambda: None), v1)
+        # Transformations and masks change the key
+        PD2.toMinMax(yScale=True)
+        self.assertNotEqual(PD1._statsKey, PD2._statsKey)
+        tab.applyMaskString("df['t']>5", bAdd=False)
+        PD3 = PlotData()
+        PD3.fromIDs([tab], 0, idx, SameCol=False)
+        self.assertNotEqual(PD1._statsKey, PD3._statsKey)
+        np.testing.assert_almost_equal(PD3.cachedStat('yMean')[0], np.mean(df['y'].values[df['t']>5]))
+
+    def test_statsCacheLabels(self):
+        # Labels displayed by the info panel are not taken from the statistics cache
+        import pandas as pd
+        from pydatview.Tables import Table
+        df = pd.DataFrame(data={'t':np.linspace(0,10,11), 'y':np.linspace(0,1,11)})
+        tab = Table(data=df)
+        PD1 = PlotData()
+        PD1.fromIDs([tab], 0, [0, 1, 2, 't', 'label A', ''], SameCol=False)
+        self.assertEqual(PD1.cachedStat('yName')[1], 'label A')
+        PD2 = PlotData()
+        PD2.fromIDs([tab], 0, [0, 1, 2, 't', 'label B', ''], SameCol=False)
+        self.assertEqual(PD1._statsKey, PD2._statsKey)
+        self.assertEqual(PD2.cachedStat('yName')[1], 'label B')
+        # Renamed column
+        tab.renameColumn(2, 'y2')
+        PD3 = PlotData()
+        PD3.fromIDs([tab], 0, [0, 1, 2, 't', tab.columns[2], ''], SameCol=False)
+        self.assertEqual(PD3.cachedStat('yName')[1], 'y2')
+        self.assertNotEqual(PD1._statsKey, PD3._statsKey)
+        version = tab.version
+        tab.renameColumns(strReplDict={'z':'y'})
+        self.assertEqual(tab.version, version+1)
+
+    def test_statsCacheDuplicateColumns(self):
+        # Columns with the same name do not share their statistics
+        import pandas as pd
+        from pydatview.Tables import Table
+        df = pd.DataFrame(data=np.column_stack((np.arange(10.), np.arange(10.), np.arange(10.)+100)), columns=['t','A','A'])
+        tab = Table(data=df)
+        for iy, mean in [(2, 4.5), (3, 104.5)]:
+            PD = PlotData()
+            PD.fromIDs([tab], 0, [0, 1, iy, 't', 'A', ''], SameCol=False)
+            np.testing.assert_almost_equal(PD.cachedStat('yMean')[0], mean)
+
+    def test_spectrumCache(self):
+        # Raw spectra are reused when only the output type or the x type change
+        import pandas as pd
+        from pydatview.Tables import Table
+        from pydatview.plotdata import spectrumCache, SpectrumCache, toFFTBatch
+        t = np.linspace(0,100,1001)
+        df = pd.DataFrame(data={'t':t, 'y':np.sin(t), 'z':np.cos(2*t)})
+        tab = Table(data=df)
+        def PD(col='y'):
+            PD = PlotData()
+            PD.fromIDs([tab], 0, [0, 1, 2 if col=='y' else 3, 't', col, ''], SameCol=False)
+            return PD
+        spectrumCache.clear()
+        PD1 = PD()
+        PD1.toFFT(yType='PSD', avgMethod='Welch', nExp=7)
+        self.assertEqual(len(spectrumCache), 1)
+        for yType in ['Amplitude', 'f x PSD', 'PSD']:
+            for xType in ['1/x', 'x', '2pi/x']:
+                PD2 = PD(); PD2.toFFT(yType=yType, xType=xType, avgMethod='Welch', nExp=7)
+                PD3 = PlotData(t, df['y'].values); PD3.toFFT(yType=yType, xType=xType, avgMethod='Welch', nExp=7)
+                np.testing.assert_allclose(PD2.x, PD3.x)
+                np.testing.assert_allclose(PD2.y, PD3.y)
+        self.assertEqual(len(spectrumCache), 1)
+        # Batch uses and fills the cache
+        toFFTBatch([PD('y'), PD('z')], yType='Amplitude', avgMethod='Welch', nExp=7)
+        self.assertEqual(len(spectrumCache), 2)
+        # Other averaging options are new entries
+        PD().toFFT(avgMethod='Welch', nExp=6)
+        self.assertEqual(len(spectrumCache), 3)
+        # Eviction by size
+        cache = SpectrumCache(maxBytes=250)
+        for i in range(5):
+            cache.set(i, (np.zeros(10), np.zeros(10), None))
+        self.assertEqual(len(cache), 1)
+        self.assertIsNone(cache.get(0))
+        self.assertIsNotNone(cache.get(4))
+
 
 
 
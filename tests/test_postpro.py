@@ -0,0 +1,78 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import pydatview.io as weio
+from pydatview.io.fast_output_file import writeDataFrame
+from pydatview.fast.postpro import averageDF, averagePostPro
+
+def campaign(dirname, nFiles=4, nChan=10):
+    files = []
+    t = np.arange(0, 60, 0.05)
+    for k in range(nFiles):
+        d = {'Time_[s]':t, 'Azimuth_[deg]':np.mod(t*(60+k)*6, 360), 'RotSpeed_[rpm]':10+k+0*t, 'Wind1VelX_[m/s]':5+k+np.sin(t)}
+        for c in range(nChan):
+            d['C{}_[-]'.format(c)] = np.cos(t*(c+1))+k
+        files.append(os.path.join(dirname, 'sim{}.outb'.format(k)))
+        writeDataFrame(pd.DataFrame(d), files[-1])
+    return files
+
+class TestPostPro(unittest.TestCase):
+
+    def test_averagePostPro(self):
+        stats = ['mean', 'std', 'min', 'max', 'p90']
+        ColMap = {'WS':'Wind1VelX_[m/s]'}
+        ColKeep = ['WS', 'RotSpeed_[rpm]', 'C3_[-]']
+        with tempfile.TemporaryDirectory() as tmpdir:
+            files = campaign(tmpdir)
+            for avgMethod, avgParam in [('constantwindow', 10), ('periods', 3)]:
+                kw = dict(avgMethod=avgMethod, avgParam=avgParam, ColMap=ColMap, ColKeep=ColKeep, stats=stats)
+                ref = pd.concat([averageDF(weio.read(f).toDataFrame(), **kw) for f in files], ignore_index=True)
+                # Serial, with ColKeep and window pushed down to the reader, and invalid file
+                res = averagePostPro(files[::-1]+['missing.outb'], nWorkers=1, ColSort='WS', **kw)
+                self.assertEqual(list(res.columns), list(ref.columns))
+                np.testing.assert_allclose(res.values[:-1], ref.values)
+                self.assertTrue(np.all(np.isnan(res.values[-1])))
+                # Parallel
+                res2 = averagePostPro(files, nWorkers=2, **kw)
+                np.testing.assert_allclose(res2.values, ref.values)
+            self.assertIn('p90_C3_[-]', res.columns)
+            self.assertIn('std_WS', res.columns)
+
+    def test_multiStats(self):
+        from pydatview.tools.stats import multiStats
+        np.random.seed(0)
+        M = np.random.randn(5000, 6)*3+10
+        M[5,3] = np.nan
+        M[:,4] = np.nan
+        df = pd.DataFrame(M)
+        def median(time, M):
+            return np.nanmedian(M, axis=0)
+        V = dict(multiStats(M, ['mean', 'std', 'min', 'max', 'absmax', 'ti', 'p10', 'p90', median]))
+        np.testing.assert_allclose(V['mean'], df.mean(), equal_nan=True)
+        np.testing.assert_allclose(V['std'] , df.std() , equal_nan=True)
+        np.testing.assert_allclose(V['min'] , df.min() , equal_nan=True)
+        np.testing.assert_allclose(V['max'] , df.max() , equal_nan=True)
+        np.testing.assert_allclose(V['p90'] , df.quantile(0.9), equal_nan=True)
+        np.testing.assert_allclose(V['ti']  , df.std()/df.mean(), equal_nan=True)
+        np.testing.assert_allclose(V['absmax'], df.abs().max(), equal_nan=True)
+        self.assertEqual(len(V['median']), 6)
+        with self.assertRaises(ValueError):
+            multiStats(M, ['kurtosis'])
+
+    def test_averageDF_multiIndex(self):
+        t = np.arange(0, 10, 0.1)
+        df = pd.DataFrame({'Time_[s]':t, 'A_[m]':np.sin(t), 'B_[N]':2+np.cos(t)})
+        avg = averageDF(df, avgMethod='constantwindow', avgParam=None, stats=['mean', 'std', 'absmax', 'leq'], m=[3,5], multiIndex=True)
+        self.assertEqual(list(avg.columns.names), ['Stat', 'Channel'])
+        self.assertAlmostEqual(avg['std']['B_[N]'].iloc[0], df['B_[N]'].std())
+        self.assertAlmostEqual(avg['absmax']['A_[m]'].iloc[0], df['A_[m]'].abs().max())
+        self.assertEqual(list(avg['Leq(m=3)'].columns), ['A_[m]', 'B_[N]'])
+        avg = averageDF(df, avgMethod='constantwindow', avgParam=None, stats=['mean', 'std'])
+        self.assertEqual(list(avg.columns), ['Time_[s]', 'A_[m]', 'B_[N]', 'std_Time_[s]', 'std_A_[m]', 'std_B_[N]'])
+        with self.assertRaises(ValueError):
+            averageDF(df, avgMethod='constantwindow', avgParam=None, stats=[])
+
+if __name__ == '__main__':
+    unittest.main()